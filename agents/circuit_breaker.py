@@ -0,0 +1,195 @@
+import os
+import time
+import threading
+from collections import deque, OrderedDict
+from datetime import datetime
+
+from agents.model_router import AGENT_POLICY, DEFAULT_POLICY
+from services.result_archive import latest_result
+
+# Circuit breaker configuration
+ERROR_RATE_THRESHOLD = 0.5
+# Minimum slow-call threshold; agents whose router latency budget is higher get that instead
+SLOW_CALL_SECONDS = float(os.getenv("BREAKER_SLOW_CALL_SECONDS", "15"))
+WINDOW_SIZE = 20
+MIN_CALLS = 5
+# Seconds an open breaker fails fast before letting a single trial call through
+OPEN_SECONDS = float(os.getenv("BREAKER_OPEN_SECONDS", "30"))
+MAX_STORED_ANSWERS = 1000
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+STALE_NOTICE = (
+    "> ⚠️ **Degraded mode:** the AI service is currently unavailable or slow. "
+    "Showing the last answer generated for this request at {timestamp}; it may be out of date.\n\n"
+)
+FALLBACK_NOTICE = (
+    "> ⚠️ **Degraded mode:** the AI service is currently unavailable or slow. "
+    "Showing a locally computed estimate instead.\n\n"
+)
+
+
+class CircuitOpenError(Exception):
+    """Raised when a breaker is open and there is no stale answer or fallback to serve."""
+
+
+class CircuitBreaker:
+    """
+    Per-agent circuit breaker tracking error rate and slow calls over a rolling window.
+    While open, requests fail fast and are served from the last stored answer for the same
+    inputs (marked stale), else the last archived result for them, or a local fallback.
+    After open_seconds the breaker turns half-open and lets one real call through: it closes
+    only if that call succeeds within the slow-call threshold, and opens again otherwise.
+    :param name: Agent name
+    """
+
+    def __init__(self, name, slow_call_seconds=SLOW_CALL_SECONDS, open_seconds=OPEN_SECONDS):
+        self.name = name
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.state = STATE_CLOSED
+        self.opened_at = None
+        self._trial_started = None
+        self._outcomes = deque(maxlen=WINDOW_SIZE)
+        self._answers = OrderedDict()
+        self._lock = threading.Lock()
+        self.fast_failures = 0
+
+    def allow_request(self):
+        with self._lock:
+            now = time.time()
+            if self.state == STATE_OPEN and now - self.opened_at >= self.open_seconds:
+                self.state = STATE_HALF_OPEN
+                self._trial_started = None
+            if self.state == STATE_HALF_OPEN:
+                # One trial call at a time; a trial that never reported back is replaced
+                trial_running = self._trial_started is not None and now - self._trial_started < 2 * self.slow_call_seconds
+                if not trial_running:
+                    self._trial_started = now
+                    return True
+            if self.state != STATE_CLOSED:
+                self.fast_failures += 1
+                return False
+            return True
+
+    def record(self, success, latency):
+        """
+        Record a call outcome; calls slower than the threshold count as failures.
+        """
+        healthy = success and latency <= self.slow_call_seconds
+        with self._lock:
+            if self.state == STATE_HALF_OPEN:
+                if healthy:
+                    self._close()
+                else:
+                    self._open()
+                return
+            self._outcomes.append(healthy)
+            failures = self._outcomes.count(False)
+            if (self.state == STATE_CLOSED and len(self._outcomes) >= MIN_CALLS
+                    and failures / len(self._outcomes) >= ERROR_RATE_THRESHOLD):
+                self._open()
+
+    def _open(self):
+        self.state = STATE_OPEN
+        self.opened_at = time.time()
+        self._trial_started = None
+
+    def _close(self):
+        self.state = STATE_CLOSED
+        self.opened_at = None
+        self._trial_started = None
+        self._outcomes.clear()
+
+    def remember(self, key, answer):
+        if not answer:
+            return
+        with self._lock:
+            self._answers[key] = (answer, datetime.now())
+            self._answers.move_to_end(key)
+            while len(self._answers) > MAX_STORED_ANSWERS:
+                self._answers.popitem(last=False)
+
+    def stored(self, key, inputs=None):
+        """
+        Last (answer, created) remembered for key, or None. With inputs, the result archived
+        for exactly those inputs is used when nothing is remembered, e.g. after a restart.
+        """
+        with self._lock:
+            stored = self._answers.get(key)
+        if stored is None and inputs is not None:
+            archived = latest_result(self.name, inputs)
+            if archived is not None:
+                stored = (archived["content"], datetime.fromtimestamp(archived["created"]))
+        return stored
+
+    def degraded(self, key, fallback=None, inputs=None):
+        """
+        Stale answer for key, else the local fallback, else raise CircuitOpenError.
+        """
+        stored = self.stored(key, inputs)
+        if stored is not None:
+            answer, created = stored
+            return STALE_NOTICE.format(timestamp=created.strftime("%Y-%m-%d %H:%M")) + answer
+        if fallback is not None:
+            return FALLBACK_NOTICE + fallback()
+        raise CircuitOpenError(f"{self.name.replace('_', ' ').title()} is temporarily unavailable. Please try again shortly.")
+
+    def call(self, fn, key, fallback=None, inputs=None, timed=True):
+        """
+        Run fn through the breaker. When open, or when fn fails, serve the degraded answer.
+        :param inputs: Archive inputs of the result, to serve an archived answer for them
+        :param timed: Whether fn is a single LLM call held to the slow-call threshold. Multi-call
+                      pipelines pass False so that only their errors count as failures
+        """
+        if not self.allow_request():
+            return self.degraded(key, fallback, inputs)
+
+        start = time.perf_counter()
+        try:
+            result = fn()
+        except Exception:
+            self.record(False, time.perf_counter() - start)
+            if fallback is not None or self.stored(key, inputs) is not None:
+                return self.degraded(key, fallback, inputs)
+            raise
+        self.record(True, time.perf_counter() - start if timed else 0.0)
+        self.remember(key, result)
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {
+                "name": self.name,
+                "state": self.state,
+                "error_rate": self._outcomes.count(False) / len(self._outcomes) if self._outcomes else 0.0,
+                "fast_failures": self.fast_failures,
+                "stored_answers": len(self._answers),
+            }
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def slow_call_threshold(name):
+    """
+    Seconds after which a call of the named agent counts as slow: never below the latency
+    budget the model router gives that agent per call.
+    """
+    return max(SLOW_CALL_SECONDS, AGENT_POLICY.get(name, DEFAULT_POLICY)["latency_budget"])
+
+
+def get_circuit_breaker(name):
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name, slow_call_seconds=slow_call_threshold(name))
+        return _breakers[name]
+
+
+def circuit_breaker_stats():
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return [breaker.stats() for breaker in breakers]
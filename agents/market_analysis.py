@@ -1,7 +1,14 @@
 import os
+import time
 from groq import Groq
 import streamlit as st
 from dotenv import load_dotenv
+from agents.circuit_breaker import get_circuit_breaker
+from agents.model_router import chat_completion, stream_chat_completion, last_completion
+from agents.prompts import render_prompt, max_tokens_for
+from agents.semantic_cache import get_semantic_cache
+from agents.structured_output import stream_structured
+from services.result_archive import archive_result
 
 # Load environment variables
 load_dotenv()
@@ -16,36 +23,120 @@ except Exception as e:
     st.error(f"Failed to initialize Groq client: {str(e)}")
     groq_client = None  # Prevent further errors if initialization fails
 
-def market_analysis_agent(query):
+# Fail fast and serve stale answers while the upstream service is unhealthy
+breaker = get_circuit_breaker("market_analysis")
+
+# Near-duplicate queries are answered from the semantic cache
+semantic_cache = get_semantic_cache("market_analysis")
+
+def build_messages(query, structured=False):
+    return render_prompt("market_analysis", query=query, structured=structured)
+
+def market_analysis_agent(query, raise_errors=False):
     try:
         if not query or len(query.strip()) < 10:
             raise ValueError("Query must be at least 10 characters long")
-            
-        prompt = f"""
-        You are a Market Analysis Agent specializing in financial trends and news analysis.
-        Analyze the following query and provide expert insights, relevant trends, and financial implications:
-        
-        QUERY: {query}
-        
-        Please include:
-        1. Key market insights related to the query
-        2. Potential impacts on investments
-        3. Related news/trends that might influence decisions
-        4. A balanced risk assessment
-        """
-        
-        response = groq_client.chat.completions.create(
-            model="llama3-70b-8192",
-            messages=[
-                {"role": "system", "content": "You are a financial market analysis expert providing insights on market trends and news."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.2,
-            max_tokens=1024
-        )
+
+        cached = semantic_cache.lookup(query)
+        if cached is not None:
+            return cached
+
+        inputs = {"query": query}
+
+        def generate():
+            result = chat_completion(
+                groq_client,
+                "market_analysis",
+                messages=build_messages(query),
+                query=query,
+                temperature=0.2,
+                max_tokens=max_tokens_for("market_analysis")
+            )
+            semantic_cache.store(query, result)
+            archive_result("market_analysis", inputs, result, f"Market analysis: {query}", last_completion())
+            return result
         
-        return response.choices[0].message.content
+        return breaker.call(generate, key=query, inputs=inputs)
     
     except Exception as e:
+        # Background jobs have no page to show st.error on; they store the error instead
+        if raise_errors:
+            raise
         st.error(f"Error in market analysis: {str(e)}")
         return None
+
+
+def stream_market_analysis(query, raise_errors=False):
+    """
+    Streaming variant of market_analysis_agent: yields the analysis as it is generated.
+    Identical in-flight queries share one upstream token stream.
+    :param raise_errors: Raise errors to the consumer instead of showing them with st.error
+    """
+    try:
+        if not query or len(query.strip()) < 10:
+            raise ValueError("Query must be at least 10 characters long")
+
+        cached = semantic_cache.lookup(query)
+        if cached is not None:
+            yield cached
+            return
+
+        inputs = {"query": query}
+        if not breaker.allow_request():
+            yield breaker.degraded(query, inputs=inputs)
+            return
+
+        chunks = []
+        start = time.perf_counter()
+        try:
+            for chunk in stream_chat_completion(
+                groq_client,
+                "market_analysis",
+                messages=build_messages(query),
+                query=query,
+                temperature=0.2,
+                max_tokens=max_tokens_for("market_analysis")
+            ):
+                chunks.append(chunk)
+                yield chunk
+        except Exception:
+            breaker.record(False, time.perf_counter() - start)
+            if chunks:
+                raise
+            yield breaker.degraded(query, inputs=inputs)
+            return
+        breaker.record(True, time.perf_counter() - start)
+
+        result = "".join(chunks)
+        breaker.remember(query, result)
+        semantic_cache.store(query, result)
+        archive_result("market_analysis", inputs, result, f"Market analysis: {query}", last_completion())
+
+    except Exception as e:
+        if raise_errors:
+            raise
+        st.error(f"Error in market analysis: {str(e)}")
+
+
+def stream_market_analysis_structured(query):
+    """
+    Structured-output variant of market_analysis_agent: yields (path, value) events as each
+    field of the market_analysis schema completes, then ((), result) with the validated object.
+    """
+    try:
+        if not query or len(query.strip()) < 10:
+            raise ValueError("Query must be at least 10 characters long")
+
+        yield from stream_structured(
+            groq_client,
+            "market_analysis",
+            build_messages(query, structured=True),
+            breaker,
+            key=("structured", query),
+            query=query,
+            inputs={"query": query},
+            title=f"Market analysis: {query}",
+        )
+
+    except Exception as e:
+        st.error(f"Error in market analysis: {str(e)}")
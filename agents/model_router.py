@@ -0,0 +1,273 @@
+import os
+import re
+import time
+import threading
+from collections import deque
+
+from agents.prompts import observe_completion, count_tokens, MAX_MAX_TOKENS
+from agents.singleflight import singleflight, request_key
+
+# Model catalogue: tier and price per million tokens (input, output) in USD
+MODELS = {
+    "llama3-8b-8192": {"tier": "small", "cost_in": 0.05, "cost_out": 0.08},
+    "llama3-70b-8192": {"tier": "large", "cost_in": 0.59, "cost_out": 0.79},
+}
+SMALL_MODEL = "llama3-8b-8192"
+LARGE_MODEL = "llama3-70b-8192"
+
+# Per-agent routing policy: model for simple and complex requests, and the latency budget
+AGENT_POLICY = {
+    "market_analysis": {"simple": SMALL_MODEL, "complex": LARGE_MODEL, "latency_budget": 8.0},
+    "risk_scoring": {"simple": SMALL_MODEL, "complex": LARGE_MODEL, "latency_budget": 8.0},
+    "project_status": {"simple": SMALL_MODEL, "complex": LARGE_MODEL, "latency_budget": 10.0},
+    "reporting": {"simple": LARGE_MODEL, "complex": LARGE_MODEL, "latency_budget": 20.0},
+    "report_summary": {"simple": SMALL_MODEL, "complex": SMALL_MODEL, "latency_budget": 10.0},
+}
+DEFAULT_POLICY = {"simple": LARGE_MODEL, "complex": LARGE_MODEL, "latency_budget": 10.0}
+
+ROUTING_ENABLED = os.getenv("MODEL_ROUTING", "on").lower() not in ("0", "off", "false")
+ERROR_COOLDOWN_SECONDS = 60.0
+LATENCY_WINDOW = 50
+# Latency samples older than this are ignored, so a model demoted for being slow gets traffic
+# again once its slow samples age out and is then judged on fresh calls
+LATENCY_MAX_AGE_SECONDS = float(os.getenv("LATENCY_MAX_AGE_SECONDS", "300"))
+SIMPLE_QUERY_MAX_WORDS = 25
+
+COMPLEX_TERMS = {
+    "compare", "comparison", "versus", "vs", "scenario", "scenarios", "stress", "portfolio",
+    "correlation", "hedge", "hedging", "strategy", "forecast", "long-term", "multi", "impact",
+    "implications", "optimize", "allocation", "regulatory", "comprehensive",
+}
+
+
+class ModelStats:
+    """
+    Rolling latency, error and token/cost accounting for one model.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.calls = 0
+        self.errors = 0
+        self.last_error = 0.0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def p50(self):
+        cutoff = time.time() - LATENCY_MAX_AGE_SECONDS
+        ordered = sorted(latency for recorded, latency in self.latencies if recorded >= cutoff)
+        if not ordered:
+            return None
+        return ordered[len(ordered) // 2]
+
+    def cost(self):
+        prices = MODELS.get(self.model, {"cost_in": 0.0, "cost_out": 0.0})
+        return (self.prompt_tokens * prices["cost_in"] + self.completion_tokens * prices["cost_out"]) / 1_000_000
+
+    def cooling_down(self):
+        return time.time() - self.last_error < ERROR_COOLDOWN_SECONDS
+
+
+_stats = {model: ModelStats(model) for model in MODELS}
+_stats_lock = threading.Lock()
+_local = threading.local()
+
+
+def query_complexity(query):
+    """
+    Cheap complexity score: long queries, several questions or analytical terms count as complex.
+    """
+    if not query:
+        return 0
+    words = re.findall(r"[\w-]+", query.lower())
+    score = 0
+    if len(words) > SIMPLE_QUERY_MAX_WORDS:
+        score += 1
+    if query.count("?") > 1 or len(re.findall(r"\band\b|;", query.lower())) > 2:
+        score += 1
+    score += sum(1 for word in words if word in COMPLEX_TERMS)
+    return score
+
+
+def route(agent, query=None):
+    """
+    Return the ordered list of models to try for a request.
+    :param agent: Agent name used to look up the routing policy
+    :param query: User query used to estimate complexity
+    """
+    policy = AGENT_POLICY.get(agent, DEFAULT_POLICY)
+    if not ROUTING_ENABLED:
+        return [LARGE_MODEL]
+
+    preferred = policy["simple"] if query_complexity(query) == 0 else policy["complex"]
+    alternate = LARGE_MODEL if preferred == SMALL_MODEL else SMALL_MODEL
+
+    with _stats_lock:
+        preferred_stats, alternate_stats = _stats[preferred], _stats[alternate]
+        preferred_p50 = preferred_stats.p50()
+        alternate_p50 = alternate_stats.p50()
+        demote = preferred_stats.cooling_down() and not alternate_stats.cooling_down()
+        # A model that is currently slower than the budget yields to a faster alternate
+        if preferred_p50 is not None and preferred_p50 > policy["latency_budget"]:
+            if alternate_p50 is None or alternate_p50 < preferred_p50:
+                demote = True
+
+    return [alternate, preferred] if demote else [preferred, alternate]
+
+
+def record(model, latency, usage=None, error=False):
+    with _stats_lock:
+        stats = _stats.setdefault(model, ModelStats(model))
+        stats.calls += 1
+        if error:
+            stats.errors += 1
+            stats.last_error = time.time()
+            return
+        stats.latencies.append((time.time(), latency))
+        if usage is not None:
+            stats.prompt_tokens += getattr(usage, "prompt_tokens", 0) or 0
+            stats.completion_tokens += getattr(usage, "completion_tokens", 0) or 0
+
+
+def chat_completion(client, agent, messages, query=None, temperature=0.2, max_tokens=1024):
+    """
+    Run a chat completion on the routed model, falling back to the next model when a call
+    errors or exceeds the agent's latency budget. A completion cut off at max_tokens is
+    retried once with twice the cap (up to MAX_MAX_TOKENS).
+    :return: Completion text
+    """
+    policy = AGENT_POLICY.get(agent, DEFAULT_POLICY)
+    last_error = None
+    for model in route(agent, query):
+        def complete():
+            for cap in (max_tokens, min(max_tokens * 2, MAX_MAX_TOKENS)):
+                start = time.perf_counter()
+                try:
+                    response = client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        temperature=temperature,
+                        max_tokens=cap,
+                        timeout=policy["latency_budget"] * 2
+                    )
+                except Exception:
+                    record(model, time.perf_counter() - start, error=True)
+                    raise
+                latency = time.perf_counter() - start
+                usage = getattr(response, "usage", None)
+                record(model, latency, usage)
+                choice = response.choices[0]
+                observe_completion(messages, choice.message.content, latency, usage, choice.finish_reason)
+                if choice.finish_reason != "length" or cap >= MAX_MAX_TOKENS:
+                    break
+            return (choice.message.content, getattr(usage, "prompt_tokens", None),
+                    getattr(usage, "completion_tokens", None), choice.finish_reason)
+
+        # Identical concurrent requests share a single upstream completion
+        key = request_key(model, messages, temperature=temperature, max_tokens=max_tokens)
+        try:
+            content, prompt_tokens, completion_tokens, finish_reason = singleflight.do(key, complete)
+        except Exception as e:
+            last_error = e
+            continue
+        _local.completion = {
+            "model": model,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "finish_reason": finish_reason,
+        }
+        return content
+    raise last_error
+
+
+def stream_chat_completion(client, agent, messages, query=None, temperature=0.2, max_tokens=1024):
+    """
+    Stream a chat completion on the routed model as text chunks. Concurrent identical
+    requests subscribe to the same upstream token stream. Falls back to the next model
+    only when a model fails before producing any output. A stream cut off at max_tokens
+    cannot be retried once shown; its finish_reason is reported by last_completion and the
+    next cap for the prompt is raised.
+    """
+    policy = AGENT_POLICY.get(agent, DEFAULT_POLICY)
+    last_error = None
+    for model in route(agent, query):
+        # Usage and finish reason of the upstream stream, when this request started it
+        outcome = {}
+
+        def upstream(model=model, outcome=outcome):
+            start = time.perf_counter()
+            chunks = []
+            try:
+                response = client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    timeout=policy["latency_budget"] * 2,
+                    stream=True
+                )
+                for chunk in response:
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        chunks.append(delta)
+                        yield delta
+                    if chunk.choices and chunk.choices[0].finish_reason:
+                        outcome["finish_reason"] = chunk.choices[0].finish_reason
+                    # Groq reports usage on the last chunk under x_groq
+                    usage = getattr(chunk, "usage", None) or getattr(getattr(chunk, "x_groq", None), "usage", None)
+                    if usage is not None:
+                        outcome["usage"] = usage
+            except Exception:
+                record(model, time.perf_counter() - start, error=True)
+                raise
+            latency = time.perf_counter() - start
+            record(model, latency, outcome.get("usage"))
+            observe_completion(messages, "".join(chunks), latency, outcome.get("usage"), outcome.get("finish_reason"))
+
+        key = request_key(model, messages, temperature=temperature, max_tokens=max_tokens, stream=True)
+        produced = []
+        try:
+            for chunk in singleflight.stream(key, upstream):
+                produced.append(chunk)
+                yield chunk
+            # Subscribers to another request's stream get no usage, so their token counts are estimated
+            usage = outcome.get("usage")
+            _local.completion = {
+                "model": model,
+                "prompt_tokens": getattr(usage, "prompt_tokens", None) or sum(count_tokens(message["content"]) for message in messages),
+                "completion_tokens": getattr(usage, "completion_tokens", None) or count_tokens("".join(produced)),
+                "finish_reason": outcome.get("finish_reason"),
+            }
+            return
+        except Exception as e:
+            if produced:
+                raise
+            last_error = e
+    raise last_error
+
+
+def last_completion():
+    """
+    Model and token usage of the last completion returned to the calling thread.
+    """
+    return getattr(_local, "completion", None)
+
+
+def model_stats():
+    """
+    Per-model latency/cost accounting, for comparing routed and unrouted runs.
+    """
+    with _stats_lock:
+        return [
+            {
+                "model": stats.model,
+                "calls": stats.calls,
+                "errors": stats.errors,
+                "p50_s": stats.p50(),
+                "prompt_tokens": stats.prompt_tokens,
+                "completion_tokens": stats.completion_tokens,
+                "cost_usd": stats.cost(),
+            }
+            for stats in _stats.values()
+        ]
@@ -0,0 +1,160 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Node:
+    """
+    One step of an agent workflow.
+    :param name: Unique node name; downstream nodes receive this node's output under it
+    :param fn: Callable taking a dict of upstream outputs. Streaming nodes return an
+               iterator of text chunks instead of a finished value
+    :param deps: Names of nodes whose full output is required before this node starts
+    :param partial_deps: Dict of streaming node name -> characters of partial output
+                         after which this node may start
+    :param stream: Whether fn returns an iterator of text chunks
+    """
+
+    def __init__(self, name, fn, deps=(), partial_deps=None, stream=False):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.partial_deps = dict(partial_deps or {})
+        self.stream = stream
+
+
+class PipelineResult:
+    def __init__(self, outputs, timings, errors):
+        self.outputs = outputs
+        self.timings = timings
+        self.errors = errors
+
+    def critical_path(self):
+        """
+        Chain of nodes that determined the total runtime: walk back from the node that
+        finished last through whichever dependency released it.
+        """
+        if not self.timings:
+            return []
+        current = max(self.timings, key=lambda name: self.timings[name]["end"])
+        path = [current]
+        while self.timings[current]["released_by"]:
+            current = self.timings[current]["released_by"]
+            path.append(current)
+        return list(reversed(path))
+
+    def timing_rows(self):
+        critical = set(self.critical_path())
+        return [
+            {
+                "Agent": name,
+                "Start (s)": round(t["start"], 3),
+                "End (s)": round(t["end"], 3),
+                "Duration (s)": round(t["end"] - t["start"], 3),
+                "Waited On": t["released_by"] or "",
+                "Critical Path": name in critical,
+            }
+            for name, t in sorted(self.timings.items(), key=lambda item: item[1]["start"])
+        ]
+
+
+class Pipeline:
+    """
+    Runs a dependency graph of agent calls: independent branches run concurrently and
+    downstream nodes receive upstream outputs (or a streamed partial output).
+    """
+
+    def __init__(self, nodes, max_workers=4):
+        self.nodes = {node.name: node for node in nodes}
+        self.max_workers = max_workers
+        self._validate()
+
+    def _validate(self):
+        for node in self.nodes.values():
+            for dep in list(node.deps) + list(node.partial_deps):
+                if dep not in self.nodes:
+                    raise ValueError(f"Node '{node.name}' depends on unknown node '{dep}'")
+            for dep in node.partial_deps:
+                if not self.nodes[dep].stream:
+                    raise ValueError(f"Node '{node.name}' needs partial output of non-streaming node '{dep}'")
+
+        visiting, done = set(), set()
+
+        def visit(name):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Dependency cycle through '{name}'")
+            visiting.add(name)
+            node = self.nodes[name]
+            for dep in list(node.deps) + list(node.partial_deps):
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.nodes:
+            visit(name)
+
+    def run(self):
+        outputs, partial, errors, timings = {}, {}, {}, {}
+        finished, started = set(), set()
+        released_by = {}
+        condition = threading.Condition()
+        origin = time.perf_counter()
+
+        def ready(node):
+            for dep in node.deps:
+                if dep not in finished:
+                    return False
+            for dep, chars in node.partial_deps.items():
+                if dep not in finished and len(partial.get(dep, "")) < chars:
+                    return False
+            return True
+
+        def execute(node, inputs):
+            start = time.perf_counter() - origin
+            try:
+                if node.stream:
+                    chunks = []
+                    for chunk in node.fn(inputs):
+                        chunks.append(chunk)
+                        with condition:
+                            partial[node.name] = "".join(chunks)
+                            condition.notify_all()
+                    result = "".join(chunks)
+                else:
+                    result = node.fn(inputs)
+            except Exception as e:
+                result = None
+                with condition:
+                    errors[node.name] = e
+            with condition:
+                outputs[node.name] = result
+                timings[node.name] = {
+                    "start": start,
+                    "end": time.perf_counter() - origin,
+                    "released_by": released_by.get(node.name),
+                }
+                finished.add(node.name)
+                condition.notify_all()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            with condition:
+                while len(finished) < len(self.nodes):
+                    for node in self.nodes.values():
+                        if node.name in started or not ready(node):
+                            continue
+                        started.add(node.name)
+                        inputs = {dep: outputs.get(dep) for dep in node.deps}
+                        inputs.update({dep: outputs.get(dep, partial.get(dep, "")) for dep in node.partial_deps})
+                        # Remember the dependency that was satisfied last, for critical path analysis
+                        upstream = [dep for dep in list(node.deps) + list(node.partial_deps) if dep in timings or dep in partial]
+                        if upstream:
+                            released_by[node.name] = max(
+                                upstream,
+                                key=lambda dep: timings[dep]["end"] if dep in timings else time.perf_counter() - origin,
+                            )
+                        executor.submit(execute, node, inputs)
+                    condition.wait()
+
+        return PipelineResult(outputs, timings, errors)
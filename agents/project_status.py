@@ -2,6 +2,11 @@ import os
 from groq import Groq
 import streamlit as st
 from dotenv import load_dotenv
+from agents.circuit_breaker import get_circuit_breaker
+from agents.model_router import chat_completion, last_completion
+from agents.prompts import render_prompt, max_tokens_for
+from agents.structured_output import stream_structured
+from services.result_archive import archive_result
 
 # Load environment variables
 load_dotenv()
@@ -16,36 +21,53 @@ except Exception as e:
     st.error(f"Failed to initialize Groq client: {str(e)}")
     groq_client = None  # Prevent further errors if initialization fails
 
-def project_status_agent(project_name, context):
+# Fail fast and serve stale answers while the upstream service is unhealthy
+breaker = get_circuit_breaker("project_status")
+
+def build_messages(project_name, context, structured=False):
+    return render_prompt("project_status", project_name=project_name, context=context, structured=structured)
+
+def project_status_agent(project_name, context, raise_errors=False):
     try:
-        prompt = f"""
-        You are a Project Status Tracking Agent specialized in monitoring project progress and internal risks.
-        Analyze the following project and context to provide a status assessment:
-        
-        PROJECT NAME: {project_name}
-        CONTEXT: {context}
-        
-        Please include:
-        1. Current project health assessment
-        2. Identified internal risks (resource constraints, schedule delays, etc.)
-        3. Risk mitigation strategies
-        4. Progress evaluation
-        5. Recommendations for keeping the project on track
-        """
-        
-        response = groq_client.chat.completions.create(
-            model="llama3-70b-8192",
-            messages=[
-                {"role": "system", "content": "You are a project management expert providing detailed project status assessment."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.2,
-            max_tokens=1024
-        )
+        inputs = {"project_name": project_name, "context": context}
+
+        def generate():
+            result = chat_completion(
+                groq_client,
+                "project_status",
+                messages=build_messages(project_name, context),
+                query=context,
+                temperature=0.2,
+                max_tokens=max_tokens_for("project_status")
+            )
+            archive_result("project_status", inputs, result, f"{project_name} status: {context}", last_completion())
+            return result
         
-        return response.choices[0].message.content
+        return breaker.call(generate, key=(project_name, context), inputs=inputs)
     
     except Exception as e:
+        # Pipeline worker threads have no page to show st.error on; they report the error instead
+        if raise_errors:
+            raise
         st.error(f"Error in project status assessment: {str(e)}")
         return None
 
+def stream_project_status_structured(project_name, context):
+    """
+    Structured-output variant of project_status_agent: yields (path, value) events as each
+    field of the project_status schema completes, then ((), result) with the validated object.
+    """
+    try:
+        yield from stream_structured(
+            groq_client,
+            "project_status",
+            build_messages(project_name, context, structured=True),
+            breaker,
+            key=("structured", project_name, context),
+            query=context,
+            inputs={"project_name": project_name, "context": context},
+            title=f"{project_name} status: {context}",
+        )
+    
+    except Exception as e:
+        st.error(f"Error in project status assessment: {str(e)}")
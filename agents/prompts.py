@@ -0,0 +1,375 @@
+import os
+import re
+import copy
+import itertools
+import threading
+from collections import deque
+
+# Active template version per request: a version name, or "compare" to alternate between
+# all registered versions so their token counts and latency can be compared side by side
+PROMPT_VERSION = os.getenv("PROMPT_VERSION", "v2")
+
+# Output token caps: per agent, per report type for the reporting agent. Once enough
+# completions have been observed the cap follows their p95 length instead, learned separately
+# for Markdown and structured (JSON) answers
+DEFAULT_MAX_TOKENS = {
+    "market_analysis": 768,
+    "risk_scoring": 640,
+    "project_status": 640,
+    "reporting": 896,
+}
+REPORT_MAX_TOKENS = {
+    "Comprehensive Risk Report": 1280,
+    "Market Risk Analysis": 896,
+    "Portfolio Risk Assessment": 896,
+    "Project Risk Report": 768,
+    "Regulatory Compliance Report": 896,
+    "Custom Report": 1024,
+}
+MIN_MAX_TOKENS = 256
+MAX_MAX_TOKENS = 2048
+ADAPTIVE_MIN_SAMPLES = 5
+ADAPTIVE_HEADROOM = 1.25
+STATS_WINDOW = 200
+# A completion cut off at its cap (finish_reason "length") is recorded as needing this many
+# times the tokens it got
+TRUNCATED_GROWTH = 2
+
+# Approximates the Llama 3 pre-tokenizer: words with their leading space, 1-3 digit groups,
+# punctuation runs and whitespace runs (indentation costs tokens). Long words split further.
+_TOKEN_PATTERN = re.compile(r"'(?:s|t|re|ve|m|ll|d)| ?[A-Za-z]+| ?\d{1,3}| ?[^\sA-Za-z\d]+[\r\n]*|\s*[\r\n]+|\s+(?!\S)|\s+")
+_CHARS_PER_WORD_TOKEN = 6
+
+# Identical leading system text for every agent, so provider-side prefix caching can reuse it
+SHARED_SYSTEM_PREFIX = (
+    "You are an AI agent on a financial risk management platform. "
+    "Be specific and quantitative and avoid filler."
+)
+# Formatting instruction for Markdown answers; structured answers get the JSON schema instead
+MARKDOWN_FORMAT = "Use Markdown headings and bullet lists."
+
+
+def count_tokens(text):
+    """
+    Estimated token count of text.
+    """
+    return sum(1 + len(piece.strip()) // (_CHARS_PER_WORD_TOKEN + 1) for piece in _TOKEN_PATTERN.findall(text))
+
+
+class RenderedPrompt(list):
+    """
+    Chat messages rendered from a template; remembers which template and variant produced them
+    so completions can be accounted per template version.
+    """
+
+    def __init__(self, messages, agent, version, variant=None, structured=False):
+        super().__init__(messages)
+        self.agent = agent
+        self.version = version
+        self.variant = variant
+        self.structured = structured
+
+
+class PromptTemplate:
+    """
+    Versioned prompt template for one agent.
+    :param system: System message
+    :param user: User message with str.format placeholders
+    :param compact: Drop blank lines left by empty optional fields
+    :param formatting: Formatting instruction appended to the system message unless the
+                       answer is rendered for structured (JSON) output
+    """
+
+    def __init__(self, agent, version, system, user, compact=True, formatting=None):
+        self.agent = agent
+        self.version = version
+        self.system = system
+        self.user = user
+        self.compact = compact
+        self.formatting = formatting
+
+    def render(self, variant=None, structured=False, **fields):
+        user = self.user.format(**fields)
+        if self.compact:
+            user = "\n".join(line for line in user.splitlines() if line.strip())
+        system = self.system if structured or not self.formatting else f"{self.system} {self.formatting}"
+        return RenderedPrompt(
+            [{"role": "system", "content": system}, {"role": "user", "content": user}],
+            self.agent, self.version, variant, structured,
+        )
+
+
+PROMPTS = {}
+
+
+def register(template):
+    PROMPTS.setdefault(template.agent, {})[template.version] = template
+    return template
+
+
+# v1: the original indented prompts, kept for comparison
+register(PromptTemplate("market_analysis", "v1",
+    "You are a financial market analysis expert providing insights on market trends and news.",
+    """
+    You are a Market Analysis Agent specializing in financial trends and news analysis.
+    Analyze the following query and provide expert insights, relevant trends, and financial implications:
+
+    QUERY: {query}
+
+    Please include:
+    1. Key market insights related to the query
+    2. Potential impacts on investments
+    3. Related news/trends that might influence decisions
+    4. A balanced risk assessment
+    """, compact=False))
+
+register(PromptTemplate("risk_scoring", "v1",
+    "You are a financial risk assessment expert providing detailed risk analysis.",
+    """
+    You are a Risk Scoring Agent specializing in transaction and investment risk assessment.
+    Analyze the following asset type and query to provide a detailed risk assessment:
+
+    ASSET TYPE: {asset_type}
+    QUERY: {query}
+    {score_block}
+    {context_block}
+
+    Please include:
+    {score_instruction}
+    2. Primary risk factors
+    3. Risk mitigation recommendations
+    4. Market conditions affecting risk
+    5. Short-term and long-term risk outlook
+    """, compact=False))
+
+register(PromptTemplate("project_status", "v1",
+    "You are a project management expert providing detailed project status assessment.",
+    """
+    You are a Project Status Tracking Agent specialized in monitoring project progress and internal risks.
+    Analyze the following project and context to provide a status assessment:
+
+    PROJECT NAME: {project_name}
+    CONTEXT: {context}
+
+    Please include:
+    1. Current project health assessment
+    2. Identified internal risks (resource constraints, schedule delays, etc.)
+    3. Risk mitigation strategies
+    4. Progress evaluation
+    5. Recommendations for keeping the project on track
+    """, compact=False))
+
+register(PromptTemplate("reporting", "v1",
+    "You are a financial reporting expert providing detailed risk analytics.",
+    """
+    You are a Reporting Agent specialized in providing detailed risk analytics and alerts.
+    Generate a {report_type} report based on the following parameters:
+
+    TIMEFRAME: {timeframe}
+    DETAILS: {details}
+
+    Please include:
+    1. Executive summary
+    2. Key risk metrics
+    3. Notable trends or patterns
+    4. Alert thresholds and triggers
+    5. Recommended actions
+    """, compact=False))
+
+# v2: dedented and compacted, role moved behind the shared system prefix
+register(PromptTemplate("market_analysis", "v2",
+    SHARED_SYSTEM_PREFIX + " Role: market analysis of financial trends and news.",
+    "QUERY: {query}\n"
+    "Cover: 1) key market insights 2) investment impacts 3) related news/trends 4) balanced risk assessment",
+    formatting=MARKDOWN_FORMAT))
+
+register(PromptTemplate("risk_scoring", "v2",
+    SHARED_SYSTEM_PREFIX + " Role: transaction and investment risk scoring.",
+    "ASSET TYPE: {asset_type}\n"
+    "QUERY: {query}\n"
+    "{score_block}\n"
+    "{context_block}\n"
+    "Cover:\n"
+    "{score_instruction}\n"
+    "2. Primary risk factors\n"
+    "3. Mitigation recommendations\n"
+    "4. Market conditions affecting risk\n"
+    "5. Short- and long-term outlook",
+    formatting=MARKDOWN_FORMAT))
+
+register(PromptTemplate("project_status", "v2",
+    SHARED_SYSTEM_PREFIX + " Role: project status and internal risk tracking.",
+    "PROJECT: {project_name}\n"
+    "CONTEXT: {context}\n"
+    "Cover: 1) project health 2) internal risks (resources, schedule, etc.) 3) mitigations "
+    "4) progress evaluation 5) recommendations to stay on track",
+    formatting=MARKDOWN_FORMAT))
+
+register(PromptTemplate("reporting", "v2",
+    SHARED_SYSTEM_PREFIX + " Role: risk analytics and alert reporting.",
+    "REPORT: {report_type}\n"
+    "TIMEFRAME: {timeframe}\n"
+    "DETAILS: {details}\n"
+    "Cover: 1) executive summary 2) key risk metrics 3) notable trends 4) alert thresholds and triggers "
+    "5) recommended actions",
+    formatting=MARKDOWN_FORMAT))
+
+_rotation = {agent: itertools.cycle(sorted(versions)) for agent, versions in PROMPTS.items()}
+_rotation_lock = threading.Lock()
+
+
+def get_template(agent, version=None):
+    version = version or PROMPT_VERSION
+    versions = PROMPTS[agent]
+    if version == "compare":
+        with _rotation_lock:
+            version = next(_rotation[agent])
+    return versions.get(version) or versions[max(versions)]
+
+
+def render_prompt(agent, variant=None, version=None, structured=False, **fields):
+    """
+    Render the active template version of an agent's prompt.
+    :param variant: Optional sub-type (e.g. report type) used for output token caps
+    :param structured: Render for a JSON answer (see structured_output), without Markdown formatting
+    """
+    return get_template(agent, version).render(variant=variant, structured=structured, **fields)
+
+
+class _TemplateStats:
+    def __init__(self):
+        self.calls = 0
+        self.truncated = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self.latencies = deque(maxlen=STATS_WINDOW)
+
+
+_template_stats = {}
+_output_lengths = {}
+_stats_lock = threading.Lock()
+
+
+def observe_completion(messages, output, latency, usage=None, finish_reason=None):
+    """
+    Account a finished completion to the template version that rendered its prompt and
+    learn the output length for adaptive token caps. Plain message lists are ignored.
+    :param usage: Provider token usage; token counts are estimated when it is missing
+    :param finish_reason: "length" when the completion was cut off at its token cap
+    """
+    if not isinstance(messages, RenderedPrompt):
+        return
+    prompt_tokens = getattr(usage, "prompt_tokens", None) or sum(count_tokens(message["content"]) for message in messages)
+    output_tokens = getattr(usage, "completion_tokens", None) or count_tokens(output or "")
+    truncated = finish_reason == "length"
+    with _stats_lock:
+        stats = _template_stats.setdefault((messages.agent, messages.version, messages.structured), _TemplateStats())
+        stats.calls += 1
+        stats.truncated += truncated
+        stats.prompt_tokens += prompt_tokens
+        stats.output_tokens += output_tokens
+        stats.latencies.append(latency)
+        _output_lengths.setdefault(
+            (messages.agent, messages.variant, messages.structured), deque(maxlen=STATS_WINDOW)
+        ).append(output_tokens * TRUNCATED_GROWTH if truncated else output_tokens)
+
+
+def max_tokens_for(agent, variant=None, structured=False):
+    """
+    Output token cap for an agent (and report type): p95 of observed output lengths plus
+    headroom once enough completions were seen, else the configured default, raised while
+    fewer samples are known if one of them needed more.
+    :param structured: Cap for structured (JSON) answers, learned apart from Markdown answers
+    """
+    if agent == "reporting" and variant in REPORT_MAX_TOKENS:
+        default = REPORT_MAX_TOKENS[variant]
+    else:
+        default = DEFAULT_MAX_TOKENS.get(agent, 1024)
+    with _stats_lock:
+        lengths = sorted(_output_lengths.get((agent, variant, structured), ()))
+    if len(lengths) < ADAPTIVE_MIN_SAMPLES:
+        return min(MAX_MAX_TOKENS, max([default] + lengths))
+    p95 = lengths[min(len(lengths) - 1, int(len(lengths) * 0.95))]
+    cap = int(p95 * ADAPTIVE_HEADROOM + 63) // 64 * 64
+    return max(MIN_MAX_TOKENS, min(MAX_MAX_TOKENS, cap))
+
+
+# Representative inputs for the static template comparison
+SAMPLE_FIELDS = {
+    "market_analysis": {"query": "How will rising interest rates affect tech sector equities over the next quarter?"},
+    "risk_scoring": {
+        "asset_type": "Equities",
+        "query": "Evaluate the risk profile of investing in tech sector equities given current market conditions",
+        "score_block": "",
+        "context_block": "",
+        "score_instruction": "1. Overall risk score (1-100)",
+    },
+    "project_status": {"project_name": "Risk System Upgrade", "context": "Vendor delivery slipped two weeks; budget is on plan."},
+    "reporting": {"report_type": "Market Risk Analysis", "timeframe": "Monthly", "details": "Focus on equity and FX exposure"},
+}
+
+
+def template_report():
+    """
+    Estimated prompt tokens of every template version on sample inputs, and the tokens of the
+    system prefix it shares with the other agents of the same version.
+    """
+    rows = []
+    for version in sorted({v for versions in PROMPTS.values() for v in versions}):
+        systems = [versions[version].system for versions in PROMPTS.values() if version in versions]
+        shared = count_tokens(os.path.commonprefix(systems)) if len(systems) > 1 else 0
+        for agent, versions in PROMPTS.items():
+            if version not in versions:
+                continue
+            messages = versions[version].render(**SAMPLE_FIELDS[agent])
+            rows.append({
+                "Agent": agent,
+                "Version": version,
+                "Prompt Tokens": sum(count_tokens(message["content"]) for message in messages),
+                "Shared Prefix Tokens": shared,
+            })
+    return rows
+
+
+def prompt_report():
+    """
+    Observed calls, average prompt/output tokens and median latency per template version
+    and output mode.
+    """
+    with _stats_lock:
+        items = sorted(_template_stats.items())
+        rows = []
+        for (agent, version, structured), stats in items:
+            latencies = sorted(stats.latencies)
+            rows.append({
+                "Agent": agent,
+                "Version": version,
+                "Output": "JSON" if structured else "Markdown",
+                "Calls": stats.calls,
+                "Truncated": stats.truncated,
+                "Avg Prompt Tokens": round(stats.prompt_tokens / stats.calls, 1),
+                "Avg Output Tokens": round(stats.output_tokens / stats.calls, 1),
+                "p50 Latency (s)": round(latencies[len(latencies) // 2], 2) if latencies else None,
+            })
+    return rows
+
+
+def copy_messages(messages):
+    """
+    Copy of (rendered) messages whose dicts can be modified without touching the original.
+    """
+    copied = copy.copy(messages)
+    copied[:] = [dict(message) for message in messages]
+    return copied
+
+
+if __name__ == "__main__":
+    # python -m agents.prompts: compare template versions on sample inputs
+    rows = template_report()
+    print(f"{'Agent':<16}{'Version':<9}{'Prompt Tokens':>15}{'Shared Prefix':>15}")
+    for row in rows:
+        print(f"{row['Agent']:<16}{row['Version']:<9}{row['Prompt Tokens']:>15}{row['Shared Prefix Tokens']:>15}")
+    for agent in PROMPTS:
+        counts = {row["Version"]: row["Prompt Tokens"] for row in rows if row["Agent"] == agent}
+        if "v1" in counts and "v2" in counts:
+            print(f"{agent}: {counts['v1'] - counts['v2']} fewer prompt tokens in v2 ({1 - counts['v2'] / counts['v1']:.0%})")
@@ -0,0 +1,283 @@
+import os
+import re
+import hashlib
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from agents.model_router import chat_completion, route, last_completion
+from agents.prompts import max_tokens_for
+
+# Report pipeline configuration
+CHARS_PER_TOKEN = 4
+CHUNK_TOKEN_BUDGET = 2500   # Data tokens per map prompt, leaving room for instructions and output
+REDUCE_TOKEN_BUDGET = 3000  # Summary tokens per reduce prompt
+SUMMARY_MAX_TOKENS = 400
+MAX_WORKERS = int(os.getenv("REPORT_MAX_WORKERS", "4"))
+CACHE_PATH = os.getenv("REPORT_CACHE_PATH", os.path.join(".cache", "report_summaries.sqlite"))
+PIPELINE_VERSION = "2"
+
+TIMEFRAME_DAYS = {"Daily": 1, "Weekly": 7, "Monthly": 30, "Quarterly": 90, "Annual": 365}
+
+
+class SummaryCache:
+    """
+    On-disk cache of intermediate summaries keyed by a hash of the prompt that produced them.
+    """
+
+    def __init__(self, path=CACHE_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS summaries (key TEXT PRIMARY KEY, summary TEXT, created REAL)"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT summary FROM summaries WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def put(self, key, summary):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summaries (key, summary, created) VALUES (?, ?, ?)",
+                (key, summary, datetime.now().timestamp()),
+            )
+            self._conn.commit()
+
+
+_summary_cache = None
+_summary_cache_lock = threading.Lock()
+
+
+def get_summary_cache():
+    global _summary_cache
+    with _summary_cache_lock:
+        if _summary_cache is None:
+            _summary_cache = SummaryCache()
+        return _summary_cache
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def timeframe_window(timeframe, now=None):
+    """
+    Resolve a reporting timeframe label into a (start, end) timestamp pair. Windows run
+    from midnight to the end of today, so the rows they select only change once a day.
+    :param timeframe: "Daily", "Weekly", ... or "Custom (YYYY-MM-DD to YYYY-MM-DD)"
+    """
+    now = pd.Timestamp(now or datetime.now()).normalize() + timedelta(days=1)
+    match = re.match(r"Custom \((\d{4}-\d{2}-\d{2}) to (\d{4}-\d{2}-\d{2})\)", timeframe or "")
+    if match:
+        start = pd.Timestamp(match.group(1))
+        end = pd.Timestamp(match.group(2)) + timedelta(days=1)
+        return start, end
+    days = TIMEFRAME_DAYS.get(timeframe, 30)
+    return now - timedelta(days=days), now
+
+
+def _date_column(df):
+    if isinstance(df.index, pd.DatetimeIndex):
+        return df.index
+    if "Date" in df.columns:
+        return pd.to_datetime(df["Date"])
+    return None
+
+
+def filter_to_window(name, df, start, end):
+    """
+    Keep rows inside the report window. Projects are kept when they overlap it;
+    undated datasets (e.g. current exposures) are kept whole.
+    """
+    if df is None or df.empty:
+        return df
+    if {"Start_Date", "Due_Date"}.issubset(df.columns):
+        return df[(df["Start_Date"] <= end) & (df["Due_Date"] >= start)]
+    dates = _date_column(df)
+    if dates is None:
+        return df
+    mask = (dates >= start) & (dates <= end)
+    return df[mask]
+
+
+def _period_groups(df):
+    """
+    Split a dataset into calendar-month groups so chunk boundaries do not move
+    when the window slides; only the newest month changes as data arrives.
+    """
+    dates = _date_column(df)
+    if dates is None:
+        return [("all", df)]
+    periods = pd.Series(pd.DatetimeIndex(dates).to_period("M").astype(str), index=df.index)
+    return [(period, df[periods == period]) for period in sorted(periods.unique())]
+
+
+def chunk_dataset(name, df, token_budget=CHUNK_TOKEN_BUDGET):
+    """
+    Serialize a dataset into CSV chunks that each fit the map prompt budget. Dates are
+    written at day precision so reloading the same records yields the same text.
+    :return: List of dicts with dataset name, period label, CSV text and a digest of the text
+    """
+    chunks = []
+    if df is None or df.empty:
+        return chunks
+    for period, group in _period_groups(df):
+        frame = group.reset_index() if isinstance(group.index, pd.DatetimeIndex) else group
+        lines = frame.to_csv(index=False, float_format="%.2f", date_format="%Y-%m-%d").strip().splitlines()
+        header, rows = lines[0], lines[1:]
+        current, current_tokens = [], estimate_tokens(header)
+        for row in rows:
+            row_tokens = estimate_tokens(row)
+            if current and current_tokens + row_tokens > token_budget:
+                chunks.append(_chunk(name, period, [header] + current))
+                current, current_tokens = [], estimate_tokens(header)
+            current.append(row)
+            current_tokens += row_tokens
+        if current:
+            chunks.append(_chunk(name, period, [header] + current))
+    return chunks
+
+
+def _chunk(name, period, lines):
+    text = "\n".join(lines)
+    return {"dataset": name, "period": period, "text": text, "digest": hashlib.sha256(text.encode("utf-8")).hexdigest()}
+
+
+def _cache_key(*parts):
+    digest = hashlib.sha256()
+    for part in (PIPELINE_VERSION,) + parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+def _complete(client, agent, system, prompt, max_tokens):
+    return chat_completion(
+        client,
+        agent,
+        messages=[
+            {"role": "system", "content": system},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.2,
+        max_tokens=max_tokens
+    )
+
+
+def _cached_complete(client, system, prompt, max_tokens, cache, content=None):
+    """
+    Summarize through the cache. Summaries are keyed by the model that wrote them, so a
+    fallback model's summary is not served as the preferred model's.
+    :param content: Parts identifying the prompt's input; defaults to the prompt itself
+    """
+    # Intermediate summaries are routed to the fast summary model
+    parts = (system,) + (tuple(content) if content is not None else (prompt,)) + (max_tokens,)
+    summary = cache.get(_cache_key(route("report_summary")[0], *parts))
+    if summary is None:
+        summary = _complete(client, "report_summary", system, prompt, max_tokens)
+        cache.put(_cache_key(last_completion()["model"], *parts), summary)
+    return summary
+
+
+def summarize_chunk(client, report_type, chunk, cache):
+    # The prompt depends only on the chunk itself, so the chunk digest identifies it in the cache
+    prompt = (
+        f"Summarize the following {chunk['dataset']} records ({chunk['period']}) for a {report_type}.\n"
+        "Keep every number that matters for risk: extremes, changes, counts by severity/status, "
+        "exposures and scores. Be concise and factual.\n\n"
+        f"DATA (CSV):\n{chunk['text']}"
+    )
+    return _cached_complete(
+        client, "You are a financial data analyst condensing raw risk data.", prompt, SUMMARY_MAX_TOKENS, cache,
+        content=(report_type, chunk["dataset"], chunk["period"], chunk["digest"])
+    )
+
+
+def _batches(summaries, token_budget):
+    batch, batch_tokens = [], 0
+    for summary in summaries:
+        tokens = estimate_tokens(summary)
+        if batch and batch_tokens + tokens > token_budget:
+            yield batch
+            batch, batch_tokens = [], 0
+        batch.append(summary)
+        batch_tokens += tokens
+    if batch:
+        yield batch
+
+
+def reduce_summaries(client, report_type, summaries, cache, executor):
+    """
+    Merge summaries level by level until they fit into a single prompt.
+    """
+    level = list(summaries)
+    while sum(estimate_tokens(s) for s in level) > REDUCE_TOKEN_BUDGET and len(level) > 1:
+        batches = list(_batches(level, REDUCE_TOKEN_BUDGET))
+        if len(batches) == len(level):
+            # Each summary fills a prompt on its own; pair them so the tree still shrinks
+            batches = [level[i:i + 2] for i in range(0, len(level), 2)]
+
+        def merge(batch):
+            prompt = (
+                f"Merge these partial summaries for a {report_type} into one summary. "
+                "Preserve key figures, trends and open alerts; drop repetition.\n\n"
+                + "\n\n---\n\n".join(batch)
+            )
+            return _cached_complete(
+                client, "You are a financial data analyst consolidating risk summaries.", prompt,
+                SUMMARY_MAX_TOKENS, cache
+            )
+
+        level = list(executor.map(merge, batches))
+    return level
+
+
+def generate_report(client, report_type, timeframe, details, datasets):
+    """
+    Map-reduce report generation over the real datasets for the chosen timeframe.
+    :param client: Groq client
+    :param report_type: Type of report
+    :param timeframe: Timeframe label
+    :param details: Additional free-text focus areas
+    :param datasets: Dict of dataset name -> DataFrame (alerts, projects, risk, market)
+    :return: Final report markdown
+    """
+    cache = get_summary_cache()
+    start, end = timeframe_window(timeframe)
+
+    chunks = []
+    for name, df in datasets.items():
+        chunks.extend(chunk_dataset(name, filter_to_window(name, df, start, end)))
+    if not chunks:
+        raise ValueError("No data available for the selected timeframe")
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        summaries = list(executor.map(lambda chunk: summarize_chunk(client, report_type, chunk, cache), chunks))
+        summaries = reduce_summaries(client, report_type, summaries, cache, executor)
+
+    prompt = (
+        f"Generate a {report_type} report.\n"
+        f"TIMEFRAME: {timeframe} ({start:%Y-%m-%d} to {end - timedelta(days=1):%Y-%m-%d})\n"
+        f"DETAILS: {details}\n\n"
+        "DATA SUMMARIES:\n" + "\n\n---\n\n".join(summaries) + "\n\n"
+        "Please include:\n"
+        "1. Executive summary\n"
+        "2. Key risk metrics\n"
+        "3. Notable trends or patterns\n"
+        "4. Alert thresholds and triggers\n"
+        "5. Recommended actions"
+    )
+    return _complete(
+        client, "reporting", "You are a financial reporting expert providing detailed risk analytics.", prompt,
+        max_tokens_for("reporting", report_type)
+    )
+
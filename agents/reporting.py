@@ -2,6 +2,12 @@ import os
 from groq import Groq
 import streamlit as st
 from dotenv import load_dotenv
+from agents.circuit_breaker import get_circuit_breaker
+from agents.model_router import chat_completion, last_completion
+from agents.prompts import render_prompt, max_tokens_for
+from agents.report_pipeline import generate_report
+from agents.structured_output import stream_structured
+from services.result_archive import archive_result
 
 # Load environment variables
 load_dotenv()
@@ -16,36 +22,64 @@ except Exception as e:
     st.error(f"Failed to initialize Groq client: {str(e)}")
     groq_client = None  # Prevent further errors if initialization fails
 
+# Fail fast and serve stale answers while the upstream service is unhealthy
+breaker = get_circuit_breaker("reporting")
 
-def reporting_agent(report_type, timeframe, details):
+
+def build_messages(report_type, timeframe, details, structured=False):
+    return render_prompt("reporting", variant=report_type, report_type=report_type, timeframe=timeframe, details=details,
+                         structured=structured)
+
+
+def reporting_agent(report_type, timeframe, details, datasets=None, raise_errors=False):
     try:
-        prompt = f"""
-        You are a Reporting Agent specialized in providing detailed risk analytics and alerts.
-        Generate a {report_type} report based on the following parameters:
-        
-        TIMEFRAME: {timeframe}
-        DETAILS: {details}
-        
-        Please include:
-        1. Executive summary
-        2. Key risk metrics
-        3. Notable trends or patterns
-        4. Alert thresholds and triggers
-        5. Recommended actions
-        """
+        inputs = {"report_type": report_type, "timeframe": timeframe, "details": details, "datasets": sorted(datasets or ())}
+
+        def generate():
+            # With real data attached, summarize it chunk by chunk and reduce into the report
+            if datasets:
+                result = generate_report(groq_client, report_type, timeframe, details, datasets)
+            else:
+                result = chat_completion(
+                    groq_client,
+                    "reporting",
+                    messages=build_messages(report_type, timeframe, details),
+                    query=details,
+                    temperature=0.2,
+                    max_tokens=max_tokens_for("reporting", report_type)
+                )
+            archive_result("reporting", inputs, result, f"{report_type} ({timeframe})", last_completion())
+            return result
         
-        response = groq_client.chat.completions.create(
-            model="llama3-70b-8192",
-            messages=[
-                {"role": "system", "content": "You are a financial reporting expert providing detailed risk analytics."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.2,
-            max_tokens=1024
+        key = (report_type, timeframe, details, "datasets") if datasets else (report_type, timeframe, details)
+        # A map-reduce report is many LLM calls; the router times each one, the breaker counts its errors
+        return breaker.call(generate, key=key, inputs=inputs, timed=not datasets)
+    
+    except Exception as e:
+        # Background jobs have no page to show st.error on; they store the error instead
+        if raise_errors:
+            raise
+        st.error(f"Error in report generation: {str(e)}")
+        return None
+
+
+def stream_reporting_structured(report_type, timeframe, details):
+    """
+    Structured-output variant of reporting_agent (without attached datasets): yields
+    (path, value) events as each field of the reporting schema completes, then ((), result)
+    with the validated object.
+    """
+    try:
+        yield from stream_structured(
+            groq_client,
+            "reporting",
+            build_messages(report_type, timeframe, details, structured=True),
+            breaker,
+            key=("structured", report_type, timeframe, details),
+            query=details,
+            inputs={"report_type": report_type, "timeframe": timeframe, "details": details},
+            title=f"{report_type} ({timeframe})",
         )
-        
-        return response.choices[0].message.content
     
     except Exception as e:
         st.error(f"Error in report generation: {str(e)}")
-        return None
\ No newline at end of file
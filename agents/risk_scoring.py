@@ -2,6 +2,12 @@ import os
 from groq import Groq
 import streamlit as st
 from dotenv import load_dotenv
+from agents.circuit_breaker import get_circuit_breaker
+from agents.model_router import chat_completion, last_completion
+from agents.prompts import render_prompt, max_tokens_for
+from agents.semantic_cache import get_semantic_cache
+from agents.structured_output import stream_structured
+from services.result_archive import archive_result
 
 # Load environment variables
 load_dotenv()
@@ -16,38 +22,100 @@ except Exception as e:
     st.error(f"Failed to initialize Groq client: {str(e)}")
     groq_client = None  # Prevent further errors if initialization fails
 
-def risk_scoring_agent(asset_type, query):
+# Fail fast and serve stale answers while the upstream service is unhealthy
+breaker = get_circuit_breaker("risk_scoring")
+
+# Near-duplicate queries are answered from the semantic cache, per asset type
+semantic_cache = get_semantic_cache("risk_scoring")
+
+def build_messages(asset_type, query, market_context=None, risk_profile=None, structured=False):
+    context_block = f"MARKET ANALYSIS: {market_context}" if market_context else ""
+    if risk_profile:
+        score_block = f"FACTOR MODEL RESULT: {risk_profile}"
+        score_instruction = "1. Interpretation of the factor model risk score above (do not produce a different score)"
+    else:
+        score_block = ""
+        score_instruction = "1. Overall risk score (1-100)"
+    return render_prompt(
+        "risk_scoring",
+        asset_type=asset_type,
+        query=query,
+        score_block=score_block,
+        context_block=context_block,
+        score_instruction=score_instruction,
+        structured=structured,
+    )
+
+def risk_scoring_agent(asset_type, query, fallback=None, market_context=None, risk_profile=None, raise_errors=False):
+    """
+    Writes the risk assessment narrative of an asset type for the given query.
+    :param asset_type: Asset type being assessed
+    :param query: Risk assessment query
+    :param market_context: Optional (possibly partial) market analysis to ground the assessment
+    :param risk_profile: Optional summary of the baseline score and factor scores computed by the
+                         factor model; the narrative explains it instead of producing its own score
+    :param fallback: Optional callable returning a locally computed assessment, served while the AI service is degraded
+    :param raise_errors: Raise errors to the caller instead of showing them with st.error
+    :return: Risk assessment markdown
+    """
     try:
         if not query or len(query.strip()) < 10:
             raise ValueError("Query must be at least 10 characters long")
-            
-        prompt = f"""
-        You are a Risk Scoring Agent specializing in transaction and investment risk assessment.
-        Analyze the following asset type and query to provide a detailed risk assessment:
-        
-        ASSET TYPE: {asset_type}
-        QUERY: {query}
+
+        # Answers grounded in upstream market context are specific to it, so bypass the cache
+        use_cache = not market_context
+        namespace = f"{asset_type}|{risk_profile}" if risk_profile else asset_type
+        if use_cache:
+            cached = semantic_cache.lookup(query, namespace=namespace)
+            if cached is not None:
+                return cached
         
-        Please include:
-        1. Overall risk score (1-100)
-        2. Primary risk factors
-        3. Risk mitigation recommendations
-        4. Market conditions affecting risk
-        5. Short-term and long-term risk outlook
-        """
+        inputs = {"asset_type": asset_type, "query": query, "market_context": bool(market_context)}
+
+        def generate():
+            result = chat_completion(
+                groq_client,
+                "risk_scoring",
+                messages=build_messages(asset_type, query, market_context, risk_profile),
+                query=query,
+                temperature=0.2,
+                max_tokens=max_tokens_for("risk_scoring")
+            )
+            if use_cache:
+                semantic_cache.store(query, result, namespace=namespace)
+            archive_result("risk_scoring", inputs, result, f"{asset_type} risk: {query}", last_completion())
+            return result
         
-        response = groq_client.chat.completions.create(
-            model="llama3-70b-8192",
-            messages=[
-                {"role": "system", "content": "You are a financial risk assessment expert providing detailed risk analysis."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.2,
-            max_tokens=1024
+        return breaker.call(generate, key=(asset_type, query), fallback=fallback, inputs=inputs)
+    
+    except Exception as e:
+        # Pipeline worker threads have no page to show st.error on; they report the error instead
+        if raise_errors:
+            raise
+        st.error(f"Error in risk scoring: {str(e)}")
+        return None
+
+def stream_risk_scoring_structured(asset_type, query, fallback=None, risk_profile=None):
+    """
+    Structured-output variant of risk_scoring_agent: yields (path, value) events as each
+    field of the risk_scoring schema completes, then ((), result) with the validated object.
+    :param fallback: Optional callable returning a locally computed result matching the schema
+    """
+    try:
+        if not query or len(query.strip()) < 10:
+            raise ValueError("Query must be at least 10 characters long")
+
+        yield from stream_structured(
+            groq_client,
+            "risk_scoring",
+            build_messages(asset_type, query, risk_profile=risk_profile, structured=True),
+            breaker,
+            key=("structured", asset_type, query),
+            query=query,
+            fallback=fallback,
+            inputs={"asset_type": asset_type, "query": query},
+            title=f"{asset_type} risk: {query}",
         )
-        
-        return response.choices[0].message.content
     
     except Exception as e:
         st.error(f"Error in risk scoring: {str(e)}")
-        return None
\ No newline at end of file
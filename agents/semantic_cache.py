@@ -0,0 +1,267 @@
+import os
+import re
+import time
+import zlib
+import threading
+from collections import deque
+
+import numpy as np
+
+# Semantic cache configuration
+EMBEDDING_DIM = 256
+LSH_TABLES = 8
+LSH_BITS = 16
+BIGRAM_WEIGHT = 0.5
+DEFAULT_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.80"))
+DEFAULT_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "1000000"))
+DEFAULT_TTL_SECONDS = float(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", str(24 * 3600)))
+
+STOP_WORDS = {
+    "a", "an", "the", "of", "in", "on", "for", "to", "and", "or", "with", "given", "by", "at",
+    "is", "are", "be", "how", "what", "which", "this", "that", "these", "those", "from", "as",
+    "about", "into", "it", "its", "their", "our", "my", "me", "please", "analyze", "analyse",
+}
+
+# Finance phrasing that analysts use interchangeably
+SYNONYMS = {
+    "equities": "stock", "equity": "stock", "stocks": "stock", "shares": "stock",
+    "technology": "tech", "rates": "rate", "hikes": "rise", "hike": "rise", "rising": "rise",
+    "increase": "rise", "increasing": "rise", "higher": "rise", "bonds": "bond",
+    "crypto": "cryptocurrency", "fx": "forex", "currency": "forex", "currencies": "forex",
+    "risks": "risk", "risky": "risk",
+}
+
+
+def _normalize_tokens(text):
+    tokens = []
+    for token in re.findall(r"[a-z0-9&]+", text.lower()):
+        token = SYNONYMS.get(token, token)
+        if token in STOP_WORDS:
+            continue
+        if len(token) > 4 and token.endswith("ies"):
+            token = token[:-3] + "y"
+        elif len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(SYNONYMS.get(token, token))
+    return tokens
+
+
+def _hash_feature(feature):
+    return zlib.crc32(feature.encode("utf-8"))
+
+
+class HashedTfidfEmbedder:
+    """
+    Local, network-free query embedder using hashed TF-IDF over unigrams and bigrams.
+    Document frequencies are tracked per hash bucket as queries are stored.
+    """
+
+    def __init__(self, dim=EMBEDDING_DIM):
+        self.dim = dim
+        self.doc_count = 0
+        self.doc_freq = np.zeros(dim, dtype=np.float64)
+
+    def _features(self, text):
+        tokens = _normalize_tokens(text)
+        # Bigrams are order-insensitive and down-weighted so paraphrases still line up
+        bigrams = ["_".join(sorted(pair)) for pair in zip(tokens, tokens[1:])]
+        return [(token, 1.0) for token in tokens] + [(bigram, BIGRAM_WEIGHT) for bigram in bigrams]
+
+    def _term_counts(self, text):
+        counts = {}
+        for feature, weight in self._features(text):
+            h = _hash_feature(feature)
+            idx = h % self.dim
+            sign = 1.0 if (h >> 31) & 1 else -1.0
+            counts[idx] = counts.get(idx, 0.0) + sign * weight
+        return counts
+
+    def observe(self, text):
+        self.doc_count += 1
+        for idx in self._term_counts(text):
+            self.doc_freq[idx] += 1
+
+    def embed(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for idx, count in self._term_counts(text).items():
+            idf = np.log((1 + self.doc_count) / (1 + self.doc_freq[idx])) + 1.0
+            if abs(count) > 1.0:
+                count = np.sign(count) * (1.0 + np.log(abs(count)))
+            vector[idx] = count * idf
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+
+class SemanticCache:
+    """
+    Near-duplicate query cache backed by a random-hyperplane LSH index.
+    :param name: Cache name used in metrics
+    :param threshold: Minimum cosine similarity for a hit
+    :param max_entries: Capacity; the oldest entries are overwritten once full
+    :param ttl_seconds: Maximum age of a stored answer
+    """
+
+    def __init__(self, name, threshold=DEFAULT_THRESHOLD, max_entries=DEFAULT_MAX_ENTRIES,
+                 ttl_seconds=DEFAULT_TTL_SECONDS, dim=EMBEDDING_DIM):
+        self.name = name
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.embedder = HashedTfidfEmbedder(dim)
+
+        rng = np.random.default_rng(1337)
+        self._planes = rng.standard_normal((LSH_TABLES * LSH_BITS, dim)).astype(np.float32)
+        self._bit_weights = (1 << np.arange(LSH_BITS, dtype=np.int64))
+        self._buckets = [dict() for _ in range(LSH_TABLES)]
+
+        self._capacity = 0
+        self._size = 0
+        self._next_slot = 0
+        self._vectors = np.zeros((0, dim), dtype=np.float16)
+        self._keys = np.zeros((0, LSH_TABLES), dtype=np.int64)
+        self._namespaces = np.zeros(0, dtype=np.int32)
+        self._created = np.zeros(0, dtype=np.float64)
+        self._answers = []
+        self._namespace_ids = {}
+
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self._latencies_ms = deque(maxlen=1000)
+
+    def _grow(self):
+        new_capacity = min(max(1024, self._capacity * 2), self.max_entries)
+        extra = new_capacity - self._capacity
+        self._vectors = np.vstack([self._vectors, np.zeros((extra, self._vectors.shape[1]), dtype=np.float16)])
+        self._keys = np.vstack([self._keys, np.zeros((extra, LSH_TABLES), dtype=np.int64)])
+        self._namespaces = np.concatenate([self._namespaces, np.full(extra, -1, dtype=np.int32)])
+        self._created = np.concatenate([self._created, np.zeros(extra)])
+        self._answers.extend([None] * extra)
+        self._capacity = new_capacity
+
+    def _hash_keys(self, vector):
+        bits = (self._planes @ vector > 0).reshape(LSH_TABLES, LSH_BITS)
+        return bits.astype(np.int64) @ self._bit_weights
+
+    def _namespace_id(self, namespace):
+        return self._namespace_ids.setdefault(namespace, len(self._namespace_ids))
+
+    def _candidates(self, keys):
+        candidates = set()
+        for table, key in enumerate(keys):
+            buckets = self._buckets[table]
+            candidates.update(buckets.get(int(key), ()))
+            # Multi-probe: neighbouring buckets differing in a single bit
+            for bit in range(LSH_BITS):
+                candidates.update(buckets.get(int(key) ^ (1 << bit), ()))
+        return candidates
+
+    def _evict(self, slot):
+        for table, key in enumerate(self._keys[slot]):
+            bucket = self._buckets[table].get(int(key))
+            if bucket:
+                try:
+                    bucket.remove(slot)
+                except ValueError:
+                    pass
+                if not bucket:
+                    del self._buckets[table][int(key)]
+        self._answers[slot] = None
+        self._namespaces[slot] = -1
+
+    def lookup(self, query, namespace=None):
+        """
+        Return the stored answer for the most similar query in the same namespace, or None.
+        """
+        start = time.perf_counter()
+        try:
+            with self._lock:
+                if self._size == 0 or namespace not in self._namespace_ids:
+                    self.misses += 1
+                    return None
+
+                vector = self.embedder.embed(query)
+                candidates = self._candidates(self._hash_keys(vector))
+                if not candidates:
+                    self.misses += 1
+                    return None
+
+                ids = np.fromiter(candidates, dtype=np.int64)
+                ns_id = self._namespace_ids[namespace]
+                fresh = time.time() - self.ttl_seconds
+                ids = ids[(self._namespaces[ids] == ns_id) & (self._created[ids] >= fresh)]
+                if ids.size == 0:
+                    self.misses += 1
+                    return None
+
+                scores = self._vectors[ids].astype(np.float32) @ vector
+                best = int(np.argmax(scores))
+                if scores[best] < self.threshold:
+                    self.misses += 1
+                    return None
+
+                self.hits += 1
+                return self._answers[int(ids[best])]
+        finally:
+            self._latencies_ms.append((time.perf_counter() - start) * 1000)
+
+    def store(self, query, answer, namespace=None):
+        if not answer:
+            return
+        with self._lock:
+            self.embedder.observe(query)
+            vector = self.embedder.embed(query)
+
+            if self._size < self.max_entries and self._size >= self._capacity:
+                self._grow()
+            slot = self._next_slot
+            if self._answers[slot] is not None:
+                self._evict(slot)
+            else:
+                self._size += 1
+            self._next_slot = (slot + 1) % self.max_entries
+
+            keys = self._hash_keys(vector)
+            self._vectors[slot] = vector
+            self._keys[slot] = keys
+            self._namespaces[slot] = self._namespace_id(namespace)
+            self._created[slot] = time.time()
+            self._answers[slot] = answer
+            for table, key in enumerate(keys):
+                self._buckets[table].setdefault(int(key), []).append(slot)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            latencies = sorted(self._latencies_ms)
+        p50 = latencies[len(latencies) // 2] if latencies else 0.0
+        p95 = latencies[int(len(latencies) * 0.95) - 1] if len(latencies) >= 20 else (latencies[-1] if latencies else 0.0)
+        return {
+            "name": self.name,
+            "entries": self._size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "p50_ms": p50,
+            "p95_ms": p95,
+        }
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_semantic_cache(name):
+    """
+    Return the process-wide semantic cache for an agent, creating it on first use.
+    """
+    with _caches_lock:
+        if name not in _caches:
+            _caches[name] = SemanticCache(name)
+        return _caches[name]
+
+
+def semantic_cache_stats():
+    with _caches_lock:
+        caches = list(_caches.values())
+    return [cache.stats() for cache in caches]
@@ -0,0 +1,236 @@
+import os
+import json
+import time
+import hashlib
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: cross-process coalescing is unavailable
+    fcntl = None
+
+# Cross-process coalescing is opt-in; it serializes identical prompts through a lock file
+CROSS_PROCESS = os.getenv("SINGLEFLIGHT_CROSS_PROCESS", "off").lower() in ("1", "on", "true")
+INFLIGHT_DIR = os.getenv("SINGLEFLIGHT_DIR", os.path.join(".cache", "inflight"))
+# Lock and result files unused for this long are swept; results are only read by callers
+# that waited behind the lock, which is bounded by the completion timeout
+INFLIGHT_TTL_SECONDS = float(os.getenv("SINGLEFLIGHT_TTL_SECONDS", "600"))
+SWEEP_INTERVAL_SECONDS = 60.0
+
+
+def request_key(model, messages, **params):
+    """
+    Key identifying a completion: the model plus the fully rendered prompt and sampling params.
+    """
+    payload = json.dumps({"model": model, "messages": messages, "params": params}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class _Stream:
+    """
+    Token stream shared by every subscriber of one in-flight completion.
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.finished = False
+        self.error = None
+        self.condition = threading.Condition()
+
+    def publish(self, chunk):
+        with self.condition:
+            self.chunks.append(chunk)
+            self.condition.notify_all()
+
+    def close(self, error=None):
+        with self.condition:
+            self.finished = True
+            self.error = error
+            self.condition.notify_all()
+
+    def subscribe(self):
+        index = 0
+        while True:
+            with self.condition:
+                while index >= len(self.chunks) and not self.finished:
+                    self.condition.wait()
+                pending = self.chunks[index:]
+                finished, error = self.finished, self.error
+            for chunk in pending:
+                yield chunk
+            index += len(pending)
+            if finished and index >= len(self.chunks):
+                if error is not None:
+                    raise error
+                return
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical requests so they share one upstream call.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._streams = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        """
+        Run fn once for all concurrent callers with the same key and return its result to each.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.leaders += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = _cross_process(key, fn) if CROSS_PROCESS and fcntl else fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stream(self, key, fn):
+        """
+        Subscribe to the shared token stream for key, starting it with fn() (an iterator
+        of text chunks) when no identical stream is in flight.
+        """
+        with self._lock:
+            stream = self._streams.get(key)
+            leader = stream is None
+            if leader:
+                stream = _Stream()
+                self._streams[key] = stream
+                self.leaders += 1
+            else:
+                self.coalesced += 1
+
+        if leader:
+            # Pump upstream on its own thread so subscribers are independent of each other
+            threading.Thread(target=self._pump, args=(key, stream, fn), daemon=True).start()
+        return stream.subscribe()
+
+    def _pump(self, key, stream, fn):
+        error = None
+        try:
+            for chunk in fn():
+                stream.publish(chunk)
+        except Exception as e:
+            error = e
+        finally:
+            with self._lock:
+                self._streams.pop(key, None)
+            stream.close(error)
+
+    def stats(self):
+        with self._lock:
+            return {"leaders": self.leaders, "coalesced": self.coalesced, "in_flight": len(self._calls) + len(self._streams)}
+
+
+_last_sweep = 0.0
+_sweep_lock = threading.Lock()
+
+
+def sweep_inflight(directory=INFLIGHT_DIR, ttl=INFLIGHT_TTL_SECONDS):
+    """
+    Delete lock and result files not used within ttl seconds. Lock files still held by
+    another process are skipped.
+    :return: Number of files removed
+    """
+    removed = 0
+    cutoff = time.time() - ttl
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return 0
+    for name in names:
+        path = os.path.join(directory, name)
+        try:
+            if os.path.getmtime(path) >= cutoff:
+                continue
+            if name.endswith(".lock"):
+                with open(path, "a+") as lock_file:
+                    try:
+                        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        continue
+                    os.unlink(path)
+            else:
+                os.unlink(path)
+            removed += 1
+        except OSError:
+            continue
+    return removed
+
+
+def _maybe_sweep():
+    global _last_sweep
+    with _sweep_lock:
+        if time.time() - _last_sweep < SWEEP_INTERVAL_SECONDS:
+            return
+        _last_sweep = time.time()
+    sweep_inflight()
+
+
+def _cross_process(key, fn):
+    """
+    Serialize identical requests across processes on this host with a lock file. Whoever
+    waited behind the lock reuses the result the holder wrote while it was waiting.
+    """
+    os.makedirs(INFLIGHT_DIR, exist_ok=True)
+    _maybe_sweep()
+    path = os.path.join(INFLIGHT_DIR, key)
+    waited_since = time.time()
+    with open(path + ".lock", "a+") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            waited = False
+        except BlockingIOError:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            waited = True
+        try:
+            # The lock file's mtime records its last use for the sweep
+            os.utime(path + ".lock")
+            if waited:
+                try:
+                    if os.path.getmtime(path + ".json") >= waited_since:
+                        with open(path + ".json") as f:
+                            return json.load(f)["result"]
+                except (OSError, ValueError, KeyError):
+                    pass
+            result = fn()
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"result": result}, f)
+            os.replace(tmp_path, path + ".json")
+            return result
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+singleflight = SingleFlight()
@@ -0,0 +1,328 @@
+import json
+import time
+
+from agents.circuit_breaker import CircuitOpenError, STALE_NOTICE, FALLBACK_NOTICE
+from agents.model_router import stream_chat_completion, last_completion
+from agents.prompts import copy_messages, max_tokens_for
+from services.result_archive import archive_result
+
+LEVELS = ["Low", "Medium", "High"]
+
+# Fixed output schema per agent (a JSON Schema subset: type, properties, required, items,
+# enum, minimum, maximum). Property order is the order fields are requested and rendered.
+SCHEMAS = {
+    "market_analysis": {
+        "type": "object",
+        "properties": {
+            "insights": {"type": "array", "items": {"type": "string"}},
+            "investment_impacts": {"type": "array", "items": {"type": "string"}},
+            "trends": {"type": "array", "items": {"type": "string"}},
+            "risk_assessment": {"type": "string"},
+        },
+        "required": ["insights", "investment_impacts", "trends", "risk_assessment"],
+    },
+    "risk_scoring": {
+        "type": "object",
+        "properties": {
+            "risk_score": {"type": "integer", "minimum": 1, "maximum": 100},
+            "risk_level": {"type": "string", "enum": LEVELS},
+            "risk_factors": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "factor": {"type": "string"},
+                        "impact": {"type": "string", "enum": LEVELS},
+                        "detail": {"type": "string"},
+                    },
+                    "required": ["factor", "impact"],
+                },
+            },
+            "recommendations": {"type": "array", "items": {"type": "string"}},
+            "market_conditions": {"type": "string"},
+            "outlook": {
+                "type": "object",
+                "properties": {"short_term": {"type": "string"}, "long_term": {"type": "string"}},
+                "required": ["short_term", "long_term"],
+            },
+        },
+        "required": ["risk_score", "risk_level", "risk_factors", "recommendations"],
+    },
+    "project_status": {
+        "type": "object",
+        "properties": {
+            "health": {"type": "string", "enum": ["On Track", "At Risk", "Off Track"]},
+            "internal_risks": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {"risk": {"type": "string"}, "severity": {"type": "string", "enum": LEVELS}},
+                    "required": ["risk", "severity"],
+                },
+            },
+            "mitigations": {"type": "array", "items": {"type": "string"}},
+            "progress_evaluation": {"type": "string"},
+            "recommendations": {"type": "array", "items": {"type": "string"}},
+        },
+        "required": ["health", "internal_risks", "recommendations"],
+    },
+    "reporting": {
+        "type": "object",
+        "properties": {
+            "executive_summary": {"type": "string"},
+            "key_metrics": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {"metric": {"type": "string"}, "value": {"type": "string"}},
+                    "required": ["metric", "value"],
+                },
+            },
+            "trends": {"type": "array", "items": {"type": "string"}},
+            "alert_triggers": {"type": "array", "items": {"type": "string"}},
+            "recommendations": {"type": "array", "items": {"type": "string"}},
+        },
+        "required": ["executive_summary", "key_metrics", "recommendations"],
+    },
+}
+
+# Event path carrying a degraded-mode notice ahead of a stale or fallback result
+NOTICE_PATH = ("_notice",)
+
+_TYPES = {"object": dict, "array": list, "string": str, "number": (int, float), "integer": (int, float), "boolean": bool}
+
+
+class StructuredOutputError(ValueError):
+    """Raised when a completion is not valid JSON or does not match the agent's schema."""
+
+    def __init__(self, message, errors=()):
+        super().__init__(message if not errors else f"{message}: {'; '.join(errors)}")
+        self.errors = list(errors)
+
+
+def validate(value, schema, path="$"):
+    """
+    Validate value against a schema.
+    :return: List of error messages, empty when valid
+    """
+    expected = schema.get("type")
+    if expected:
+        valid = isinstance(value, _TYPES[expected]) and not (expected != "boolean" and isinstance(value, bool))
+        if expected == "integer" and valid and isinstance(value, float) and not value.is_integer():
+            valid = False
+        if not valid:
+            return [f"{path}: expected {expected}"]
+
+    errors = []
+    if "enum" in schema and value not in schema["enum"]:
+        errors.append(f"{path}: must be one of {', '.join(map(str, schema['enum']))}")
+    if "minimum" in schema and value < schema["minimum"]:
+        errors.append(f"{path}: must be >= {schema['minimum']}")
+    if "maximum" in schema and value > schema["maximum"]:
+        errors.append(f"{path}: must be <= {schema['maximum']}")
+    if expected == "object":
+        for name in schema.get("required", ()):
+            if name not in value:
+                errors.append(f"{path}.{name}: required")
+        for name, subschema in schema.get("properties", {}).items():
+            if name in value:
+                errors.extend(validate(value[name], subschema, f"{path}.{name}"))
+    if expected == "array" and "items" in schema:
+        for index, item in enumerate(value):
+            errors.extend(validate(item, schema["items"], f"{path}[{index}]"))
+    return errors
+
+
+class IncrementalJSONParser:
+    """
+    Streaming JSON parser: feed text chunks as they arrive and get back a (path, value) event
+    for every value that has been completely received, e.g. (("risk_score",), 72) or
+    (("recommendations", 0), "..."). Text before the first '{' (such as a code fence) and
+    after the top-level object closes is ignored.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.position = 0
+        self.started = False
+        self.value = None
+        self.complete = False
+        # One frame per open container: [kind, start offset, path, current key or index, expecting key]
+        self._stack = []
+        self._string_start = None
+        self._escape = False
+        self._scalar_start = None
+
+    def feed(self, chunk):
+        self.text += chunk
+        events = []
+        text = self.text
+        while self.position < len(text) and not self.complete:
+            char = text[self.position]
+            if self._string_start is not None:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._end_string(events)
+            elif not self.started:
+                if char == "{":
+                    self.started = True
+                    self._open("object")
+            elif self._scalar_start is not None:
+                if char in ",}]" or char.isspace():
+                    self._end_scalar(events)
+                    continue
+            elif char == '"':
+                self._string_start = self.position
+            elif char in "{[":
+                self._open("object" if char == "{" else "array")
+            elif char in "}]":
+                self._close(events)
+            elif char == ":":
+                self._stack[-1][4] = False
+            elif char == ",":
+                frame = self._stack[-1]
+                if frame[0] == "object":
+                    frame[4] = True
+                else:
+                    frame[3] += 1
+            elif not char.isspace():
+                self._scalar_start = self.position
+            self.position += 1
+        return events
+
+    def _value_path(self):
+        if not self._stack:
+            return ()
+        frame = self._stack[-1]
+        return frame[2] + (frame[3],)
+
+    def _open(self, kind):
+        self._stack.append([kind, self.position, self._value_path(), 0 if kind == "array" else None, kind == "object"])
+
+    def _close(self, events):
+        kind, start, path, _, _ = self._stack.pop()
+        self._emit(events, path, self.text[start:self.position + 1])
+        if not self._stack:
+            self.complete = True
+
+    def _end_string(self, events):
+        raw = self.text[self._string_start:self.position + 1]
+        self._string_start = None
+        frame = self._stack[-1]
+        if frame[0] == "object" and frame[4]:
+            frame[3] = json.loads(raw)
+        else:
+            self._emit(events, self._value_path(), raw)
+
+    def _end_scalar(self, events):
+        raw = self.text[self._scalar_start:self.position]
+        self._scalar_start = None
+        self._emit(events, self._value_path(), raw)
+
+    def _emit(self, events, path, raw):
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError as e:
+            raise StructuredOutputError(f"Invalid JSON at {'.'.join(map(str, path)) or 'top level'}: {e.msg}")
+        if not path:
+            self.value = value
+        events.append((path, value))
+
+    def result(self):
+        if not self.complete:
+            raise StructuredOutputError("Completion ended before the JSON object was complete")
+        return self.value
+
+
+def structured_messages(agent, messages):
+    """
+    Copy of messages asking the model to answer with a JSON object matching the agent's schema.
+    """
+    instruction = (
+        "Respond only with a single JSON object, without code fences or any other text, "
+        f"matching this JSON schema: {json.dumps(SCHEMAS[agent], separators=(',', ':'))}"
+    )
+    messages = copy_messages(messages)
+    messages[0]["content"] = f"{messages[0]['content']} {instruction}"
+    return messages
+
+
+def _degraded(breaker, key, fallback):
+    stored = breaker.stored(key)
+    if stored is not None:
+        answer, created = stored
+        yield NOTICE_PATH, STALE_NOTICE.format(timestamp=created.strftime("%Y-%m-%d %H:%M"))
+        yield (), answer
+    elif fallback is not None:
+        yield NOTICE_PATH, FALLBACK_NOTICE
+        yield (), fallback()
+    else:
+        raise CircuitOpenError(f"{breaker.name.replace('_', ' ').title()} is temporarily unavailable. Please try again shortly.")
+
+
+def stream_structured(client, agent, messages, breaker, key, query=None, fallback=None, max_tokens=None,
+                      inputs=None, title=None):
+    """
+    Stream a structured completion through the agent's circuit breaker, yielding a
+    (path, value) event as soon as each field is complete and finally ((), result) once the
+    whole object has been validated. When the breaker is open, or the call fails before any
+    JSON was received, the stored result for key or the fallback is served instead, preceded
+    by a NOTICE_PATH event.
+    :param fallback: Optional callable returning a locally computed result matching the schema
+    :param inputs: Inputs recorded with the result in the archive
+    :param title: Archive title
+    """
+    if not breaker.allow_request():
+        yield from _degraded(breaker, key, fallback)
+        return
+
+    if max_tokens is None:
+        max_tokens = max_tokens_for(agent, getattr(messages, "variant", None), structured=True)
+    parser = IncrementalJSONParser()
+    start = time.perf_counter()
+    try:
+        for chunk in stream_chat_completion(
+            client, agent, structured_messages(agent, messages), query=query, temperature=0.2, max_tokens=max_tokens
+        ):
+            for event in parser.feed(chunk):
+                if event[0]:
+                    yield event
+        if not parser.complete and (last_completion() or {}).get("finish_reason") == "length":
+            raise StructuredOutputError(f"Response was cut off at {max_tokens} tokens; the next request gets a higher cap")
+        result = parser.result()
+        errors = validate(result, SCHEMAS[agent])
+        if errors:
+            raise StructuredOutputError("Response does not match the schema", errors)
+    except Exception:
+        breaker.record(False, time.perf_counter() - start)
+        if parser.started:
+            raise
+        yield from _degraded(breaker, key, fallback)
+        return
+    breaker.record(True, time.perf_counter() - start)
+    breaker.remember(key, result)
+    archive_result(agent, dict(inputs or {}, structured=True), to_markdown(agent, result), title, last_completion())
+    yield (), result
+
+
+def to_markdown(agent, data):
+    """
+    Render a structured result as Markdown, one section per schema field.
+    """
+    sections = []
+    for name, schema in SCHEMAS[agent]["properties"].items():
+        if name not in data:
+            continue
+        value = data[name]
+        title = name.replace("_", " ").title()
+        if schema["type"] == "array":
+            items = [" - ".join(str(v) for v in item.values()) if isinstance(item, dict) else str(item) for item in value]
+            sections.append(f"**{title}:**\n" + "\n".join(f"- {item}" for item in items))
+        elif schema["type"] == "object":
+            sections.append(f"**{title}:**\n" + "\n".join(f"- {k.replace('_', ' ').title()}: {v}" for k, v in value.items()))
+        else:
+            sections.append(f"**{title}:** {value}")
+    return "\n\n".join(sections)
@@ -16,12 +16,29 @@ import plotly.graph_objects as go
 import plotly.express as px
 from streamlit_extras.metric_cards import style_metric_cards
 import os
+import json
+import sqlite3
 from dotenv import load_dotenv
 
-from agents.market_analysis import market_analysis_agent
-from agents.risk_scoring import risk_scoring_agent
-from agents.project_status import project_status_agent
-from agents.reporting import reporting_agent
+from agents.market_analysis import market_analysis_agent, stream_market_analysis, stream_market_analysis_structured
+from agents.risk_scoring import risk_scoring_agent, stream_risk_scoring_structured
+from agents.structured_output import NOTICE_PATH, SCHEMAS, to_markdown
+from agents.project_status import project_status_agent, stream_project_status_structured
+from agents.reporting import reporting_agent, stream_reporting_structured
+from agents.semantic_cache import semantic_cache_stats
+from agents.model_router import model_stats
+from agents.circuit_breaker import circuit_breaker_stats
+from agents.pipeline import Pipeline, Node
+from agents.prompts import template_report, prompt_report, PROMPT_VERSION
+from services.data_cache import cached_source, data_source_status, subscribe_source
+from services.dashboard_snapshot import get_dashboard_snapshot, RADAR_METRICS
+from services.instrument_universe import load_universe, score_universe, asset_class_risk, ASSET_CLASSES, FACTOR_WEIGHTS
+from services.live_ticks import get_tick_hub, INSTRUMENTS
+from services.memory_profile import compact_frame, dataset_memory, memory_profile, record_session, format_bytes
+from services.render_metrics import isolated_fragment, measure, label_run, render_metrics
+from services.job_queue import get_job_queue, markdown_to_html, STATUS_DONE, STATUS_FAILED
+from services.result_archive import get_result_archive, AGENT_LABELS
+from services.whatif_risk import IncrementalRiskModel, WHATIF_HORIZON_DAYS
 
 
 # Load environment variables
@@ -56,13 +73,16 @@ COLOR_WARNING = "#FFA500"
 COLOR_SUCCESS = "#4BB543"
 COLOR_CARD = "#FFFFFF"
 COLOR_TEXT = "#FFFFFF"  # Change text color to white
+LIVE_REFRESH_SECONDS = 2  # Chart refresh interval in live mode
+RISK_CONTEXT_CHARS = 600  # Streamed market analysis needed before risk scoring starts
+PIPELINE_LABELS = {"market": "Market analysis", "risk": "Risk scoring", "project": "Project status", "report": "Reporting"}
 
 # Set theme
 sns.set_theme(style="whitegrid", palette="pastel")
 plt.style.use("seaborn-v0_8")
 
-# Data loading functions with enhanced caching and error handling
-@st.cache_data
+# Data loading functions with stale-while-revalidate caching and error handling
+@cached_source("market", ttl=300)
 def load_market_data():
     try:
         dates = pd.date_range(start=datetime.now() - timedelta(days=90), end=datetime.now(), freq='D')
@@ -79,27 +99,40 @@ def load_market_data():
         df = pd.DataFrame(data)
         df['Date'] = pd.to_datetime(df['Date'])
         df.set_index('Date', inplace=True)
-        return df
+        return compact_frame(df, float32=['S&P500', 'NASDAQ', 'DJIA', 'Volatility', 'Volume'])
     except Exception as e:
         st.error(f"Error loading market data: {str(e)}")
         return pd.DataFrame()
 
-@st.cache_data
+@cached_source("risk", ttl=900)
 def load_risk_data():
     try:
         data = {
             'Asset': ['US Equities', 'EU Bonds', 'Emerging Markets', 'Commodities', 'Crypto', 'Real Estate'],
+            'Asset_Class': ['Equities', 'Bonds', 'Equities', 'Commodities', 'Cryptocurrency', 'Real Estate'],
             'Current_Exposure': [35, 25, 15, 10, 5, 10],
-            'Risk_Score': [65, 40, 80, 70, 95, 55],
             'Return_Potential': [75, 45, 85, 60, 90, 50],
             'Liquidity': [90, 85, 60, 70, 50, 30],
+            'Volatility': [18, 7, 24, 22, 65, 15],
         }
-        return pd.DataFrame(data)
+        df = pd.DataFrame(data)
+        
+        # Positions are scored by the factor model of their universe asset class, so the book and
+        # the risk gauge share one taxonomy and one score
+        class_scores = load_asset_class_risk()
+        if class_scores.empty:
+            raise ValueError("factor model scores are unavailable")
+        df.insert(3, 'Risk_Score', df['Asset_Class'].map(class_scores.set_index('Asset')['Risk_Score']).round())
+        return compact_frame(
+            df,
+            categories=['Asset', 'Asset_Class'],
+            int16=['Current_Exposure', 'Risk_Score', 'Return_Potential', 'Liquidity', 'Volatility'],
+        )
     except Exception as e:
         st.error(f"Error loading risk data: {str(e)}")
         return pd.DataFrame()
 
-@st.cache_data
+@cached_source("projects", ttl=3600)
 def load_project_data():
     try:
         data = {
@@ -116,12 +149,12 @@ def load_project_data():
         df = pd.DataFrame(data)
         df['Start_Date'] = pd.to_datetime(df['Start_Date'])
         df['Due_Date'] = pd.to_datetime(df['Due_Date'])
-        return df
+        return compact_frame(df, categories=['Resource_Risk', 'Schedule_Risk', 'Budget_Risk'], int16=['Progress'])
     except Exception as e:
         st.error(f"Error loading project data: {str(e)}")
         return pd.DataFrame()
 
-@st.cache_data
+@cached_source("alerts", ttl=300)
 def load_historical_risk_alerts():
     try:
         data = {
@@ -146,13 +179,194 @@ def load_historical_risk_alerts():
         
         df = pd.DataFrame(data)
         df['Date'] = pd.to_datetime(df['Date'])
-        return df
+        return compact_frame(df, categories=['Alert_Type', 'Severity', 'Status'])
     except Exception as e:
         st.error(f"Error loading historical alerts: {str(e)}")
         return pd.DataFrame()
 
+@cached_source("universe", ttl=86400)
+def load_instrument_universe():
+    try:
+        return score_universe(load_universe())
+    except Exception as e:
+        st.error(f"Error loading instrument universe: {str(e)}")
+        return pd.DataFrame()
+
+@cached_source("asset_class_risk", ttl=60, version_fn=lambda: load_instrument_universe.source.version)
+def load_asset_class_risk():
+    try:
+        return asset_class_risk(load_instrument_universe())
+    except Exception as e:
+        st.error(f"Error computing asset class risk: {str(e)}")
+        return pd.DataFrame()
+
+# Dashboard metrics materialized from the data sources, updated as each source refreshes
+dashboard_snapshot = get_dashboard_snapshot()
+for source_name in dashboard_snapshot.sources():
+    subscribe_source(source_name, dashboard_snapshot.update)
+
+def dashboard_record():
+    record = dashboard_snapshot.current()
+    if record is None:
+        # Cold start: loading the sources materializes the first record
+        load_market_data(), load_risk_data(), load_project_data(), load_historical_risk_alerts()
+        record = dashboard_snapshot.current()
+    return record
+
+def format_delta(delta, suffix=""):
+    return None if delta is None else f"{delta:+.0f}{suffix}"
+
+# Local risk scoring from the factor model, also served by the risk agent while the AI service is degraded
+def risk_level(risk_score):
+    return 'Low' if risk_score < 40 else 'Medium' if risk_score < 70 else 'High'
+
+def recommended_action(risk_score):
+    return 'Monitor' if risk_score < 40 else 'Review' if risk_score < 70 else 'Mitigate'
+
+def asset_risk_profile(asset_type):
+    class_risk = load_asset_class_risk()
+    if class_risk.empty:
+        return None
+    match = class_risk[class_risk['Asset'] == asset_type]
+    return None if match.empty else match.iloc[0]
+
+def asset_risk_score(asset_type):
+    profile = asset_risk_profile(asset_type)
+    return 0 if profile is None else int(round(profile['Risk_Score']))
+
+def factor_label(factor):
+    return factor.replace('_Factor', '')
+
+def risk_profile_summary(asset_type):
+    profile = asset_risk_profile(asset_type)
+    if profile is None:
+        return None
+    risk_score = asset_risk_score(asset_type)
+    factors = ", ".join(f"{factor_label(f)} {profile[f]:.0f}/100" for f in FACTOR_WEIGHTS)
+    return (
+        f"baseline risk score {risk_score}/100 ({risk_level(risk_score)}) over {profile['Instruments']:,} instruments; "
+        f"factor scores: {factors}"
+    )
+
+def local_risk_assessment(asset_type):
+    risk_score = asset_risk_score(asset_type)
+    profile = asset_risk_profile(asset_type)
+    factors = "".join(f"- {factor_label(f)}: {profile[f]:.0f}/100\n" for f in FACTOR_WEIGHTS) if profile is not None else ""
+    return (
+        f"**Asset Type:** {asset_type}\n\n"
+        f"**Overall Risk Score:** {risk_score}/100\n\n"
+        f"**Risk Level:** {risk_level(risk_score)}\n\n"
+        f"**Risk Factors:**\n{factors}\n"
+        f"**Recommended Action:** {recommended_action(risk_score)}"
+    )
+
+# Background jobs for long-running reports and batch analyses
+def run_report_job(params):
+    datasets = {
+        "alerts": load_historical_risk_alerts(),
+        "projects": load_project_data(),
+        "risk exposures": load_risk_data(),
+        "market data": load_market_data(),
+    }
+    return reporting_agent(params["report_type"], params["timeframe"], params["details"], datasets, raise_errors=True)
+
+def run_batch_analysis_job(params):
+    sections, errors = [], []
+    for query in params["queries"]:
+        try:
+            analysis = market_analysis_agent(query, raise_errors=True)
+        except Exception as e:
+            errors.append(f"{query}: {e}")
+            analysis = f"Analysis failed: {e}"
+        sections.append(f"## {query}\n\n{analysis or 'No analysis generated.'}")
+    if len(errors) == len(params["queries"]):
+        raise RuntimeError("; ".join(errors))
+    return "\n\n".join(sections)
+
+job_queue = get_job_queue()
+result_archive = get_result_archive()
+job_queue.register("report", run_report_job)
+job_queue.register("batch_analysis", run_batch_analysis_job)
+
+def submit_job(kind, params, title):
+    job_id = job_queue.submit(kind, params, title=title)
+    st.session_state.setdefault("job_ids", []).append(job_id)
+    return job_id
+
+def render_job(job, key_prefix):
+    status_icon = {"queued": "⏳", "running": "🔄", "done": "✅", "failed": "❌"}[job['status']]
+    submitted = datetime.fromtimestamp(job['created']).strftime('%Y-%m-%d %H:%M')
+    with st.container(border=True):
+        st.write(f"{status_icon} **{job['title']}** — {job['status'].title()} (submitted {submitted})")
+        if job['status'] == STATUS_DONE:
+            with st.expander("View result"):
+                st.markdown(job['result'])
+            file_name = job['title'].lower().replace(' ', '_')
+            col_a, col_b = st.columns(2)
+            with col_a:
+                st.download_button("Download Markdown", job['result'], file_name=f"{file_name}.md",
+                                   mime="text/markdown", key=f"{key_prefix}_md_{job['id']}", use_container_width=True)
+            with col_b:
+                st.download_button("Download HTML", markdown_to_html(job['title'], job['result']),
+                                   file_name=f"{file_name}.html", mime="text/html",
+                                   key=f"{key_prefix}_html_{job['id']}", use_container_width=True)
+        elif job['status'] == STATUS_FAILED:
+            st.error(f"Job failed: {job['error']}")
+
+@isolated_fragment(run_every=3)
+def job_status_panel(kind):
+    jobs = job_queue.list_jobs(job_ids=st.session_state.get("job_ids", []), kind=kind)
+    if not jobs:
+        st.info("No jobs submitted in this session.")
+    for job in jobs:
+        render_job(job, "session")
+
+
+# Live market charts: fragments that rerun on their own from the latest tick snapshot
+@isolated_fragment(run_every=LIVE_REFRESH_SECONDS)
+def live_market_overview():
+    hub = get_tick_hub()
+    snapshot = hub.snapshot()
+    frame = snapshot.frame(INSTRUMENTS)
+    if frame.empty:
+        st.info(hub.last_error or f"Waiting for ticks on {hub.feed}...")
+        return
+    fig = px.line(frame, x=frame.index, y=list(frame.columns),
+                  labels={'value': 'Index Value', 'variable': 'Index', 'x': 'Time'})
+    st.plotly_chart(fig, use_container_width=True)
+    st.caption(f"Live: {snapshot.ticks_total:,} ticks ingested, snapshot v{snapshot.version}")
+
+@isolated_fragment(run_every=LIVE_REFRESH_SECONDS)
+def live_market_visualizations():
+    hub = get_tick_hub()
+    snapshot = hub.snapshot()
+    frame = snapshot.frame(INSTRUMENTS)
+    if frame.empty:
+        st.info(hub.last_error or f"Waiting for ticks on {hub.feed}...")
+        return
+    returns = frame.pct_change()
+    tab1, tab2, tab3 = st.tabs(["Index Performance", "Volatility", "Correlation"])
+
+    with tab1:
+        fig = px.line(frame, x=frame.index, y=list(frame.columns),
+                      labels={'value': 'Index Value', 'variable': 'Index', 'x': 'Time'},
+                      color_discrete_sequence=[COLOR_PRIMARY, COLOR_SECONDARY, COLOR_ACCENT])
+        fig.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)')
+        st.plotly_chart(fig, use_container_width=True)
+
+    with tab2:
+        volatility = (returns.rolling(30).std() * 100).dropna(how="all")
+        fig = px.line(volatility, x=volatility.index, y=list(volatility.columns),
+                      labels={'value': 'Realized Volatility (%)', 'variable': 'Index', 'x': 'Time'},
+                      color_discrete_sequence=[COLOR_PRIMARY, COLOR_SECONDARY, COLOR_ACCENT])
+        fig.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)')
+        st.plotly_chart(fig, use_container_width=True)
 
+    with tab3:
+        fig = px.imshow(returns.corr(), text_auto=True, color_continuous_scale='Blues')
+        st.plotly_chart(fig, use_container_width=True)
 
+    st.caption(f"Live: {snapshot.ticks_total:,} ticks ingested, snapshot v{snapshot.version}")
 
 # Sidebar navigation with improved layout
 def sidebar():
@@ -175,10 +389,12 @@ def sidebar():
         
         page = st.radio(
     "Select Agent",
-    ["Dashboard", "Market Analysis", "Risk Scoring", "Project Status", "Risk Reporting", "Cliques AI Chatbot"],
+    ["Dashboard", "Market Analysis", "Risk Scoring", "Project Status", "Risk Reporting", "Cliques AI Chatbot", "Results Archive"],
     label_visibility="collapsed",
     horizontal=False,
 )
+
+        st.toggle("📡 Live market data", key="live_mode", help="Stream ticks from the local feed into the market charts")
         
         st.markdown("---")
         
@@ -197,16 +413,88 @@ def sidebar():
         st.markdown("---")
         
         # System status
-        st.markdown("""
+        open_breakers = [b['name'].replace('_', ' ').title() for b in circuit_breaker_stats() if b['state'] != 'closed']
+        if open_breakers:
+            api_status = f'<p><span class="status-indicator warning"></span> Degraded: {", ".join(open_breakers)}</p>'
+        else:
+            api_status = '<p><span class="status-indicator success"></span> API connected</p>'
+        sources = data_source_status()
+        failed_sources = [source['name'] for source in sources if source['last_error']]
+        if failed_sources:
+            data_status = f'<p><span class="status-indicator warning"></span> Refresh failed: {", ".join(failed_sources)}</p>'
+        else:
+            data_status = '<p><span class="status-indicator success"></span> Data updated</p>'
+        st.markdown(f"""
         <div class="sidebar-section">
             <h3 class="sidebar-title">System Status</h3>
             <div class="system-status">
-                <p><span class="status-indicator success"></span> All systems operational</p>
-                <p><span class="status-indicator success"></span> API connected</p>
-                <p><span class="status-indicator success"></span> Data updated</p>
+                <p><span class="status-indicator {'warning' if open_breakers else 'success'}"></span> {'Partial outage' if open_breakers else 'All systems operational'}</p>
+                {api_status}
+                {data_status}
             </div>
         </div>
         """, unsafe_allow_html=True)
+
+        # Data source freshness
+        for source in sources:
+            age = f"{source['age_seconds']:.0f}s old" if source['age_seconds'] is not None else "not loaded"
+            refresh = f", refreshed in {source['refresh_seconds'] * 1000:.0f} ms" if source['refresh_seconds'] is not None else ""
+            flag = " (refreshing)" if source['refreshing'] else " (stale)" if source['stale'] else ""
+            st.caption(f"{source['name'].replace('_', ' ').title()} data v{source['version']}: {age}{refresh}{flag}")
+
+        # Semantic cache metrics
+        for stats in semantic_cache_stats():
+            st.caption(
+                f"{stats['name'].replace('_', ' ').title()} cache: {stats['hit_rate']:.0%} hit rate, "
+                f"{stats['entries']:,} entries, p50 {stats['p50_ms']:.2f} ms / p95 {stats['p95_ms']:.2f} ms"
+            )
+
+        # Model routing accounting
+        for stats in model_stats():
+            if stats['calls']:
+                p50 = f"{stats['p50_s']:.1f} s" if stats['p50_s'] is not None else "n/a"
+                st.caption(
+                    f"{stats['model']}: {stats['calls']} calls, {stats['errors']} errors, "
+                    f"p50 {p50}, ${stats['cost_usd']:.4f}"
+                )
+        
+        # Rerun cost per interaction, full reruns vs fragment reruns
+        with st.expander("⏱️ Render Metrics"):
+            metrics = render_metrics()
+            if metrics:
+                st.dataframe(pd.DataFrame(metrics), use_container_width=True, hide_index=True)
+            else:
+                st.caption("No interactions measured yet.")
+        
+        # Prompt template versions: tokens on sample inputs and observed calls
+        with st.expander("🧾 Prompt Templates"):
+            st.caption(f"Active version: {PROMPT_VERSION}")
+            st.dataframe(pd.DataFrame(template_report()), use_container_width=True, hide_index=True)
+            observed = prompt_report()
+            if observed:
+                st.dataframe(pd.DataFrame(observed), use_container_width=True, hide_index=True)
+        
+        # Shared dataset and per-session memory, for sizing hosts
+        with st.expander("🧠 Memory Profile"):
+            datasets = {
+                "market": load_market_data(),
+                "risk": load_risk_data(),
+                "projects": load_project_data(),
+                "alerts": load_historical_risk_alerts(),
+                "universe": load_instrument_universe(),
+            }
+            profile = memory_profile(datasets)
+            rows = dataset_memory(datasets)
+            for row in rows:
+                row["Bytes"] = format_bytes(row["Bytes"])
+                row["Original Bytes"] = format_bytes(row["Original Bytes"])
+            st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+            st.caption(f"Shared datasets: {format_bytes(profile['shared_bytes'])} (one copy for all sessions)")
+            st.caption(f"Per session: {format_bytes(profile['per_session_bytes'])} across {profile['sessions']} active session(s)")
+            for users, total in profile["projections"].items():
+                st.caption(f"Projected for {users} users: {format_bytes(total)}")
+            if profile['peak_rss_bytes'] is not None:
+                st.caption(f"Process peak RSS: {format_bytes(profile['peak_rss_bytes'])}")
         
         st.markdown("---")
         
@@ -226,26 +514,41 @@ def dashboard():
     st.title("📊 Project Risk Dashboard")
     st.markdown("Monitor your financial risk exposure and market trends in real-time")
     
-    # Top metrics
+    # Top metrics, read from the precomputed snapshot
+    record = dashboard_record()
+    if record is None:
+        st.warning(f"Dashboard metrics are unavailable: {'; '.join(dashboard_snapshot.errors.values()) or 'data is still loading'}")
+        return
+    metrics, deltas = record['metrics'], record['deltas']
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.metric(label="Market Risk Index", value="68", delta="+3")
+        st.metric(label="Market Risk Index", value=f"{metrics['market_risk_index']:.0f}",
+                  delta=format_delta(deltas['market_risk_index']), delta_color="inverse")
     with col2:
-        st.metric(label="Portfolio Health", value="82%", delta="-2%")
+        st.metric(label="Portfolio Health", value=f"{metrics['portfolio_health']:.0f}%",
+                  delta=format_delta(deltas['portfolio_health'], "%"))
     with col3:
-        st.metric(label="Active Projects", value="5", delta="+1")
+        st.metric(label="Active Projects", value=f"{metrics['active_projects']}",
+                  delta=format_delta(deltas['active_projects']))
     with col4:
-        st.metric(label="Open Risk Alerts", value="4", delta="-2")
+        st.metric(label="Open Risk Alerts", value=f"{metrics['open_alerts']}",
+                  delta=format_delta(deltas['open_alerts']), delta_color="inverse")
+    updated = datetime.fromtimestamp(record['updated_at']).strftime('%H:%M:%S')
+    st.caption(f"Snapshot updated {updated} from {record['updated_by']} data "
+               f"({', '.join(f'{name} v{version}' for name, version in record['versions'].items())})")
     
     # Main content
     col1, col2 = st.columns([2, 1])
     
     with col1:
         st.subheader("📈 Market Overview")
-        market_data = load_market_data()
-        fig = px.line(market_data[-30:], x=market_data[-30:].index, y=['S&P500', 'NASDAQ', 'DJIA'],
-                      labels={'value': 'Index Value', 'variable': 'Index'})
-        st.plotly_chart(fig, use_container_width=True)
+        if st.session_state.get("live_mode"):
+            live_market_overview()
+        else:
+            market_data = load_market_data()
+            fig = px.line(market_data[-30:], x=market_data[-30:].index, y=['S&P500', 'NASDAQ', 'DJIA'],
+                          labels={'value': 'Index Value', 'variable': 'Index'})
+            st.plotly_chart(fig, use_container_width=True)
     
     with col2:
         st.subheader("⚠️ Recent Alerts")
@@ -264,8 +567,8 @@ def dashboard():
         with st.container(border=True):
             st.subheader("📊 Risk Profile")
             
-            categories = ['Market Risk', 'Credit Risk', 'Liquidity Risk', 'Operational Risk', 'Regulatory Risk']
-            values = [75, 45, 60, 30, 50]
+            categories = list(RADAR_METRICS)
+            values = [metrics[metric] for metric in RADAR_METRICS.values()]
             
             fig = go.Figure()
             
@@ -303,6 +606,99 @@ def dashboard():
             fig.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)')
             st.plotly_chart(fig, use_container_width=True)
 
+def render_structured_stream(agent, events, title):
+    """
+    Render a structured result field by field as the agent streams it, in schema order:
+    scalar fields as soon as they complete, list fields item by item.
+    :param agent: Agent whose schema the events follow
+    :param events: (path, value) events from one of the stream_*_structured agents
+    :param title: Subheader of the results container
+    """
+    properties = SCHEMAS[agent]["properties"]
+    with st.container(border=True):
+        st.subheader(title)
+        notice_slot = st.empty()
+        slots = {name: st.empty() for name in properties}
+    
+    items = {}
+    for path, value in events:
+        if path == NOTICE_PATH:
+            notice_slot.markdown(value)
+        elif len(path) == 1 and path[0] in slots and properties[path[0]]["type"] != "array":
+            slots[path[0]].markdown(to_markdown(agent, {path[0]: value}))
+        elif len(path) == 2 and path[0] in slots:
+            items.setdefault(path[0], []).append(value)
+            slots[path[0]].markdown(to_markdown(agent, {path[0]: items[path[0]]}))
+        elif path == ():
+            # Stale and fallback results arrive whole rather than field by field
+            for name, slot in slots.items():
+                if name in value:
+                    slot.markdown(to_markdown(agent, {name: value[name]}))
+
+# Market analysis form and streamed result; reruns on its own when submitted
+@isolated_fragment
+def analysis_request_panel():
+    with st.container(border=True):
+        st.subheader("📝 Analysis Request")
+
+        analysis_stream = None  # Initialize result stream
+        structured = False
+
+        with st.form("market_analysis_form"):
+            analysis_query = st.text_area(
+                "Enter your market analysis query",
+                height=150,
+                placeholder="Example: Analyze recent trends in tech stocks and how they might be affected by current interest rate policies",
+                help="Be specific about the assets, timeframes, and factors you want analyzed"
+            )
+
+            structured = st.toggle(
+                "Structured output",
+                help="Stream a validated JSON analysis and fill insights, impacts and trends as each item arrives"
+            )
+
+            submitted = st.form_submit_button("Generate Analysis", type="primary", use_container_width=True)
+
+            if submitted and analysis_query:
+                if len(analysis_query.strip()) < 10:
+                    st.warning("Please enter a more detailed query (at least 10 characters)")
+                elif structured:
+                    analysis_stream = stream_market_analysis_structured(analysis_query)
+                else:
+                    analysis_stream = stream_market_analysis(analysis_query)
+
+        # Stream the result outside the form
+        if analysis_stream and structured:
+            render_structured_stream("market_analysis", analysis_stream, "📋 Analysis Results")
+        elif analysis_stream:
+            with st.container(border=True):
+                st.subheader("📋 Analysis Results")
+                st.write_stream(analysis_stream)
+
+# Batch analysis form and job status
+@isolated_fragment
+def batch_analysis_panel():
+    with st.container(border=True):
+        st.subheader("🗂️ Batch Analysis")
+
+        with st.form("batch_analysis_form"):
+            batch_queries = st.text_area(
+                "Enter one market analysis query per line",
+                height=120,
+                placeholder="Analyze the outlook for European bank stocks\nAssess the impact of oil price moves on airlines",
+            )
+            batch_submitted = st.form_submit_button("Queue Batch Analysis", use_container_width=True)
+
+            if batch_submitted:
+                queries = [q.strip() for q in batch_queries.splitlines() if len(q.strip()) >= 10]
+                if not queries:
+                    st.warning("Please enter at least one query of 10 or more characters")
+                else:
+                    submit_job("batch_analysis", {"queries": queries}, title=f"Batch analysis ({len(queries)} queries)")
+                    st.success("Batch analysis queued.")
+
+        job_status_panel("batch_analysis")
+
 def market_analysis_page():
     st.title("🔍 Market Analysis Agent")
     st.markdown("Analyze financial trends and news with AI-powered insights")
@@ -311,33 +707,7 @@ def market_analysis_page():
     col1, col2 = st.columns([3, 1])
     
     with col1:
-        with st.container(border=True):
-            st.subheader("📝 Analysis Request")
-            
-            analysis_result = None  # Initialize result variable
-            
-            with st.form("market_analysis_form"):
-                analysis_query = st.text_area(
-                    "Enter your market analysis query",
-                    height=150,
-                    placeholder="Example: Analyze recent trends in tech stocks and how they might be affected by current interest rate policies",
-                    help="Be specific about the assets, timeframes, and factors you want analyzed"
-                )
-                
-                submitted = st.form_submit_button("Generate Analysis", type="primary", use_container_width=True)
-                
-                if submitted and analysis_query:
-                    if len(analysis_query.strip()) < 10:
-                        st.warning("Please enter a more detailed query (at least 10 characters)")
-                    else:
-                        with st.spinner("Generating market analysis..."):
-                            analysis_result = market_analysis_agent(analysis_query)
-            
-            # Display the result outside the form
-            if analysis_result:
-                with st.container(border=True):
-                    st.subheader("📋 Analysis Results")
-                    st.markdown(analysis_result)
+        analysis_request_panel()
     
     with col2:
         with st.container(border=True):
@@ -357,36 +727,125 @@ def market_analysis_page():
             st.write(f"📈 5-day change: {((market_data['S&P500'].iloc[-1] - market_data['S&P500'].iloc[-5]) / market_data['S&P500'].iloc[-5] * 100):.2f}%")
             st.write(f"📉 30-day change: {((market_data['S&P500'].iloc[-1] - market_data['S&P500'].iloc[-30]) / market_data['S&P500'].iloc[-30] * 100):.2f}%")
 
+    # Batch analysis
+    batch_analysis_panel()
+
     # Market visualizations
     with st.container(border=True):
         st.subheader("📊 Market Visualizations")
+
+        if st.session_state.get("live_mode"):
+            live_market_visualizations()
+        else:
+            market_data = load_market_data()
+            tab1, tab2, tab3 = st.tabs(["Index Performance", "Volatility", "Correlation"])
         
-        market_data = load_market_data()
-        tab1, tab2, tab3 = st.tabs(["Index Performance", "Volatility", "Correlation"])
-        
-        with tab1:
-            fig = px.line(market_data[-90:], x=market_data[-90:].index, y=['S&P500', 'NASDAQ', 'DJIA'],
-                          labels={'value': 'Index Value', 'variable': 'Index'},
-                          color_discrete_sequence=[COLOR_PRIMARY, COLOR_SECONDARY, COLOR_ACCENT])
-            fig.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)')
-            st.plotly_chart(fig, use_container_width=True)
+            with tab1:
+                fig = px.line(market_data[-90:], x=market_data[-90:].index, y=['S&P500', 'NASDAQ', 'DJIA'],
+                              labels={'value': 'Index Value', 'variable': 'Index'},
+                              color_discrete_sequence=[COLOR_PRIMARY, COLOR_SECONDARY, COLOR_ACCENT])
+                fig.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)')
+                st.plotly_chart(fig, use_container_width=True)
             
-        with tab2:
-            fig = px.line(market_data[-90:], x=market_data[-90:].index, y='Volatility',
-                          labels={'value': 'Volatility Index', 'variable': 'Volatility'},
-                          color_discrete_sequence=[COLOR_PRIMARY])
-            fig.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)')
-            st.plotly_chart(fig, use_container_width=True)
+            with tab2:
+                fig = px.line(market_data[-90:], x=market_data[-90:].index, y='Volatility',
+                              labels={'value': 'Volatility Index', 'variable': 'Volatility'},
+                              color_discrete_sequence=[COLOR_PRIMARY])
+                fig.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)')
+                st.plotly_chart(fig, use_container_width=True)
             
-        with tab3:
-            corr = market_data[['S&P500', 'NASDAQ', 'DJIA']].corr()
-            fig = px.imshow(corr, text_auto=True, color_continuous_scale='Blues')
-            st.plotly_chart(fig, use_container_width=True)
+            with tab3:
+                corr = market_data[['S&P500', 'NASDAQ', 'DJIA']].corr()
+                fig = px.imshow(corr, text_auto=True, color_continuous_scale='Blues')
+                st.plotly_chart(fig, use_container_width=True)
 
-def risk_scoring_page():
-    st.title("📉 Risk Scoring Agent")
-    st.markdown("Assess transaction and investment risks with AI-powered analysis")
+def risk_gauge(risk_score):
+    fig = go.Figure(go.Indicator(
+        mode = "gauge+number",
+        value = risk_score,
+        domain = {'x': [0, 1], 'y': [0, 1]},
+        title = {'text': "Risk Score"},
+        gauge = {
+            'axis': {'range': [None, 100]},
+            'steps': [
+                {'range': [0, 40], 'color': COLOR_SUCCESS},
+                {'range': [40, 70], 'color': COLOR_WARNING},
+                {'range': [70, 100], 'color': COLOR_DANGER}],
+            'threshold': {
+                'line': {'color': "black", 'width': 4},
+                'thickness': 0.75,
+                'value': risk_score}
+        }
+    ))
     
+    fig.update_layout(height=250)
+    return fig
+
+def local_structured_risk(asset_type):
+    """
+    Factor model result in the risk_scoring output schema, served while the AI service is degraded.
+    """
+    risk_score = max(asset_risk_score(asset_type), 1)
+    profile = asset_risk_profile(asset_type)
+    return {
+        "risk_score": risk_score,
+        "risk_level": risk_level(risk_score),
+        "risk_factors": [
+            {"factor": factor_label(f), "impact": risk_level(profile[f]), "detail": f"Factor score {profile[f]:.0f}/100"}
+            for f in FACTOR_WEIGHTS
+        ] if profile is not None else [],
+        "recommendations": [f"{recommended_action(risk_score)} {asset_type} exposure"],
+    }
+
+def stream_structured_assessment(asset_type, risk_query):
+    """
+    Render the structured risk assessment field by field as the agent streams it: the assessed
+    score as soon as it completes, risk factors and recommendations item by item. The gauge keeps
+    the factor-model score; an assessed score that disagrees with it is flagged, not shown as the score.
+    """
+    baseline = asset_risk_score(asset_type) if asset_risk_profile(asset_type) is not None else None
+    with st.container(border=True):
+        st.subheader("📋 Risk Assessment Results")
+        notice_slot = st.empty()
+        score_slot = st.empty()
+        st.markdown("**Risk Factors:**")
+        factors_slot = st.empty()
+        st.markdown("**Recommendations:**")
+        recommendations_slot = st.empty()
+        details_slot = st.empty()
+    
+    factors, recommendations = [], []
+    for path, value in stream_risk_scoring_structured(
+        asset_type, risk_query,
+        fallback=lambda: local_structured_risk(asset_type),
+        risk_profile=risk_profile_summary(asset_type)
+    ):
+        if path == NOTICE_PATH:
+            notice_slot.markdown(value)
+        elif path == ("risk_score",):
+            if baseline is None or value == baseline:
+                score_slot.markdown(f"**Assessed Risk Score:** {value}/100")
+            else:
+                score_slot.warning(
+                    f"The assessment scored {value}/100, which differs from the factor-model score of "
+                    f"{baseline}/100 ({risk_level(baseline)}). The risk profile keeps the factor-model score."
+                )
+        elif len(path) == 2 and path[0] == "risk_factors":
+            factors.append(value)
+            factors_slot.markdown("\n".join(
+                f"- **{f['factor']}** ({f['impact']})" + (f": {f['detail']}" if f.get('detail') else "") for f in factors
+            ))
+        elif len(path) == 2 and path[0] == "recommendations":
+            recommendations.append(value)
+            recommendations_slot.markdown("\n".join(f"- {r}" for r in recommendations))
+        elif path == ():
+            remaining = {k: v for k, v in value.items() if k in ("market_conditions", "outlook")}
+            if remaining:
+                details_slot.markdown(to_markdown("risk_scoring", remaining))
+
+# Risk assessment form and the selected asset's gauge; reruns on its own
+@isolated_fragment
+def risk_assessment_panel():
     # Main content
     col1, col2 = st.columns([3, 1])
     
@@ -394,11 +853,9 @@ def risk_scoring_page():
         with st.container(border=True):
             st.subheader("📝 Risk Assessment")
             
-            risk_result = None  # Initialize result variable
-            
             with st.form("risk_scoring_form"):
-                asset_options = ['Equities', 'Bonds', 'Real Estate', 'Commodities', 'Cryptocurrency', 
-                                 'Derivatives', 'Foreign Exchange', 'Private Equity']
+                # Asset types are the universe's asset classes, so every choice has a baseline score
+                asset_options = list(ASSET_CLASSES)
                 asset_type = st.selectbox("Select Asset Type", asset_options)
                 
                 risk_query = st.text_area(
@@ -408,70 +865,322 @@ def risk_scoring_page():
                     help="Describe the specific investment or transaction you want assessed"
                 )
                 
+                structured = st.toggle(
+                    "Structured output", value=True,
+                    help="Stream a validated JSON assessment and fill the score, factors and recommendations as each field arrives"
+                )
+                
                 submitted = st.form_submit_button("Assess Risk", type="primary", use_container_width=True)
                 
+                valid_query = False
                 if submitted and risk_query:
                     if len(risk_query.strip()) < 10:
                         st.warning("Please enter a more detailed query (at least 10 characters)")
                     else:
-                        with st.spinner("Generating risk assessment..."):
-                            risk_result = risk_scoring_agent(asset_type, risk_query)
+                        valid_query = True
             
-            # Display the result outside the form
-            if risk_result:
-                with st.container(border=True):
-                    st.subheader("📋 Risk Assessment Results")
-                    st.markdown(risk_result)
+            # Results are rendered below the form
+            results = st.container()
     
     with col2:
         with st.container(border=True):
             st.subheader("📊 Risk Profile")
             
-            risk_data = load_risk_data()
-            selected_asset_idx = min(asset_options.index(asset_type) if asset_type in asset_options else 0, len(risk_data) - 1)
+            profile = asset_risk_profile(asset_type)
             
-            if selected_asset_idx < len(risk_data):
-                risk_score = risk_data.iloc[selected_asset_idx]['Risk_Score']
-                
-                fig = go.Figure(go.Indicator(
-                    mode = "gauge+number",
-                    value = risk_score,
-                    domain = {'x': [0, 1], 'y': [0, 1]},
-                    title = {'text': "Risk Score"},
-                    gauge = {
-                        'axis': {'range': [None, 100]},
-                        'steps': [
-                            {'range': [0, 40], 'color': COLOR_SUCCESS},
-                            {'range': [40, 70], 'color': COLOR_WARNING},
-                            {'range': [70, 100], 'color': COLOR_DANGER}],
-                        'threshold': {
-                            'line': {'color': "black", 'width': 4},
-                            'thickness': 0.75,
-                            'value': risk_score}
-                    }
-                ))
+            if profile is not None:
+                risk_score = asset_risk_score(asset_type)
+                st.plotly_chart(risk_gauge(risk_score), use_container_width=True)
+                st.write(f"**Risk Level:** {risk_level(risk_score)}")
+                st.write(f"**Recommended Action:** {recommended_action(risk_score)}")
                 
-                fig.update_layout(height=250)
-                st.plotly_chart(fig, use_container_width=True)
-                
-                st.write(f"**Risk Level:** {'Low' if risk_score < 40 else 'Medium' if risk_score < 70 else 'High'}")
-                st.write(f"**Recommended Action:** {'Monitor' if risk_score < 40 else 'Review' if risk_score < 70 else 'Mitigate'}")
+                # Factor breakdown behind the baseline score
+                for factor in FACTOR_WEIGHTS:
+                    st.caption(f"{factor_label(factor)}: {profile[factor]:.0f}/100")
+                    st.progress(min(float(profile[factor]) / 100, 1.0))
+    
+    if valid_query:
+        with results:
+            if structured:
+                stream_structured_assessment(asset_type, risk_query)
+            else:
+                with st.spinner("Generating risk assessment..."):
+                    risk_result = risk_scoring_agent(
+                        asset_type, risk_query,
+                        fallback=lambda: local_risk_assessment(asset_type),
+                        risk_profile=risk_profile_summary(asset_type)
+                    )
+                if risk_result:
+                    with st.container(border=True):
+                        st.subheader("📋 Risk Assessment Results")
+                        st.markdown(risk_result)
 
-    # Risk data visualization
+# Look up one instrument's factor scores by ID
+@isolated_fragment
+def instrument_lookup_panel():
     with st.container(border=True):
-        st.subheader("📈 Asset Risk Overview")
+        st.subheader("🔎 Instrument Lookup")
         
-        risk_data = load_risk_data()
-        fig = px.scatter(risk_data, x='Risk_Score', y='Return_Potential', 
-                         size='Current_Exposure', color='Asset',
-                         hover_name='Asset', size_max=30,
-                         labels={'Risk_Score': 'Risk Score', 'Return_Potential': 'Return Potential'},
-                         color_discrete_sequence=px.colors.qualitative.Pastel)
+        universe = load_instrument_universe()
+        if universe.empty:
+            st.info("Instrument universe is not available.")
+            return
         
+        instrument_id = st.number_input(
+            "Instrument ID",
+            min_value=int(universe.index.min()),
+            max_value=int(universe.index.max()),
+            value=int(universe.index.min()),
+            step=1,
+        )
+        if instrument_id not in universe.index:
+            st.warning(f"No instrument with ID {instrument_id}")
+            return
+        
+        instrument = universe.loc[instrument_id]
+        risk_score = int(round(instrument['Risk_Score']))
+        col_a, col_b, col_c = st.columns(3)
+        col_a.metric("Asset Class", instrument['Asset_Class'])
+        col_b.metric("Risk Score", f"{risk_score}/100")
+        col_c.metric("Risk Level", risk_level(risk_score))
+        st.dataframe(
+            pd.DataFrame({
+                'Factor': [factor_label(f) for f in FACTOR_WEIGHTS],
+                'Score': [round(float(instrument[f]), 1) for f in FACTOR_WEIGHTS],
+                'Weight': list(FACTOR_WEIGHTS.values()),
+            }),
+            use_container_width=True, hide_index=True
+        )
+
+# What-if model for the current session, rebuilt when the risk data changes (the source version
+# only moves on a real content change). Exposures the user edited carry over to the new model;
+# untouched sliders follow the new data.
+def whatif_model(risk_data):
+    version = load_risk_data.source.version
+    if st.session_state.get("whatif_version") != version:
+        model = IncrementalRiskModel.from_assets(risk_data)
+        previous = st.session_state.get("whatif_model")
+        edited = st.session_state.get("whatif_edited", set()) & set(model.groups)
+        for asset in (set(model.groups) | set(previous.groups if previous else ())) - edited:
+            st.session_state.pop(f"whatif_{asset}", None)
+        st.session_state.whatif_model = model
+        st.session_state.whatif_version = version
+        st.session_state.whatif_edited = edited
+        st.session_state.whatif_pending = {
+            asset: st.session_state[f"whatif_{asset}"] for asset in edited if f"whatif_{asset}" in st.session_state
+        }
+    return st.session_state.whatif_model
+
+# Slider callbacks only queue the new value; events arriving before the panel reruns are
+# coalesced and applied to the model in one batch
+def queue_exposure_change(asset):
+    st.session_state.whatif_pending[asset] = st.session_state[f"whatif_{asset}"]
+    st.session_state.whatif_edited.add(asset)
+
+def reset_exposures(risk_data):
+    for asset, exposure in zip(risk_data['Asset'], risk_data['Current_Exposure']):
+        st.session_state[f"whatif_{asset}"] = int(exposure)
+        st.session_state.whatif_pending[asset] = int(exposure)
+    st.session_state.whatif_edited = set()
+
+def exposure_charts(risk_data, exposures):
+    chart_data = risk_data.assign(Exposure=risk_data['Asset'].astype(str).map(exposures))
+    col1, col2 = st.columns(2)
+    with col1:
+        bars = chart_data.melt(id_vars='Asset', value_vars=['Current_Exposure', 'Exposure'],
+                               var_name='Scenario', value_name='Exposure (%)')
+        bars['Scenario'] = bars['Scenario'].map({'Current_Exposure': 'Current', 'Exposure': 'What-if'})
+        fig = px.bar(bars, x='Asset', y='Exposure (%)', color='Scenario', barmode='group',
+                     color_discrete_sequence=[COLOR_SECONDARY, COLOR_PRIMARY])
         fig.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)')
         st.plotly_chart(fig, use_container_width=True)
+    with col2:
+        fig = px.scatter(chart_data, x='Risk_Score', y='Return_Potential',
+                         size=chart_data['Exposure'].clip(lower=0.1), color='Asset_Class',
+                         hover_name='Asset', size_max=30,
+                         labels={'Risk_Score': 'Risk Score', 'Return_Potential': 'Return Potential',
+                                 'Asset_Class': 'Asset Class'},
+                         color_discrete_sequence=px.colors.qualitative.Pastel)
+        fig.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', showlegend=False)
+        st.plotly_chart(fig, use_container_width=True)
+
+# Exposure sliders with portfolio risk recomputed incrementally; moving a slider only reruns this panel
+@isolated_fragment
+def asset_risk_overview_panel():
+    with st.container(border=True):
+        st.subheader("📈 Asset Risk Overview")
+        
+        risk_data = load_risk_data()
+        st.caption("Portfolio positions, scored with the factor-model risk score of their asset class.")
+        if not st.toggle("🎛️ What-if mode", key="whatif_mode", help="Edit exposures and see portfolio risk update"):
+            fig = px.scatter(risk_data, x='Risk_Score', y='Return_Potential', 
+                             size='Current_Exposure', color='Asset_Class',
+                             hover_name='Asset', size_max=30,
+                             labels={'Risk_Score': 'Risk Score', 'Return_Potential': 'Return Potential',
+                                     'Asset_Class': 'Asset Class'},
+                             color_discrete_sequence=px.colors.qualitative.Pastel)
+            
+            fig.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)')
+            st.plotly_chart(fig, use_container_width=True)
+            
+            st.dataframe(risk_data, use_container_width=True, hide_index=True)
+            return
+        
+        model = whatif_model(risk_data)
+        columns = st.columns(3)
+        for i, (asset, exposure) in enumerate(zip(risk_data['Asset'], risk_data['Current_Exposure'])):
+            with columns[i % 3]:
+                st.slider(f"{asset} (%)", min_value=0, max_value=100, value=int(exposure), step=1,
+                          key=f"whatif_{asset}", on_change=queue_exposure_change, args=(asset,))
+        st.button("Reset exposures", on_click=reset_exposures, args=(risk_data,))
+        
+        pending, st.session_state.whatif_pending = st.session_state.whatif_pending, {}
+        if pending:
+            model.update(pending)
+        
+        metrics, baseline = model.metrics(), model.baseline
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Portfolio Risk Score", f"{metrics['risk_score']:.1f}",
+                    f"{metrics['risk_score'] - baseline['risk_score']:+.1f}", delta_color="inverse")
+        col2.metric("Concentration (HHI)", f"{metrics['concentration']:,.0f}",
+                    f"{metrics['concentration'] - baseline['concentration']:+,.0f}", delta_color="inverse")
+        col3.metric(f"Projected Loss ({WHATIF_HORIZON_DAYS}d 99%)", f"{metrics['projected_loss']:.2f}%",
+                    f"{metrics['projected_loss'] - baseline['projected_loss']:+.2f}%", delta_color="inverse")
+        col4.metric("Total Exposure", f"{metrics['exposure']:.0f}%",
+                    f"{metrics['exposure'] - baseline['exposure']:+.0f}%", delta_color="off")
         
-        st.dataframe(risk_data, use_container_width=True, hide_index=True)
+        exposure_charts(risk_data, model.exposures())
+        st.caption("Projected loss is a parametric VaR as a percentage of the current book.")
+
+def risk_scoring_page():
+    st.title("📉 Risk Scoring Agent")
+    st.markdown("Assess transaction and investment risks with AI-powered analysis")
+    
+    # Assessment form and gauge
+    risk_assessment_panel()
+
+    # Risk data visualization, editable in what-if mode
+    asset_risk_overview_panel()
+
+    # Factor model baseline per asset class
+    with st.container(border=True):
+        st.subheader("🧮 Factor Risk by Asset Class")
+        
+        class_risk = load_asset_class_risk()
+        if not class_risk.empty:
+            factor_data = class_risk.melt(id_vars='Asset', value_vars=list(FACTOR_WEIGHTS), var_name='Factor', value_name='Score')
+            factor_data['Factor'] = factor_data['Factor'].map(factor_label)
+            fig = px.bar(factor_data, x='Asset', y='Score', color='Factor', barmode='group',
+                         labels={'Score': 'Factor Score'},
+                         color_discrete_sequence=px.colors.qualitative.Pastel)
+            fig.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)')
+            st.plotly_chart(fig, use_container_width=True)
+            
+            st.dataframe(class_risk, use_container_width=True, hide_index=True)
+            st.caption(f"Exposure-weighted over {int(class_risk['Instruments'].sum()):,} instruments")
+    
+    instrument_lookup_panel()
+
+# Selected project details, risk assessment and status analysis; reruns on its own
+@isolated_fragment
+def project_detail_panel(project_data):
+    with st.container(border=True):
+        st.subheader("📋 Project Overview")
+
+        selected_project = st.selectbox(
+            "Select Project",
+            options=project_data['Project_Name'].tolist(),
+            key="project_select"
+        )
+
+        project_info = project_data[project_data['Project_Name'] == selected_project].iloc[0]
+
+        # Project details
+        col_a, col_b = st.columns(2)
+        with col_a:
+            st.metric("Progress", f"{project_info['Progress']}%")
+            st.progress(project_info['Progress']/100)
+
+        with col_b:
+            days_remaining = (project_info['Due_Date'] - datetime.now()).days
+            st.metric("Days Remaining", days_remaining)
+
+        # Timeline visualization
+        start = project_info['Start_Date']
+        end = project_info['Due_Date']
+        today = pd.Timestamp(datetime.now().date())
+
+        total_days = (end - start).days
+        elapsed_days = (today - start).days
+
+        timeline_progress = min(max(elapsed_days / total_days, 0), 1)
+
+        fig = go.Figure(go.Indicator(
+            mode = "gauge+number",
+            value = timeline_progress * 100,
+            domain = {'x': [0, 1], 'y': [0, 1]},
+            title = {'text': "Timeline Progress"},
+            gauge = {
+                'axis': {'range': [None, 100]},
+                'steps': [
+                    {'range': [0, 33], 'color': COLOR_DANGER},
+                    {'range': [33, 66], 'color': COLOR_WARNING},
+                    {'range': [66, 100], 'color': COLOR_SUCCESS}],
+                'threshold': {
+                    'line': {'color': "black", 'width': 4},
+                    'thickness': 0.75,
+                    'value': timeline_progress * 100}
+            }
+        ))
+
+        fig.update_layout(height=200)
+        st.plotly_chart(fig, use_container_width=True)
+
+        # Risk assessment
+        st.subheader("⚠️ Risk Assessment")
+
+        risk_cols = st.columns(3)
+        with risk_cols[0]:
+            resource_risk = project_info['Resource_Risk']
+            color = COLOR_SUCCESS if resource_risk == "Low" else COLOR_WARNING if resource_risk == "Medium" else COLOR_DANGER
+            st.markdown(f"**Resource Risk:** <span style='color:{color}'>{resource_risk}</span>", unsafe_allow_html=True)
+
+        with risk_cols[1]:
+            schedule_risk = project_info['Schedule_Risk']
+            color = COLOR_SUCCESS if schedule_risk == "Low" else COLOR_WARNING if schedule_risk == "Medium" else COLOR_DANGER
+            st.markdown(f"**Schedule Risk:** <span style='color:{color}'>{schedule_risk}</span>", unsafe_allow_html=True)
+
+        with risk_cols[2]:
+            budget_risk = project_info['Budget_Risk']
+            color = COLOR_SUCCESS if budget_risk == "Low" else COLOR_WARNING if budget_risk == "Medium" else COLOR_DANGER
+            st.markdown(f"**Budget Risk:** <span style='color:{color}'>{budget_risk}</span>", unsafe_allow_html=True)
+
+        # Status analysis
+        with st.form("project_status_form"):
+            context = st.text_area(
+                "Enter additional context for project analysis",
+                height=100,
+                placeholder="Example: The project team has reported potential delays in the integration phase due to vendor API changes"
+            )
+
+            structured = st.toggle(
+                "Structured output",
+                help="Stream a validated JSON status and fill health, risks and recommendations as each field arrives"
+            )
+
+            submitted = st.form_submit_button("Analyze Project Status", type="primary", use_container_width=True)
+
+            if submitted and structured:
+                render_structured_stream(
+                    "project_status", stream_project_status_structured(selected_project, context), "📋 Status Analysis"
+                )
+            elif submitted:
+                with st.spinner("Analyzing project status..."):
+                    status_result = project_status_agent(selected_project, context)
+                    if status_result:
+                        with st.container(border=True):
+                            st.subheader("📋 Status Analysis")
+                            st.markdown(status_result)
 
 def project_status_page():
     st.title("📅 Project Status Agent")
@@ -484,94 +1193,7 @@ def project_status_page():
     col1, col2 = st.columns([3, 1])
     
     with col1:
-        with st.container(border=True):
-            st.subheader("📋 Project Overview")
-            
-            selected_project = st.selectbox(
-                "Select Project",
-                options=project_data['Project_Name'].tolist(),
-                key="project_select"
-            )
-            
-            project_info = project_data[project_data['Project_Name'] == selected_project].iloc[0]
-            
-            # Project details
-            col_a, col_b = st.columns(2)
-            with col_a:
-                st.metric("Progress", f"{project_info['Progress']}%")
-                st.progress(project_info['Progress']/100)
-                
-            with col_b:
-                days_remaining = (project_info['Due_Date'] - datetime.now()).days
-                st.metric("Days Remaining", days_remaining)
-            
-            # Timeline visualization
-            start = project_info['Start_Date']
-            end = project_info['Due_Date']
-            today = pd.Timestamp(datetime.now().date())
-            
-            total_days = (end - start).days
-            elapsed_days = (today - start).days
-            
-            timeline_progress = min(max(elapsed_days / total_days, 0), 1)
-            
-            fig = go.Figure(go.Indicator(
-                mode = "gauge+number",
-                value = timeline_progress * 100,
-                domain = {'x': [0, 1], 'y': [0, 1]},
-                title = {'text': "Timeline Progress"},
-                gauge = {
-                    'axis': {'range': [None, 100]},
-                    'steps': [
-                        {'range': [0, 33], 'color': COLOR_DANGER},
-                        {'range': [33, 66], 'color': COLOR_WARNING},
-                        {'range': [66, 100], 'color': COLOR_SUCCESS}],
-                    'threshold': {
-                        'line': {'color': "black", 'width': 4},
-                        'thickness': 0.75,
-                        'value': timeline_progress * 100}
-                }
-            ))
-            
-            fig.update_layout(height=200)
-            st.plotly_chart(fig, use_container_width=True)
-            
-            # Risk assessment
-            st.subheader("⚠️ Risk Assessment")
-            
-            risk_cols = st.columns(3)
-            with risk_cols[0]:
-                resource_risk = project_info['Resource_Risk']
-                color = COLOR_SUCCESS if resource_risk == "Low" else COLOR_WARNING if resource_risk == "Medium" else COLOR_DANGER
-                st.markdown(f"**Resource Risk:** <span style='color:{color}'>{resource_risk}</span>", unsafe_allow_html=True)
-                
-            with risk_cols[1]:
-                schedule_risk = project_info['Schedule_Risk']
-                color = COLOR_SUCCESS if schedule_risk == "Low" else COLOR_WARNING if schedule_risk == "Medium" else COLOR_DANGER
-                st.markdown(f"**Schedule Risk:** <span style='color:{color}'>{schedule_risk}</span>", unsafe_allow_html=True)
-                
-            with risk_cols[2]:
-                budget_risk = project_info['Budget_Risk']
-                color = COLOR_SUCCESS if budget_risk == "Low" else COLOR_WARNING if budget_risk == "Medium" else COLOR_DANGER
-                st.markdown(f"**Budget Risk:** <span style='color:{color}'>{budget_risk}</span>", unsafe_allow_html=True)
-            
-            # Status analysis
-            with st.form("project_status_form"):
-                context = st.text_area(
-                    "Enter additional context for project analysis",
-                    height=100,
-                    placeholder="Example: The project team has reported potential delays in the integration phase due to vendor API changes"
-                )
-                
-                submitted = st.form_submit_button("Analyze Project Status", type="primary", use_container_width=True)
-                
-                if submitted:
-                    with st.spinner("Analyzing project status..."):
-                        status_result = project_status_agent(selected_project, context)
-                        if status_result:
-                            with st.container(border=True):
-                                st.subheader("📋 Status Analysis")
-                                st.markdown(status_result)
+        project_detail_panel(project_data)
     
     with col2:
         with st.container(border=True):
@@ -610,11 +1232,9 @@ def project_status_page():
         fig.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)')
         st.plotly_chart(fig, use_container_width=True)
 
-def reporting_page():
-    st.title("📑 Risk Reporting Agent")
-    st.markdown("Generate detailed risk analytics and alerts with AI-powered reporting")
-    
-    # Report generation
+# Report generator form
+@isolated_fragment
+def report_generator_panel():
     with st.container(border=True):
         st.subheader("📝 Report Generator")
         
@@ -648,17 +1268,25 @@ def reporting_page():
                     help="Add any specific requirements for the report"
                 )
             
+            structured = st.toggle(
+                "Structured summary now",
+                help="Stream a validated JSON summary right away instead of queuing the full report over the attached datasets"
+            )
+            
             submitted = st.form_submit_button("Generate Report", type="primary", use_container_width=True)
             
-            if submitted:
-                with st.spinner("Generating risk report..."):
-                    report_result = reporting_agent(report_type, timeframe, details)
-                    if report_result:
-                        with st.container(border=True):
-                            st.subheader("📋 Generated Report")
-                            st.markdown(report_result)
-    
-    # Historical alerts
+            if submitted and structured:
+                render_structured_stream(
+                    "reporting", stream_reporting_structured(report_type, timeframe, details), "📋 Report Summary"
+                )
+            elif submitted:
+                submit_job("report", {"report_type": report_type, "timeframe": timeframe, "details": details},
+                           title=f"{report_type} ({timeframe})")
+                st.success("Report queued. It will appear below when ready; you can leave this page meanwhile.")
+
+# Filterable alert list; changing a filter only reruns this panel
+@isolated_fragment
+def historical_alerts_panel():
     with st.container(border=True):
         st.subheader("⚠️ Historical Risk Alerts")
         
@@ -705,58 +1333,109 @@ def reporting_page():
         else:
             st.info("No alerts match the selected filters.")
 
+def reporting_page():
+    st.title("📑 Risk Reporting Agent")
+    st.markdown("Generate detailed risk analytics and alerts with AI-powered reporting")
+    
+    # Report generation
+    report_generator_panel()
+
+    # Report jobs
+    with st.container(border=True):
+        st.subheader("📋 Generated Reports")
+        job_status_panel("report")
+
+        with st.expander("Stored reports"):
+            for job in job_queue.list_jobs(kind="report", status=STATUS_DONE, limit=10):
+                render_job(job, "stored")
+    
+    # Historical alerts
+    historical_alerts_panel()
+
 def manual_crew_ai_agent(query, asset_type=None, project_name=None, report_type=None, timeframe=None, details=None):
     """
-    Manually orchestrates the data flow between agents and combines their outputs into a unified response.
+    Orchestrates the agents as a dependency graph and combines their outputs into a unified response.
+    Market analysis streams into risk scoring, which starts once enough of the analysis is available;
+    project status runs concurrently, and the report sees all three upstream results.
     :param query: General query for market analysis or risk scoring
     :param asset_type: Asset type for risk scoring
     :param project_name: Project name for project status
     :param report_type: Type of report for reporting agent
     :param timeframe: Timeframe for the report
     :param details: Additional details for reporting or analysis
-    :return: Unified response from all agents
+    :return: Unified response from all agents and the pipeline result with per-agent timings
     """
     try:
-        st.info("Manually coordinating the agents...")
+        st.info("Coordinating the agents...")
 
-        # Call Market Analysis Agent
-        market_analysis = market_analysis_agent(query) if query else "No market analysis query provided."
+        # Worker threads have no Streamlit script context, so agents raise their errors
+        # to the pipeline, which records them per node for the page to show
+        def market_node(inputs):
+            return stream_market_analysis(query, raise_errors=True) if query else iter(["No market analysis query provided."])
 
-        # Call Risk Scoring Agent
-        risk_scoring = risk_scoring_agent(asset_type, query) if asset_type and query else "No risk scoring query provided."
+        def risk_node(inputs):
+            if not (asset_type and query):
+                return "No risk scoring query provided."
+            return risk_scoring_agent(
+                asset_type, query,
+                fallback=lambda: local_risk_assessment(asset_type),
+                market_context=inputs["market"],
+                risk_profile=risk_profile_summary(asset_type),
+                raise_errors=True,
+            )
 
-        # Call Project Status Agent
-        project_status = project_status_agent(project_name, query) if project_name and query else "No project status query provided."
+        def project_node(inputs):
+            if not (project_name and query):
+                return "No project status query provided."
+            return project_status_agent(project_name, query, raise_errors=True)
 
-        # Call Reporting Agent
-        reporting = reporting_agent(report_type, timeframe, details) if report_type and timeframe else "No reporting query provided."
+        def report_node(inputs):
+            if not (report_type and timeframe):
+                return "No reporting query provided."
+            upstream = "\n\n".join(
+                f"{title}:\n{inputs[name]}" for name, title in
+                [("market", "MARKET ANALYSIS"), ("risk", "RISK SCORING"), ("project", "PROJECT STATUS")]
+                if inputs[name]
+            )
+            return reporting_agent(report_type, timeframe, f"{details}\n\nUPSTREAM FINDINGS:\n{upstream}", raise_errors=True)
+
+        pipeline = Pipeline([
+            Node("market", market_node, stream=True),
+            Node("risk", risk_node, partial_deps={"market": RISK_CONTEXT_CHARS}),
+            Node("project", project_node),
+            Node("report", report_node, deps=["market", "risk", "project"]),
+        ])
+        result = pipeline.run()
+
+        def section(name, empty):
+            if name in result.errors:
+                return f"⚠️ {PIPELINE_LABELS[name]} failed: {result.errors[name]}"
+            return result.outputs[name] or empty
 
         # Combine results
         combined_response = f"""
-        ### Unified Response:
-        #### Market Analysis:
-        {market_analysis}
+### Unified Response:
+#### Market Analysis:
+{section("market", "No market analysis generated.")}
 
-        #### Risk Scoring:
-        {risk_scoring}
+#### Risk Scoring:
+{section("risk", "No risk assessment generated.")}
 
-        #### Project Status:
-        {project_status}
+#### Project Status:
+{section("project", "No project status generated.")}
 
-        #### Reporting:
-        {reporting}
-        """
-        return combined_response.strip() or "No valid responses generated by the agents."
+#### Reporting:
+{section("report", "No report generated.")}
+"""
+        return combined_response.strip() or "No valid responses generated by the agents.", result
 
     except Exception as e:
-        st.error(f"Error in manual coordination: {str(e)}")
-        return "An error occurred while processing your request. Please try again."
+        st.error(f"Error in agent coordination: {str(e)}")
+        return "An error occurred while processing your request. Please try again.", None
 
-def crew_ai_page():
-    st.title("🤝 Cliques AI Chatbot")
-    st.markdown("Collaborate with all agents through a unified chatbot interface.")
-
-    # Input fields for the chatbot
+# Chatbot form and unified response
+@isolated_fragment
+def crew_ai_panel():
     with st.form("crew_ai_form"):
         query = st.text_area(
             "Enter your query",
@@ -765,7 +1444,7 @@ def crew_ai_page():
         )
         asset_type = st.selectbox(
             "Select Asset Type (optional)",
-            options=["Equities", "Bonds", "Real Estate", "Commodities", "Cryptocurrency", "Derivatives", "Foreign Exchange", "Private Equity"],
+            options=list(ASSET_CLASSES),
             index=0,
         )
         project_name = st.text_input("Project Name (optional)", placeholder="Example: Market Expansion")
@@ -789,17 +1468,106 @@ def crew_ai_page():
 
         if submitted:
             with st.spinner("Processing your query..."):
-                response = manual_crew_ai_agent(query, asset_type, project_name, report_type, timeframe, details)
+                response, pipeline_result = manual_crew_ai_agent(query, asset_type, project_name, report_type, timeframe, details)
                 if response:
                     st.subheader("📋 Unified Response")
                     st.markdown(response)
                 else:
                     st.error("No response received. Please check your query or try again.")
 
+                if pipeline_result:
+                    for name, error in pipeline_result.errors.items():
+                        st.error(f"{PIPELINE_LABELS[name]} failed: {error}")
+                    with st.expander("⏱️ Agent Timings"):
+                        st.dataframe(pd.DataFrame(pipeline_result.timing_rows()), use_container_width=True, hide_index=True)
+                        st.caption(f"Critical path: {' → '.join(pipeline_result.critical_path())}")
+
+def crew_ai_page():
+    st.title("🤝 Cliques AI Chatbot")
+    st.markdown("Collaborate with all agents through a unified chatbot interface.")
+
+    # Input fields for the chatbot
+    crew_ai_panel()
+
+
+# Archived result opened for reuse, served from the archive without a new LLM call
+def render_archived_result(result):
+    created = datetime.fromtimestamp(result['created']).strftime('%Y-%m-%d %H:%M')
+    with st.container(border=True):
+        st.subheader(f"♻️ {result['title']}")
+        st.caption(f"{AGENT_LABELS.get(result['agent'], result['agent'])} · {result['model'] or 'unknown model'} · generated {created}")
+        with st.expander("Inputs"):
+            st.json(json.loads(result['inputs']))
+        st.markdown(result['content'])
+        file_name = result['title'].lower().replace(' ', '_')
+        st.download_button("Download Markdown", result['content'], file_name=f"{file_name}.md",
+                           mime="text/markdown", key=f"archive_md_{result['id']}")
+
+# Search box and ranked results; typing only reruns this panel
+@isolated_fragment
+def archive_search_panel():
+    with st.container(border=True):
+        st.subheader("🔎 Search Past Results")
+
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            text = st.text_input("Search", placeholder="Example: emerging markets liquidity", key="archive_query")
+        with col2:
+            agent = st.selectbox("Agent", options=["All"] + list(AGENT_LABELS),
+                                 format_func=lambda name: AGENT_LABELS.get(name, name), key="archive_agent")
+
+        if not text.strip():
+            st.info("Enter search terms to find previously generated analyses and reports.")
+            return
+
+        try:
+            results, elapsed_ms = result_archive.search(text, agent=None if agent == "All" else agent)
+        except sqlite3.Error as e:
+            st.error(f"Archive search failed: {str(e)}")
+            return
+
+        st.caption(f"{len(results)} result(s) in {elapsed_ms:.1f} ms")
+        for result in results:
+            created = datetime.fromtimestamp(result['created']).strftime('%Y-%m-%d %H:%M')
+            tokens = (result['prompt_tokens'] or 0) + (result['completion_tokens'] or 0)
+            with st.container(border=True):
+                col_a, col_b = st.columns([4, 1])
+                with col_a:
+                    st.markdown(f"**{result['title']}** — {AGENT_LABELS.get(result['agent'], result['agent'])}")
+                    st.markdown(result['snippet'])
+                    st.caption(f"{result['model'] or 'unknown model'} · {tokens:,} tokens · {created}")
+                with col_b:
+                    if st.button("♻️ Reuse", key=f"archive_reuse_{result['id']}", use_container_width=True):
+                        st.session_state.archive_result_id = result['id']
+
+        result_id = st.session_state.get("archive_result_id")
+        if result_id is not None:
+            result = result_archive.get(result_id)
+            if result:
+                render_archived_result(result)
+
+def archive_page():
+    st.title("📚 Results Archive")
+    st.markdown("Search every analysis, assessment and report the agents have generated and reuse it instead of regenerating.")
+
+    stats = result_archive.stats()
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Archived Results", f"{stats['results']:,}")
+    with col2:
+        st.metric("Archive Size", format_bytes(stats['bytes']))
+
+    archive_search_panel()
+
 
 # Main application logic
 def main():
+    measure("full rerun", render_app)
+    record_session(st.session_state)
+
+def render_app():
     page = sidebar()
+    label_run(f"{page} (full rerun)")
     
     if page == "Dashboard":
         dashboard()
@@ -813,6 +1581,8 @@ def main():
         reporting_page()
     elif page == "Cliques AI Chatbot":
         crew_ai_page()
+    elif page == "Results Archive":
+        archive_page()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,167 @@
+import time
+import threading
+
+import numpy as np
+
+# Market risk index: recent implied volatility against MARKET_VOLATILITY_CAP, blended with
+# the S&P 500 drawdown from its high against MARKET_DRAWDOWN_CAP
+MARKET_VOLATILITY_CAP = 30.0
+MARKET_DRAWDOWN_CAP = 0.10
+MARKET_RECENT_DAYS = 5
+
+CREDIT_ASSETS = ("EU Bonds", "Emerging Markets")
+REGULATORY_ALERTS = ("Regulatory Change", "Compliance Issue")
+LEVEL_SCORES = {"Low": 20, "Medium": 50, "High": 80}
+# Points per regulatory alert by severity; resolved alerts count for a quarter
+SEVERITY_POINTS = {"Low": 10, "Medium": 25, "High": 40}
+
+# Radar axis -> metric
+RADAR_METRICS = {
+    "Market Risk": "market_risk_index",
+    "Credit Risk": "credit_risk",
+    "Liquidity Risk": "liquidity_risk",
+    "Operational Risk": "operational_risk",
+    "Regulatory Risk": "regulatory_risk",
+}
+
+
+def _weighted(values, weights):
+    weights = np.asarray(weights, dtype=np.float64)
+    total = weights.sum()
+    return float(np.dot(np.asarray(values, dtype=np.float64), weights) / total) if total else 0.0
+
+
+def market_metrics(market):
+    recent_volatility = float(market["Volatility"].tail(MARKET_RECENT_DAYS).mean())
+    index = market["S&P500"].to_numpy(dtype=np.float64)
+    drawdown = 1 - index[-1] / index.max()
+    score = (0.7 * min(recent_volatility / MARKET_VOLATILITY_CAP, 1.0) + 0.3 * min(drawdown / MARKET_DRAWDOWN_CAP, 1.0)) * 100
+    return {"market_risk_index": round(float(score), 1)}
+
+
+def risk_metrics(risk):
+    exposure = risk["Current_Exposure"]
+    credit = risk[risk["Asset"].isin(CREDIT_ASSETS)]
+    risk_score = _weighted(risk["Risk_Score"], exposure)
+    liquidity = _weighted(risk["Liquidity"], exposure)
+    return {
+        "portfolio_health": round(((100 - risk_score) + liquidity) / 2, 1),
+        "credit_risk": round(_weighted(credit["Risk_Score"], credit["Current_Exposure"]), 1),
+        "liquidity_risk": round(100 - liquidity, 1),
+    }
+
+
+def project_metrics(projects):
+    active = projects[projects["Progress"] < 100]
+    levels = active[["Resource_Risk", "Schedule_Risk", "Budget_Risk"]].apply(
+        lambda column: column.astype(str).map(LEVEL_SCORES)
+    )
+    # Projects with more work left weigh more in operational risk
+    return {
+        "active_projects": len(active),
+        "operational_risk": round(_weighted(levels.mean(axis=1), 100 - active["Progress"]), 1),
+    }
+
+
+def alert_metrics(alerts):
+    pending = alerts["Status"] == "Pending"
+    regulatory = alerts[alerts["Alert_Type"].isin(REGULATORY_ALERTS)]
+    points = regulatory["Severity"].astype(str).map(SEVERITY_POINTS).astype(float)
+    points = points.where(regulatory["Status"] == "Pending", points / 4)
+    return {
+        "open_alerts": int(pending.sum()),
+        "regulatory_risk": round(min(float(points.sum()), 100.0), 1),
+    }
+
+
+# Data source -> function computing that source's share of the dashboard metrics
+COMPONENTS = {
+    "market": market_metrics,
+    "risk": risk_metrics,
+    "projects": project_metrics,
+    "alerts": alert_metrics,
+}
+
+
+class DashboardSnapshot:
+    """
+    Dashboard metrics materialized from the data sources. Subscribed to each source, it
+    recomputes only the metrics of a source that published a new version and stores the
+    merged record with deltas against the previous one, so rendering the dashboard reads
+    a precomputed record instead of aggregating raw data.
+    :param components: Dict of source name -> function returning that source's metrics
+    """
+
+    def __init__(self, components=COMPONENTS):
+        self.components = components
+        self.record = None
+        self.errors = {}
+        self._metrics = {}
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def sources(self):
+        return list(self.components)
+
+    def update(self, name, frame, version):
+        """
+        Data source listener: refresh the metrics of one source and rematerialize the record.
+        """
+        if name not in self.components:
+            return
+        start = time.perf_counter()
+        try:
+            metrics = self.components[name](frame)
+        except Exception as e:
+            with self._lock:
+                self.errors[name] = str(e)
+            return
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        with self._lock:
+            # Listeners of concurrent refreshes can arrive out of order
+            if version < self._versions.get(name, -1):
+                return
+            self.errors.pop(name, None)
+            self._metrics[name] = metrics
+            self._versions[name] = version
+            if len(self._metrics) < len(self.components):
+                return
+            merged = {key: value for values in self._metrics.values() for key, value in values.items()}
+            previous = self.record
+            if previous is not None and previous["metrics"] == merged:
+                self.record = dict(previous, versions=dict(self._versions))
+                return
+            self.record = {
+                "metrics": merged,
+                "deltas": {
+                    key: value - previous["metrics"][key] if previous is not None else None
+                    for key, value in merged.items()
+                },
+                "versions": dict(self._versions),
+                "updated_at": time.time(),
+                "updated_by": name,
+                "update_ms": elapsed_ms,
+            }
+
+    def current(self):
+        """
+        Latest materialized record, or None until every source has been loaded.
+        """
+        with self._lock:
+            return self.record
+
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+
+
+def get_dashboard_snapshot():
+    """
+    Return the process-wide dashboard snapshot.
+    """
+    global _snapshot
+    with _snapshot_lock:
+        if _snapshot is None:
+            _snapshot = DashboardSnapshot()
+        return _snapshot
@@ -0,0 +1,191 @@
+import os
+import time
+import threading
+
+# Default time-to-live per data source in seconds; override with DATA_TTL_<SOURCE>
+DEFAULT_TTL_SECONDS = 300.0
+
+
+class DataSource:
+    """
+    A versioned snapshot of one data source. Readers always get the current snapshot;
+    expired snapshots are refreshed on a background thread and swapped in atomically.
+    The version (and listeners) only move when a reload brings different data.
+    :param name: Source name
+    :param loader: Callable returning the full dataset
+    :param ttl: Seconds before the snapshot is considered expired
+    :param version_fn: Optional cheap callable returning the upstream version; when it is
+                       unchanged an expired snapshot is renewed without reloading
+    """
+
+    def __init__(self, name, loader, ttl, version_fn=None):
+        self.name = name
+        self.loader = loader
+        self.ttl = ttl
+        self.version_fn = version_fn
+        self.snapshot = None
+        self.version = 0
+        self.upstream_version = None
+        self.loaded_at = None
+        self.refresh_seconds = None
+        self.refreshing = False
+        self.last_error = None
+        self.listeners = []
+        self._lock = threading.Lock()
+
+    def _load(self):
+        start = time.perf_counter()
+        try:
+            upstream_version = self.version_fn() if self.version_fn else None
+            if self.snapshot is not None and upstream_version is not None and upstream_version == self.upstream_version:
+                snapshot = self.snapshot
+            else:
+                snapshot = self.loader()
+                # Loaders report failures as an empty frame; never replace good data with it
+                if self.snapshot is not None and getattr(snapshot, "empty", False):
+                    raise RuntimeError(f"{self.name} loader returned no data")
+                # A reload with the same content keeps the current snapshot and version
+                if _same_content(self.snapshot, snapshot):
+                    snapshot = self.snapshot
+        except Exception as e:
+            with self._lock:
+                self.last_error = str(e)
+                self.refreshing = False
+                # Back off for a full TTL before retrying
+                self.loaded_at = time.time()
+            return
+
+        with self._lock:
+            changed = snapshot is not self.snapshot
+            self.snapshot = snapshot
+            self.upstream_version = upstream_version
+            if changed:
+                self.version += 1
+            self.loaded_at = time.time()
+            self.refresh_seconds = time.perf_counter() - start
+            self.last_error = None
+            self.refreshing = False
+            listeners = list(self.listeners) if changed else []
+            version = self.version
+        for listener in listeners:
+            listener(self.name, snapshot, version)
+
+    def subscribe(self, listener):
+        """
+        Call listener(name, snapshot, version) whenever a new snapshot is swapped in, and
+        right away when one is already loaded. Subscribing the same listener again is a no-op.
+        """
+        with self._lock:
+            if listener in self.listeners:
+                return
+            self.listeners.append(listener)
+            snapshot, version = self.snapshot, self.version
+        if snapshot is not None:
+            listener(self.name, snapshot, version)
+
+    def get(self):
+        with self._lock:
+            if self.snapshot is None:
+                cold = True
+            else:
+                cold = False
+                expired = time.time() - self.loaded_at >= self.ttl
+                if expired and not self.refreshing:
+                    self.refreshing = True
+                    threading.Thread(target=self._load, name=f"refresh-{self.name}", daemon=True).start()
+                return self.snapshot
+        if cold:
+            # First load is synchronous; concurrent first readers wait on the same load
+            with _cold_load_lock(self.name):
+                if self.snapshot is None:
+                    self._load()
+        return self.snapshot
+
+    def invalidate(self):
+        with self._lock:
+            if self.loaded_at is not None:
+                self.loaded_at = 0.0
+
+    def status(self):
+        with self._lock:
+            return {
+                "name": self.name,
+                "version": self.version,
+                "ttl": self.ttl,
+                "age_seconds": time.time() - self.loaded_at if self.loaded_at else None,
+                "stale": bool(self.loaded_at) and time.time() - self.loaded_at >= self.ttl,
+                "refresh_seconds": self.refresh_seconds,
+                "refreshing": self.refreshing,
+                "last_error": self.last_error,
+            }
+
+
+def _same_content(old, new):
+    if old is None or type(old) is not type(new) or not hasattr(old, "equals"):
+        return False
+    return bool(old.equals(new))
+
+
+_sources = {}
+_sources_lock = threading.Lock()
+_cold_locks = {}
+
+
+def _cold_load_lock(name):
+    with _sources_lock:
+        return _cold_locks.setdefault(name, threading.Lock())
+
+
+def source_ttl(name, default):
+    return float(os.getenv(f"DATA_TTL_{name.upper()}", default))
+
+
+def cached_source(name, ttl=DEFAULT_TTL_SECONDS, version_fn=None):
+    """
+    Decorator turning a loader into a stale-while-revalidate data source. The decorated
+    function returns the current shared snapshot, which callers must treat as read-only.
+    Re-decorating (e.g. on a Streamlit rerun) keeps the existing snapshot.
+    """
+    def decorator(loader):
+        with _sources_lock:
+            source = _sources.get(name)
+            if source is None:
+                source = DataSource(name, loader, source_ttl(name, ttl), version_fn)
+                _sources[name] = source
+            else:
+                source.loader = loader
+                source.version_fn = version_fn
+
+        def get():
+            return source.get()
+
+        get.__name__ = loader.__name__
+        get.__doc__ = loader.__doc__
+        get.source = source
+        return get
+    return decorator
+
+
+def data_source_status():
+    with _sources_lock:
+        sources = list(_sources.values())
+    return [source.status() for source in sources]
+
+
+def subscribe_source(name, listener):
+    """
+    Subscribe listener to new snapshots of the named source.
+    """
+    with _sources_lock:
+        source = _sources[name]
+    source.subscribe(listener)
+
+
+def invalidate_sources(*names):
+    """
+    Mark sources as expired so the next read triggers a background refresh.
+    """
+    with _sources_lock:
+        sources = [s for n, s in _sources.items() if not names or n in names]
+    for source in sources:
+        source.invalidate()
@@ -0,0 +1,145 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Universe configuration: UNIVERSE_PATH points to a CSV with the columns of generate_universe;
+# without it a synthetic universe of UNIVERSE_SIZE instruments is generated
+UNIVERSE_PATH = os.getenv("UNIVERSE_PATH")
+UNIVERSE_SIZE = int(os.getenv("UNIVERSE_SIZE", "300000"))
+
+# Asset class -> (share of instruments, mean annualized volatility %, mean liquidity score, issuers)
+ASSET_CLASSES = {
+    "Equities": (0.35, 28.0, 80.0, 4000),
+    "Bonds": (0.25, 8.0, 70.0, 2500),
+    "Real Estate": (0.06, 18.0, 25.0, 400),
+    "Commodities": (0.06, 32.0, 65.0, 150),
+    "Cryptocurrency": (0.03, 75.0, 55.0, 120),
+    "Derivatives": (0.12, 45.0, 60.0, 600),
+    "Foreign Exchange": (0.08, 10.0, 95.0, 60),
+    "Private Equity": (0.05, 35.0, 10.0, 300),
+}
+
+# Factor model: each factor is scaled to 0-100 (higher is riskier) and blended with these weights
+FACTOR_WEIGHTS = {
+    "Volatility_Factor": 0.40,
+    "Liquidity_Factor": 0.25,
+    "Concentration_Factor": 0.20,
+    "Exposure_Factor": 0.15,
+}
+VOLATILITY_CAP = 80.0  # Annualized volatility (%) scored as maximum risk
+CONCENTRATION_LIMIT = 0.10  # Issuer share of its asset class exposure scored as maximum risk
+
+
+def generate_universe(size=UNIVERSE_SIZE, seed=7):
+    """
+    Synthetic instrument universe keyed by instrument ID.
+    :param size: Number of instruments
+    :return: DataFrame indexed by Instrument_ID with Asset_Class, Issuer, Volatility (%),
+             Liquidity (0-100) and Exposure (position value) columns
+    """
+    rng = np.random.default_rng(seed)
+    names = list(ASSET_CLASSES)
+    shares, vol_means, liquidity_means, issuers = (np.array(values) for values in zip(*ASSET_CLASSES.values()))
+
+    classes = rng.choice(len(names), size=size, p=shares / shares.sum()).astype(np.int8)
+    volatility = vol_means[classes] * rng.lognormal(0.0, 0.35, size)
+    liquidity = np.clip(liquidity_means[classes] + rng.normal(0, 12, size), 0, 100)
+    exposure = rng.lognormal(11.0, 1.2, size)
+
+    # Issuer IDs are unique across asset classes; the skewed draw concentrates exposure in the
+    # first issuers of each class, more so in classes with few issuers
+    issuer_offsets = np.concatenate(([0], np.cumsum(issuers)[:-1]))
+    issuer = issuer_offsets[classes] + (rng.power(0.5, size) * issuers[classes]).astype(np.int64)
+
+    return pd.DataFrame(
+        {
+            "Asset_Class": pd.Categorical.from_codes(classes, categories=names),
+            "Issuer": issuer.astype(np.int32),
+            "Volatility": volatility.astype(np.float32),
+            "Liquidity": liquidity.astype(np.float32),
+            "Exposure": exposure.astype(np.float32),
+        },
+        index=pd.RangeIndex(1, size + 1, name="Instrument_ID"),
+    )
+
+
+def load_universe(path=UNIVERSE_PATH):
+    """
+    Load the instrument universe from a CSV export, or generate a synthetic one.
+    :raises ValueError: When the export has asset classes outside ASSET_CLASSES
+    """
+    if not path:
+        return generate_universe()
+    universe = pd.read_csv(path, index_col="Instrument_ID").sort_index()
+    # The factor model aggregates by asset class code, so every instrument needs a known class
+    unknown = sorted(set(universe["Asset_Class"].dropna().astype(str)) - set(ASSET_CLASSES))
+    missing = int(universe["Asset_Class"].isna().sum())
+    if unknown or missing:
+        problems = [f"unknown asset classes {', '.join(unknown)}"] if unknown else []
+        problems += [f"{missing} instruments without an asset class"] if missing else []
+        raise ValueError(f"Invalid universe {path}: {'; '.join(problems)}. Expected one of: {', '.join(ASSET_CLASSES)}")
+    return universe.astype({
+        "Asset_Class": pd.CategoricalDtype(list(ASSET_CLASSES)),
+        "Issuer": np.int32,
+        "Volatility": np.float32,
+        "Liquidity": np.float32,
+        "Exposure": np.float32,
+    })
+
+
+def score_universe(universe, weights=FACTOR_WEIGHTS):
+    """
+    Vectorized factor risk model over the whole universe.
+    :return: Copy of the universe with one column per factor and the blended Risk_Score
+    """
+    classes = universe["Asset_Class"].cat.codes.to_numpy()
+    issuer = universe["Issuer"].to_numpy()
+    volatility = universe["Volatility"].to_numpy(dtype=np.float64)
+    liquidity = universe["Liquidity"].to_numpy(dtype=np.float64)
+    exposure = universe["Exposure"].to_numpy(dtype=np.float64)
+
+    # Issuer share of its asset class exposure
+    issuer_exposure = np.bincount(issuer, weights=exposure)
+    class_exposure = np.bincount(classes, weights=exposure, minlength=len(ASSET_CLASSES))
+    issuer_share = issuer_exposure[issuer] / class_exposure[classes]
+
+    # Position size as a percentile of the whole book
+    ranks = np.empty(len(exposure))
+    ranks[np.argsort(exposure, kind="stable")] = np.arange(len(exposure))
+
+    factors = {
+        "Volatility_Factor": np.clip(volatility / VOLATILITY_CAP * 100, 0, 100),
+        "Liquidity_Factor": 100 - liquidity,
+        "Concentration_Factor": np.clip(issuer_share / CONCENTRATION_LIMIT * 100, 0, 100),
+        "Exposure_Factor": ranks / max(len(exposure) - 1, 1) * 100,
+    }
+    risk_score = sum(weights[name] * values for name, values in factors.items()) / sum(weights.values())
+
+    scored = universe.copy()
+    for name, values in factors.items():
+        scored[name] = values.astype(np.float32)
+    scored["Risk_Score"] = risk_score.astype(np.float32)
+    return scored
+
+
+def asset_class_risk(scored):
+    """
+    Exposure-weighted factor scores and baseline risk score per asset class.
+    :param scored: Output of score_universe
+    """
+    classes = scored["Asset_Class"].cat.codes.to_numpy()
+    exposure = scored["Exposure"].to_numpy(dtype=np.float64)
+    count = len(ASSET_CLASSES)
+    class_exposure = np.bincount(classes, weights=exposure, minlength=count)
+    safe_exposure = np.where(class_exposure > 0, class_exposure, 1.0)
+
+    columns = {
+        "Asset": list(scored["Asset_Class"].cat.categories),
+        "Instruments": np.bincount(classes, minlength=count),
+        "Exposure": class_exposure,
+    }
+    for name in list(FACTOR_WEIGHTS) + ["Risk_Score"]:
+        weighted = np.bincount(classes, weights=exposure * scored[name].to_numpy(dtype=np.float64), minlength=count)
+        columns[name] = np.round(weighted / safe_exposure, 1)
+    return pd.DataFrame(columns)
@@ -0,0 +1,267 @@
+import os
+import re
+import html
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# Job queue configuration
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", os.path.join(".cache", "jobs.sqlite"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "3"))
+POLL_INTERVAL_SECONDS = 0.5
+MAX_BACKOFF_SECONDS = 10.0
+# A running job whose worker has not finished it within the lease is presumed dead and requeued
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "1800"))
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+
+class JobQueue:
+    """
+    Persistent SQLite-backed job queue with a pool of worker threads, safe to share between
+    processes. Jobs survive restarts: a job left running past its lease by a dead process
+    is requeued, while jobs other live processes are still running are left alone.
+    :param path: SQLite database path
+    :param workers: Number of worker threads
+    :param lease: Seconds a running job may take before it is reclaimed
+    """
+
+    def __init__(self, path=JOB_DB_PATH, workers=JOB_WORKERS, lease=JOB_LEASE_SECONDS):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.workers = workers
+        self.lease = lease
+        self._handlers = {}
+        self._threads = []
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+
+        with self._connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    title TEXT,
+                    params TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    created REAL NOT NULL,
+                    started REAL,
+                    finished REAL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created)")
+            self._requeue_expired(conn)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def _connection(self):
+        conn = self._connect()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def register(self, kind, handler):
+        """
+        Register the callable that executes jobs of a given kind. Handlers receive the
+        job params dict and return the result text.
+        """
+        with self._lock:
+            self._handlers[kind] = handler
+
+    def start(self):
+        with self._lock:
+            self._threads = [t for t in self._threads if t.is_alive()]
+            for i in range(len(self._threads), self.workers):
+                thread = threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+
+    def submit(self, kind, params, title=None):
+        job_id = uuid.uuid4().hex
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, title, params, status, created) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, kind, title or kind, json.dumps(params), STATUS_QUEUED, time.time()),
+            )
+        self._wakeup.set()
+        return job_id
+
+    def get(self, job_id):
+        with self._connection() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def list_jobs(self, job_ids=None, kind=None, status=None, limit=20):
+        query, args = "SELECT * FROM jobs WHERE 1 = 1", []
+        if job_ids is not None:
+            if not job_ids:
+                return []
+            query += f" AND id IN ({','.join('?' * len(job_ids))})"
+            args.extend(job_ids)
+        if kind:
+            query += " AND kind = ?"
+            args.append(kind)
+        if status:
+            query += " AND status = ?"
+            args.append(status)
+        query += " ORDER BY created DESC LIMIT ?"
+        args.append(limit)
+        with self._connection() as conn:
+            return [dict(row) for row in conn.execute(query, args).fetchall()]
+
+    def _requeue_expired(self, conn):
+        return conn.execute(
+            "UPDATE jobs SET status = ?, started = NULL WHERE status = ? AND started < ?",
+            (STATUS_QUEUED, STATUS_RUNNING, time.time() - self.lease),
+        ).rowcount
+
+    def _claim(self, conn):
+        kinds = list(self._handlers)
+        if not kinds:
+            return None
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._requeue_expired(conn)
+            row = conn.execute(
+                f"SELECT * FROM jobs WHERE status = ? AND kind IN ({','.join('?' * len(kinds))}) "
+                "ORDER BY created LIMIT 1",
+                [STATUS_QUEUED] + kinds,
+            ).fetchone()
+            if row:
+                row = dict(row, status=STATUS_RUNNING, started=time.time())
+                conn.execute(
+                    "UPDATE jobs SET status = ?, started = ? WHERE id = ?",
+                    (STATUS_RUNNING, row["started"], row["id"]),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return row
+
+    def _finish(self, conn, job, status, result=None, error=None):
+        # A job reclaimed after its lease belongs to its new worker; drop this late outcome
+        return conn.execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished = ? "
+            "WHERE id = ? AND status = ? AND started = ?",
+            (status, result, error, time.time(), job["id"], STATUS_RUNNING, job["started"]),
+        ).rowcount
+
+    def _run(self, job):
+        """
+        Execute a claimed job.
+        :return: (status, result, error)
+        """
+        handler = self._handlers.get(job["kind"])
+        try:
+            result = handler(json.loads(job["params"]))
+            if not result:
+                raise RuntimeError("The job produced no result")
+            return STATUS_DONE, result, None
+        except Exception as e:
+            return STATUS_FAILED, None, str(e)
+
+    def _worker(self):
+        conn = self._connect()
+        backoff = POLL_INTERVAL_SECONDS
+        while not self._stop.is_set():
+            try:
+                job = self._claim(conn)
+            except sqlite3.Error:
+                # E.g. the database is locked by another process; retry later
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, MAX_BACKOFF_SECONDS)
+                continue
+            backoff = POLL_INTERVAL_SECONDS
+            if job is None:
+                self._wakeup.wait(POLL_INTERVAL_SECONDS)
+                self._wakeup.clear()
+                continue
+
+            outcome = self._run(job)
+            delay = POLL_INTERVAL_SECONDS
+            while not self._stop.is_set():
+                try:
+                    self._finish(conn, job, *outcome)
+                    break
+                except sqlite3.Error:
+                    self._stop.wait(delay)
+                    delay = min(delay * 2, MAX_BACKOFF_SECONDS)
+        conn.close()
+
+
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    """
+    Return the process-wide job queue, creating and starting it on first use.
+    """
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            _job_queue = JobQueue()
+        _job_queue.start()
+        return _job_queue
+
+
+def _inline_markdown(text):
+    text = html.escape(text)
+    text = re.sub(r"\*\*(.+?)\*\*", r"<strong>\1</strong>", text)
+    text = re.sub(r"\*(.+?)\*", r"<em>\1</em>", text)
+    return text
+
+
+def markdown_to_html(title, markdown_text):
+    """
+    Render a report as a standalone HTML document (headings, lists, emphasis and paragraphs).
+    """
+    body, list_tag = [], None
+    for line in markdown_text.splitlines():
+        stripped = line.strip()
+        heading = re.match(r"(#{1,6})\s+(.*)", stripped)
+        bullet = re.match(r"[-*+]\s+(.*)", stripped)
+        numbered = re.match(r"\d+[.)]\s+(.*)", stripped)
+        tag = "ul" if bullet else "ol" if numbered else None
+        if list_tag and tag != list_tag:
+            body.append(f"</{list_tag}>")
+            list_tag = None
+        if heading:
+            level = len(heading.group(1))
+            body.append(f"<h{level}>{_inline_markdown(heading.group(2))}</h{level}>")
+        elif tag:
+            if list_tag is None:
+                body.append(f"<{tag}>")
+                list_tag = tag
+            body.append(f"<li>{_inline_markdown((bullet or numbered).group(1))}</li>")
+        elif stripped:
+            body.append(f"<p>{_inline_markdown(stripped)}</p>")
+    if list_tag:
+        body.append(f"</{list_tag}>")
+    return (
+        "<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"utf-8\">\n"
+        f"<title>{html.escape(title)}</title>\n</head>\n<body>\n"
+        f"<h1>{html.escape(title)}</h1>\n" + "\n".join(body) + "\n</body>\n</html>\n"
+    )
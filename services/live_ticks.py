@@ -0,0 +1,258 @@
+import os
+import sys
+import time
+import socket
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Live feed configuration: "udp:HOST:PORT" or "file:PATH" (CSV lines: timestamp,instrument,price[,volume])
+LIVE_FEED = os.getenv("LIVE_FEED", "udp:127.0.0.1:9999")
+RING_CAPACITY = int(os.getenv("LIVE_RING_CAPACITY", "50000"))
+PUBLISH_INTERVAL_SECONDS = 0.5
+INSTRUMENTS = ["S&P500", "NASDAQ", "DJIA"]
+
+
+class RingBuffer:
+    """
+    Fixed-size NumPy ring buffer of (timestamp, price, volume) ticks for one instrument.
+    """
+
+    def __init__(self, capacity=RING_CAPACITY):
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.prices = np.zeros(capacity, dtype=np.float64)
+        self.volumes = np.zeros(capacity, dtype=np.float64)
+        self.position = 0
+        self.count = 0
+
+    def extend(self, timestamps, prices, volumes):
+        n = len(timestamps)
+        if n >= self.capacity:
+            timestamps, prices, volumes = timestamps[-self.capacity:], prices[-self.capacity:], volumes[-self.capacity:]
+            n = self.capacity
+        end = self.position + n
+        if end <= self.capacity:
+            self.timestamps[self.position:end] = timestamps
+            self.prices[self.position:end] = prices
+            self.volumes[self.position:end] = volumes
+        else:
+            split = self.capacity - self.position
+            for target, values in ((self.timestamps, timestamps), (self.prices, prices), (self.volumes, volumes)):
+                target[self.position:] = values[:split]
+                target[:n - split] = values[split:]
+        self.position = end % self.capacity
+        self.count = min(self.count + n, self.capacity)
+
+    def ordered(self):
+        """
+        Copy of the buffered ticks in arrival order, as read-only arrays.
+        """
+        if self.count < self.capacity:
+            arrays = (self.timestamps[:self.count].copy(), self.prices[:self.count].copy(), self.volumes[:self.count].copy())
+        else:
+            arrays = tuple(np.concatenate((a[self.position:], a[:self.position])) for a in (self.timestamps, self.prices, self.volumes))
+        for array in arrays:
+            array.setflags(write=False)
+        return arrays
+
+
+class TickSnapshot:
+    """
+    Immutable view of all instruments published to sessions.
+    """
+
+    def __init__(self, version, series, ticks_total, published_at):
+        self.version = version
+        self.series = series
+        self.ticks_total = ticks_total
+        self.published_at = published_at
+        self._frames = {}
+        self._frames_lock = threading.Lock()
+
+    def frame(self, instruments=None, seconds=300, points=300):
+        """
+        Sample the last `seconds` of each instrument onto a common time grid of `points` steps,
+        carrying the last traded price forward. Frames are memoized per snapshot, so every
+        session refreshing on the same snapshot shares one computation.
+        """
+        key = (tuple(instruments or ()), seconds, points)
+        with self._frames_lock:
+            if key not in self._frames:
+                self._frames[key] = self._sample(instruments, seconds, points)
+            return self._frames[key]
+
+    def _sample(self, instruments, seconds, points):
+        instruments = [i for i in (instruments or self.series) if i in self.series and len(self.series[i][0])]
+        if not instruments:
+            return pd.DataFrame()
+        end = max(self.series[i][0][-1] for i in instruments)
+        grid = np.linspace(end - seconds, end, points)
+        columns = {}
+        for instrument in instruments:
+            timestamps, prices, _ = self.series[instrument]
+            idx = np.searchsorted(timestamps, grid, side="right") - 1
+            values = np.where(idx >= 0, prices[np.clip(idx, 0, None)], np.nan)
+            columns[instrument] = values
+        return pd.DataFrame(columns, index=pd.to_datetime(grid, unit="s")).dropna(how="all")
+
+
+class TickHub:
+    """
+    Ingests ticks from a local feed into per-instrument ring buffers and periodically
+    publishes an immutable snapshot. Sessions only read the latest snapshot reference.
+    """
+
+    def __init__(self, feed=LIVE_FEED, capacity=RING_CAPACITY):
+        self.feed = feed
+        self.capacity = capacity
+        self._buffers = {}
+        self._lock = threading.Lock()
+        self._snapshot = TickSnapshot(0, {}, 0, None)
+        self._ticks_total = 0
+        self._dirty = False
+        self.last_error = None
+        self._threads = []
+
+    def start(self):
+        if self._threads:
+            return
+        kind, _, target = self.feed.partition(":")
+        reader = {"udp": self._read_udp, "file": self._read_file}.get(kind)
+        if reader is None:
+            self.last_error = f"Unsupported live feed '{self.feed}'"
+            return
+        for target_fn, args in ((reader, (target,)), (self._publish_loop, ())):
+            thread = threading.Thread(target=target_fn, args=args, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def snapshot(self):
+        return self._snapshot
+
+    def ingest_lines(self, lines):
+        """
+        Parse CSV tick lines and append them to the ring buffers in one batch per instrument.
+        """
+        batches = {}
+        for line in lines:
+            parts = line.strip().split(",")
+            if len(parts) < 3:
+                continue
+            try:
+                timestamp, price = float(parts[0]), float(parts[2])
+                volume = float(parts[3]) if len(parts) > 3 else 0.0
+            except ValueError:
+                continue
+            batches.setdefault(parts[1], ([], [], []))
+            batch = batches[parts[1]]
+            batch[0].append(timestamp)
+            batch[1].append(price)
+            batch[2].append(volume)
+        if not batches:
+            return
+        with self._lock:
+            for instrument, (timestamps, prices, volumes) in batches.items():
+                buffer = self._buffers.get(instrument)
+                if buffer is None:
+                    buffer = self._buffers[instrument] = RingBuffer(self.capacity)
+                buffer.extend(np.asarray(timestamps), np.asarray(prices), np.asarray(volumes))
+                self._ticks_total += len(timestamps)
+            self._dirty = True
+
+    def publish(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            series = {instrument: buffer.ordered() for instrument, buffer in self._buffers.items()}
+            self._dirty = False
+            ticks_total = self._ticks_total
+        self._snapshot = TickSnapshot(self._snapshot.version + 1, series, ticks_total, time.time())
+
+    def _publish_loop(self):
+        while True:
+            time.sleep(PUBLISH_INTERVAL_SECONDS)
+            self.publish()
+
+    def _read_udp(self, target):
+        host, _, port = target.rpartition(":")
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            sock.bind((host or "127.0.0.1", int(port)))
+        except OSError as e:
+            self.last_error = f"Cannot listen on {target}: {e}"
+            return
+        while True:
+            data, _ = sock.recvfrom(65535)
+            self.ingest_lines(data.decode("utf-8", errors="ignore").splitlines())
+
+    def _read_file(self, path):
+        while not os.path.exists(path):
+            self.last_error = f"Waiting for feed file {path}"
+            time.sleep(1.0)
+        self.last_error = None
+        with open(path) as f:
+            f.seek(0, os.SEEK_END)
+            pending = ""
+            while True:
+                text = f.read()
+                if text:
+                    pending = self._ingest_text(pending + text)
+                else:
+                    time.sleep(0.05)
+
+    def _ingest_text(self, text):
+        """
+        Ingest the complete lines of text read from a feed file. The writer may be mid-line, so
+        text after the last newline is not a tick yet.
+        :return: Trailing partial line, to be prefixed to the next read
+        """
+        lines = text.split("\n")
+        pending = lines.pop()
+        if lines:
+            self.ingest_lines(lines)
+        return pending
+
+
+_tick_hub = None
+_tick_hub_lock = threading.Lock()
+
+
+def get_tick_hub():
+    """
+    Return the process-wide tick hub, starting ingestion on first use.
+    """
+    global _tick_hub
+    with _tick_hub_lock:
+        if _tick_hub is None:
+            _tick_hub = TickHub()
+            _tick_hub.start()
+        return _tick_hub
+
+
+def simulate_ticks(target="127.0.0.1:9999", rate=2000, batch_size=100):
+    """
+    Send simulated random-walk ticks for the market indices to a local UDP feed.
+    :param target: HOST:PORT the app listens on
+    :param rate: Ticks per second across all instruments
+    """
+    host, _, port = target.rpartition(":")
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    prices = {"S&P500": 4650.0, "NASDAQ": 15350.0, "DJIA": 33900.0}
+    rng = np.random.default_rng()
+    interval = batch_size / rate
+    while True:
+        now = time.time()
+        lines = []
+        for _ in range(batch_size):
+            instrument = INSTRUMENTS[rng.integers(len(INSTRUMENTS))]
+            prices[instrument] *= 1 + rng.normal(0, 0.0002)
+            lines.append(f"{now:.6f},{instrument},{prices[instrument]:.2f},{rng.integers(1, 500)}")
+        sock.sendto("\n".join(lines).encode("utf-8"), (host, int(port)))
+        time.sleep(interval)
+
+
+if __name__ == "__main__":
+    # python -m services.live_ticks [HOST:PORT] [TICKS_PER_SECOND]
+    simulate_ticks(*(sys.argv[1:2] or ["127.0.0.1:9999"]), rate=int(sys.argv[2]) if len(sys.argv) > 2 else 2000)
@@ -0,0 +1,143 @@
+import sys
+import time
+import threading
+
+try:
+    import resource
+except ImportError:  # Windows: peak RSS is unavailable
+    resource = None
+
+import numpy as np
+import pandas as pd
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# Sessions not seen for this long are dropped from the per-session estimate
+SESSION_IDLE_SECONDS = 1800
+
+
+def frame_bytes(df):
+    """
+    Bytes held by a DataFrame including its index and the contents of object columns.
+    """
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def compact_frame(df, categories=(), float32=(), int16=()):
+    """
+    Convert a freshly loaded frame to compact dtypes. The result is shared by every session
+    as-is; with copy-on-write (always on from pandas 3), frames derived from it never write
+    back into it.
+    :param categories: Low-cardinality string columns stored as categoricals
+    :param float32: Float columns whose values fit in single precision
+    :param int16: Integer columns whose values fit in 16 bits
+    """
+    original_bytes = frame_bytes(df)
+    columns = {}
+    for column in df.columns:
+        values = df[column]
+        if column in categories:
+            values = values.astype("category")
+        elif column in float32:
+            values = values.astype(np.float32)
+        elif column in int16:
+            if values.min() < np.iinfo(np.int16).min or values.max() > np.iinfo(np.int16).max:
+                raise ValueError(f"Column '{column}' does not fit in int16")
+            values = values.astype(np.int16)
+        columns[column] = values
+    compact = pd.DataFrame(columns, index=df.index)
+    compact.attrs["original_bytes"] = original_bytes
+    return compact
+
+
+def dataset_memory(datasets):
+    """
+    Size of each shared dataset before and after compaction.
+    :param datasets: Dict of dataset name -> DataFrame
+    """
+    rows = []
+    for name, df in datasets.items():
+        compact = frame_bytes(df)
+        original = df.attrs.get("original_bytes", compact)
+        rows.append({
+            "Dataset": name,
+            "Rows": len(df),
+            "Columns": len(df.columns),
+            "Bytes": compact,
+            "Original Bytes": original,
+            "Saved (%)": round(100 * (1 - compact / original), 1) if original else 0.0,
+        })
+    return rows
+
+
+def deep_size(value, seen=None):
+    """
+    Approximate bytes reachable from value, counting shared objects once.
+    """
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    if isinstance(value, pd.DataFrame):
+        return frame_bytes(value)
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(deep_size(item, seen) for item in value)
+    return size
+
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def record_session(session_state):
+    """
+    Record the bytes held by the current session's state. Shared datasets are excluded:
+    sessions only hold references to the process-wide snapshots.
+    """
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return
+    size = sum(deep_size(session_state[key]) for key in list(session_state.keys()))
+    now = time.time()
+    with _sessions_lock:
+        _sessions[ctx.session_id] = (size, now)
+        for session_id, (_, seen_at) in list(_sessions.items()):
+            if now - seen_at > SESSION_IDLE_SECONDS:
+                del _sessions[session_id]
+
+
+def memory_profile(datasets, users=(100, 500)):
+    """
+    Shared dataset bytes, per-session bytes and the projected footprint for a number of
+    concurrent users.
+    """
+    shared = sum(frame_bytes(df) for df in datasets.values())
+    with _sessions_lock:
+        sizes = [size for size, _ in _sessions.values()]
+    per_session = sum(sizes) / len(sizes) if sizes else 0
+    peak_rss = None
+    if resource is not None:
+        # ru_maxrss is reported in bytes on macOS and in kilobytes on Linux
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform != "darwin":
+            peak_rss *= 1024
+    return {
+        "shared_bytes": shared,
+        "sessions": len(sizes),
+        "per_session_bytes": per_session,
+        "peak_rss_bytes": peak_rss,
+        "projections": {n: shared + n * per_session for n in users},
+    }
+
+
+def format_bytes(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(size) < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
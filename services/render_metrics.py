@@ -0,0 +1,116 @@
+import os
+import time
+import threading
+import functools
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# Set RENDER_FRAGMENTS=off to render every panel inline (full-script reruns) for comparison
+FRAGMENTS_ENABLED = os.getenv("RENDER_FRAGMENTS", "on").lower() not in ("0", "off", "false")
+
+_local = threading.local()
+_totals = {}
+_totals_lock = threading.Lock()
+
+
+class _Meter:
+    """
+    Counts the time spent and the forward-message bytes enqueued for the client during
+    one script run or fragment rerun.
+    """
+
+    def __init__(self, ctx, scope):
+        self.ctx = ctx
+        self.scope = scope
+        self.bytes = 0
+        self.start = time.perf_counter()
+        # _enqueue is private to Streamlit; without it only time is metered
+        self._original = getattr(ctx, "_enqueue", None)
+        if self._original is None:
+            self.bytes = None
+            return
+
+        def counting_enqueue(msg):
+            self.bytes += msg.ByteSize()
+            self._original(msg)
+
+        ctx._enqueue = counting_enqueue
+
+    def stop(self):
+        if self._original is not None:
+            self.ctx._enqueue = self._original
+        return (time.perf_counter() - self.start) * 1000, self.bytes
+
+
+def _record(scope, elapsed_ms, sent_bytes):
+    mode = "fragments" if FRAGMENTS_ENABLED else "full"
+    key = (mode, scope)
+    with _totals_lock:
+        runs, total_ms, total_bytes = _totals.get(key, (0, 0.0, 0))
+        if sent_bytes is not None and total_bytes is not None:
+            total_bytes += sent_bytes
+        else:
+            total_bytes = None
+        _totals[key] = (runs + 1, total_ms + elapsed_ms, total_bytes)
+
+
+def measure(scope, fn, *args, **kwargs):
+    """
+    Run fn and record its duration and bytes sent under scope, unless an enclosing run is
+    already being measured (a fragment rendered as part of a full rerun).
+    """
+    ctx = get_script_run_ctx()
+    if ctx is None or getattr(_local, "meter", None) is not None:
+        return fn(*args, **kwargs)
+    meter = _local.meter = _Meter(ctx, scope)
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        elapsed_ms, sent_bytes = meter.stop()
+        _local.meter = None
+        _record(meter.scope, elapsed_ms, sent_bytes)
+
+
+def label_run(scope):
+    """
+    Rename the run currently being measured, e.g. once the page is known.
+    """
+    meter = getattr(_local, "meter", None)
+    if meter is not None:
+        meter.scope = scope
+
+
+def isolated_fragment(fn=None, *, run_every=None):
+    """
+    Render a panel as a Streamlit fragment so interacting with it only reruns the panel,
+    and meter each rerun. With RENDER_FRAGMENTS=off the panel renders inline instead.
+    """
+    if fn is None:
+        return functools.partial(isolated_fragment, run_every=run_every)
+
+    @functools.wraps(fn)
+    def metered(*args, **kwargs):
+        return measure(fn.__name__, fn, *args, **kwargs)
+
+    if not FRAGMENTS_ENABLED and run_every is None:
+        return metered
+    return st.fragment(metered, run_every=run_every)
+
+
+def render_metrics():
+    """
+    Average rerun time and bytes sent per interaction, by rendering mode and scope.
+    """
+    with _totals_lock:
+        items = sorted(_totals.items())
+    return [
+        {
+            "Mode": mode,
+            "Scope": scope,
+            "Runs": runs,
+            "Avg Time (ms)": round(total_ms / runs, 1),
+            "Avg Sent (KB)": round(total_bytes / runs / 1024, 1) if total_bytes is not None else None,
+        }
+        for (mode, scope), (runs, total_ms, total_bytes) in items
+    ]
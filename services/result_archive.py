@@ -0,0 +1,291 @@
+import os
+import re
+import sys
+import json
+import random
+import itertools
+import time
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# Archive configuration
+ARCHIVE_DB_PATH = os.getenv("ARCHIVE_DB_PATH", os.path.join(".cache", "archive.sqlite"))
+SNIPPET_TOKENS = 24
+TITLE_CHARS = 120
+SEARCH_CACHE_SIZE = 64
+
+AGENT_LABELS = {
+    "market_analysis": "Market Analysis",
+    "risk_scoring": "Risk Assessment",
+    "project_status": "Project Status",
+    "reporting": "Report",
+}
+
+
+class ResultArchive:
+    """
+    SQLite archive of every generated result with its inputs, model, timestamp and token
+    usage, searchable through an FTS5 full-text index ranked by BM25.
+    :param path: SQLite database path
+    """
+
+    def __init__(self, path=ARCHIVE_DB_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        # Ranked searches by (expression, agent, limit), valid while no newer result is archived
+        self._search_cache = OrderedDict()
+        self._search_lock = threading.Lock()
+
+        with self._connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS results (
+                    id INTEGER PRIMARY KEY,
+                    agent TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    inputs TEXT NOT NULL,
+                    input_key TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    model TEXT,
+                    prompt_tokens INTEGER,
+                    completion_tokens INTEGER,
+                    created REAL NOT NULL,
+                    UNIQUE (input_key, content_hash)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS results_agent ON results (agent, created)")
+            # External-content index: the text lives once in results, the index holds only postings
+            conn.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS results_fts USING fts5(
+                    title, inputs, content, content='results', content_rowid='id', tokenize='porter unicode61'
+                )
+            """)
+            conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS results_ai AFTER INSERT ON results BEGIN
+                    INSERT INTO results_fts (rowid, title, inputs, content)
+                    VALUES (new.id, new.title, new.inputs, new.content);
+                END
+            """)
+            conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS results_ad AFTER DELETE ON results BEGIN
+                    INSERT INTO results_fts (results_fts, rowid, title, inputs, content)
+                    VALUES ('delete', old.id, old.title, old.inputs, old.content);
+                END
+            """)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def _connection(self):
+        conn = self._connect()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def input_key(agent, inputs):
+        payload = json.dumps({"agent": agent, "inputs": inputs}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def store(self, agent, inputs, content, title=None, completion=None):
+        """
+        Archive a generated result. Storing the same content for the same inputs again is a no-op.
+        :param inputs: Dict of the inputs the result was generated from
+        :param completion: Optional dict with model, prompt_tokens and completion_tokens
+        :return: Result ID, or None when it was already archived
+        """
+        completion = completion or {}
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO results (agent, title, inputs, input_key, content, content_hash, "
+                "model, prompt_tokens, completion_tokens, created) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    agent,
+                    (title or AGENT_LABELS.get(agent, agent))[:TITLE_CHARS],
+                    json.dumps(inputs, default=str),
+                    self.input_key(agent, inputs),
+                    content,
+                    hashlib.sha256(content.encode("utf-8")).hexdigest(),
+                    completion.get("model"),
+                    completion.get("prompt_tokens"),
+                    completion.get("completion_tokens"),
+                    time.time(),
+                ),
+            )
+            return cursor.lastrowid if cursor.rowcount else None
+
+    def get(self, result_id):
+        with self._connection() as conn:
+            row = conn.execute("SELECT * FROM results WHERE id = ?", (result_id,)).fetchone()
+        return dict(row) if row else None
+
+    def latest(self, agent, inputs):
+        """
+        Most recent result generated from exactly these inputs, or None.
+        """
+        with self._connection() as conn:
+            row = conn.execute(
+                "SELECT * FROM results WHERE input_key = ? ORDER BY created DESC LIMIT 1",
+                (self.input_key(agent, inputs),),
+            ).fetchone()
+        return dict(row) if row else None
+
+    @staticmethod
+    def match_expression(text):
+        """
+        Turn free text into an FTS5 query: every word must match, the last one as a prefix.
+        """
+        terms = re.findall(r"\w+", text.lower())
+        if not terms:
+            return None
+        quoted = [f'"{term}"' for term in terms]
+        quoted[-1] += "*"
+        return " ".join(quoted)
+
+    def search(self, text, agent=None, limit=20):
+        """
+        Full-text search over titles, inputs and content, ranked by BM25 across the whole index.
+        Ranking reads every match, so repeated searches (fragment reruns, opening a result) are
+        answered from a cache that is dropped as soon as a newer result is archived.
+        :return: (rows, elapsed milliseconds); rows carry a highlighted snippet
+        """
+        expression = self.match_expression(text)
+        if expression is None:
+            return [], 0.0
+        query = (
+            "SELECT r.id, r.agent, r.title, r.inputs, r.model, r.prompt_tokens, r.completion_tokens, r.created, "
+            f"snippet(results_fts, 2, '**', '**', '…', {SNIPPET_TOKENS}) AS snippet, results_fts.rank AS rank "
+            "FROM results_fts JOIN results r ON r.id = results_fts.rowid "
+            "WHERE results_fts MATCH ?"
+        )
+        args = [expression]
+        if agent:
+            query += " AND r.agent = ?"
+            args.append(agent)
+        query += " ORDER BY results_fts.rank LIMIT ?"
+        args.append(limit)
+
+        start = time.perf_counter()
+        with self._connection() as conn:
+            last_id = conn.execute("SELECT MAX(id) FROM results").fetchone()[0]
+            key = (expression, agent, limit)
+            with self._search_lock:
+                cached = self._search_cache.get(key)
+                if cached is not None and cached[0] == last_id:
+                    self._search_cache.move_to_end(key)
+                    return [dict(row) for row in cached[1]], (time.perf_counter() - start) * 1000
+            rows = [dict(row) for row in conn.execute(query, args).fetchall()]
+        with self._search_lock:
+            self._search_cache[key] = (last_id, rows)
+            self._search_cache.move_to_end(key)
+            while len(self._search_cache) > SEARCH_CACHE_SIZE:
+                self._search_cache.popitem(last=False)
+        return [dict(row) for row in rows], (time.perf_counter() - start) * 1000
+
+    def stats(self):
+        with self._connection() as conn:
+            count = conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        return {"results": count, "bytes": size}
+
+
+_archive = None
+_archive_lock = threading.Lock()
+
+
+def get_result_archive():
+    """
+    Return the process-wide result archive.
+    """
+    global _archive
+    with _archive_lock:
+        if _archive is None:
+            _archive = ResultArchive()
+        return _archive
+
+
+def archive_result(agent, inputs, content, title=None, completion=None):
+    """
+    Archive a freshly generated result; archiving problems never fail the agent call.
+    """
+    if not content:
+        return None
+    try:
+        return get_result_archive().store(agent, inputs, content, title=title, completion=completion)
+    except sqlite3.Error:
+        return None
+
+
+def latest_result(agent, inputs):
+    """
+    Most recent archived result for exactly these inputs; archiving problems read as no result.
+    """
+    try:
+        return get_result_archive().latest(agent, inputs)
+    except sqlite3.Error:
+        return None
+
+
+def benchmark(path, documents, queries=("liquidity risk", "emerging markets volatility", "compliance deadline",
+                                        "tech equit", "term900 liquidity")):
+    """
+    Fill an archive at path with synthetic documents and time ranked searches against it, first
+    uncached and then repeated. Ranking cost grows with the number of matching documents, so it
+    is printed alongside.
+    """
+    archive = ResultArchive(path)
+    # Zipf-distributed vocabulary: a few common domain words and a long tail of rarer terms
+    domain = (
+        "market volatility liquidity exposure equities bonds emerging markets credit default currency "
+        "interest rate compliance deadline regulatory portfolio concentration hedge tech sector energy "
+        "commodities crypto real estate schedule budget resource project milestone alert mitigation outlook"
+    ).split()
+    vocabulary = domain + [f"term{n}" for n in range(20000)]
+    rng = random.Random(7)
+    cumulative = list(itertools.accumulate(1 / (rank + 10) for rank in range(len(vocabulary))))
+    agents = list(AGENT_LABELS)
+    existing = archive.stats()["results"]
+    with archive._connection() as conn:
+        conn.execute("BEGIN")
+        for i in range(existing, documents):
+            text = " ".join(rng.choices(vocabulary, cum_weights=cumulative, k=150))
+            agent = agents[i % len(agents)]
+            conn.execute(
+                "INSERT INTO results (agent, title, inputs, input_key, content, content_hash, created) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (agent, f"Synthetic {agent} #{i}", "{}", f"bench-{i}", text, f"bench-{i}", time.time()),
+            )
+        conn.execute("COMMIT")
+
+    total = archive.stats()["results"]
+    for text in queries:
+        with archive._connection() as conn:
+            matches = conn.execute(
+                "SELECT COUNT(*) FROM results_fts WHERE results_fts MATCH ?", (archive.match_expression(text),)
+            ).fetchone()[0]
+        timings = []
+        for _ in range(5):
+            archive._search_cache.clear()
+            timings.append(archive.search(text)[1])
+        timings.sort()
+        cached = archive.search(text)[1]
+        print(f"{text!r}: {timings[len(timings) // 2]:.1f} ms median over {total:,} documents ({matches:,} matches), "
+              f"{cached:.2f} ms repeated")
+
+
+if __name__ == "__main__":
+    # python -m services.result_archive [DOCUMENTS] [PATH]
+    benchmark(
+        sys.argv[2] if len(sys.argv) > 2 else os.path.join(".cache", "archive_benchmark.sqlite"),
+        int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000,
+    )
@@ -0,0 +1,96 @@
+import pytest
+
+from agents.circuit_breaker import (
+    CircuitBreaker, CircuitOpenError, STATE_CLOSED, STATE_OPEN, STATE_HALF_OPEN, MIN_CALLS, slow_call_threshold,
+)
+from agents.model_router import AGENT_POLICY
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("agents.circuit_breaker.time.time", lambda: now[0])
+    return now
+
+
+def opened(clock):
+    breaker = CircuitBreaker("test_agent", slow_call_seconds=5, open_seconds=30)
+    for _ in range(MIN_CALLS):
+        breaker.record(False, 0.1)
+    assert breaker.state == STATE_OPEN
+    return breaker
+
+
+def test_opens_on_error_rate_and_fails_fast(clock):
+    breaker = opened(clock)
+    assert not breaker.allow_request()
+    assert breaker.stats()["fast_failures"] == 1
+
+
+def test_half_open_lets_one_trial_through(clock):
+    breaker = opened(clock)
+    clock[0] += 30
+    assert breaker.allow_request()
+    assert breaker.state == STATE_HALF_OPEN
+    assert not breaker.allow_request()
+
+
+def test_fast_successful_trial_closes(clock):
+    breaker = opened(clock)
+    clock[0] += 30
+    breaker.allow_request()
+    breaker.record(True, 1.0)
+    assert breaker.state == STATE_CLOSED
+    assert breaker.allow_request()
+
+
+@pytest.mark.parametrize("success, latency", [(False, 0.1), (True, 6.0)])
+def test_failed_or_slow_trial_reopens(clock, success, latency):
+    breaker = opened(clock)
+    clock[0] += 30
+    breaker.allow_request()
+    breaker.record(success, latency)
+    assert breaker.state == STATE_OPEN
+    assert not breaker.allow_request()
+
+
+def test_abandoned_trial_is_replaced(clock):
+    breaker = opened(clock)
+    clock[0] += 30
+    assert breaker.allow_request()
+    clock[0] += 10
+    assert breaker.allow_request()
+
+
+def test_call_serves_stale_answer_then_fallback(clock):
+    breaker = CircuitBreaker("test_agent")
+    assert breaker.call(lambda: "fresh", key="q") == "fresh"
+
+    def fail():
+        raise RuntimeError("down")
+
+    assert breaker.call(fail, key="q").endswith("fresh")
+    assert "locally computed" in breaker.call(fail, key="other", fallback=lambda: "local")
+    with pytest.raises(RuntimeError):
+        breaker.call(fail, key="other")
+    for _ in range(MIN_CALLS):
+        breaker.record(False, 0.1)
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: "fresh", key="other")
+
+
+def test_threshold_covers_each_agents_latency_budget():
+    for name, policy in AGENT_POLICY.items():
+        assert slow_call_threshold(name) >= policy["latency_budget"]
+
+
+def test_untimed_calls_only_count_errors(clock, monkeypatch):
+    ticks = iter(range(0, 1000, 60))
+    monkeypatch.setattr("agents.circuit_breaker.time.perf_counter", lambda: next(ticks))
+    breaker = CircuitBreaker("test_agent", slow_call_seconds=5)
+    for _ in range(MIN_CALLS):
+        assert breaker.call(lambda: "report", key="r", timed=False) == "report"
+    assert breaker.state == STATE_CLOSED
+    for _ in range(MIN_CALLS):
+        breaker.call(lambda: "answer", key="q")
+    assert breaker.state == STATE_OPEN
@@ -0,0 +1,60 @@
+from services.dashboard_snapshot import DashboardSnapshot
+
+
+def snapshot():
+    return DashboardSnapshot({
+        "market": lambda value: {"market_risk_index": value},
+        "risk": lambda value: {"portfolio_health": value},
+    })
+
+
+def test_record_waits_for_every_source():
+    dashboard = snapshot()
+    dashboard.update("market", 30.0, 1)
+    assert dashboard.current() is None
+    dashboard.update("risk", 55.0, 1)
+    record = dashboard.current()
+    assert record["metrics"] == {"market_risk_index": 30.0, "portfolio_health": 55.0}
+    assert record["deltas"] == {"market_risk_index": None, "portfolio_health": None}
+    assert record["updated_by"] == "risk"
+
+
+def test_update_recomputes_one_source_and_tracks_deltas():
+    dashboard = snapshot()
+    dashboard.update("market", 30.0, 1)
+    dashboard.update("risk", 55.0, 1)
+    dashboard.update("market", 34.5, 2)
+    record = dashboard.current()
+    assert record["metrics"]["market_risk_index"] == 34.5
+    assert record["deltas"] == {"market_risk_index": 4.5, "portfolio_health": 0.0}
+    assert record["versions"] == {"market": 2, "risk": 1}
+
+
+def test_out_of_order_versions_are_ignored():
+    dashboard = snapshot()
+    dashboard.update("market", 30.0, 1)
+    dashboard.update("risk", 55.0, 1)
+    dashboard.update("market", 40.0, 3)
+    dashboard.update("market", 35.0, 2)
+    assert dashboard.current()["metrics"]["market_risk_index"] == 40.0
+
+
+def test_unchanged_metrics_keep_the_record():
+    dashboard = snapshot()
+    dashboard.update("market", 30.0, 1)
+    dashboard.update("risk", 55.0, 1)
+    before = dashboard.current()
+    dashboard.update("risk", 55.0, 2)
+    after = dashboard.current()
+    assert after["updated_at"] == before["updated_at"]
+    assert after["versions"] == {"market": 1, "risk": 2}
+
+
+def test_failing_component_keeps_last_metrics():
+    dashboard = DashboardSnapshot({"market": lambda frame: {"market_risk_index": 1 / frame}})
+    dashboard.update("market", 2, 1)
+    dashboard.update("market", 0, 2)
+    assert dashboard.current()["metrics"] == {"market_risk_index": 0.5}
+    assert "division by zero" in dashboard.errors["market"]
+    dashboard.update("unknown", 1, 1)
+    assert "unknown" not in dashboard.errors
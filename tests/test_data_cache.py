@@ -0,0 +1,42 @@
+import pandas as pd
+
+from services.data_cache import DataSource
+
+
+def frame(exposure):
+    return pd.DataFrame({"Asset": ["US Equities", "EU Bonds"], "Current_Exposure": [exposure, 40]})
+
+
+def source_of(*frames):
+    loads = iter(frames)
+    source = DataSource("risk", lambda: next(loads), ttl=0)
+    versions = []
+    source.subscribe(lambda name, snapshot, version: versions.append(version))
+    return source, versions
+
+
+def test_reload_with_same_content_keeps_snapshot_and_version():
+    source, versions = source_of(frame(60), frame(60))
+    first = source.get()
+    source._load()
+    assert source.snapshot is first
+    assert source.version == 1
+    assert versions == [1]
+
+
+def test_reload_with_new_content_bumps_version():
+    source, versions = source_of(frame(60), frame(55))
+    source.get()
+    source._load()
+    assert source.snapshot["Current_Exposure"].tolist() == [55, 40]
+    assert source.version == 2
+    assert versions == [1, 2]
+
+
+def test_empty_reload_keeps_good_data():
+    source, versions = source_of(frame(60), pd.DataFrame())
+    first = source.get()
+    source._load()
+    assert source.snapshot is first
+    assert source.status()["last_error"] == "risk loader returned no data"
+    assert versions == [1]
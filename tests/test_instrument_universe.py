@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services import instrument_universe
+from services.instrument_universe import (
+    ASSET_CLASSES, FACTOR_WEIGHTS, generate_universe, load_universe, score_universe, asset_class_risk,
+)
+
+
+def small_universe():
+    return pd.DataFrame(
+        {
+            "Asset_Class": pd.Categorical(["Equities", "Equities", "Bonds", "Bonds"], categories=list(ASSET_CLASSES)),
+            "Issuer": np.array([0, 1, 2, 2], dtype=np.int32),
+            "Volatility": np.array([40, 100, 8, 16], dtype=np.float32),
+            "Liquidity": np.array([80, 50, 70, 100], dtype=np.float32),
+            "Exposure": np.array([100, 300, 200, 400], dtype=np.float32),
+        },
+        index=pd.RangeIndex(1, 5, name="Instrument_ID"),
+    )
+
+
+@pytest.fixture
+def scored(monkeypatch):
+    # Issuer share is scored against the whole class, so 25% of a class scores 25
+    monkeypatch.setattr(instrument_universe, "CONCENTRATION_LIMIT", 1.0)
+    return score_universe(small_universe())
+
+
+def test_factors_match_hand_computed_values(scored):
+    # Volatility is capped at VOLATILITY_CAP, exposure is the position's percentile in the book
+    assert scored["Volatility_Factor"].tolist() == pytest.approx([50, 100, 10, 20])
+    assert scored["Liquidity_Factor"].tolist() == pytest.approx([20, 50, 30, 0])
+    assert scored["Concentration_Factor"].tolist() == pytest.approx([25, 75, 100, 100])
+    assert scored["Exposure_Factor"].tolist() == pytest.approx([0, 200 / 3, 100 / 3, 100], rel=1e-5)
+    assert scored["Risk_Score"].tolist() == pytest.approx([30, 77.5, 36.5, 43], rel=1e-5)
+
+
+def test_weights_are_normalized():
+    assert sum(FACTOR_WEIGHTS.values()) == pytest.approx(1.0)
+    only_volatility = {name: 2.0 if name == "Volatility_Factor" else 0.0 for name in FACTOR_WEIGHTS}
+    scored = score_universe(small_universe(), weights=only_volatility)
+    assert scored["Risk_Score"].tolist() == pytest.approx(scored["Volatility_Factor"].tolist())
+
+
+def test_class_risk_is_exposure_weighted(scored):
+    class_risk = asset_class_risk(scored).set_index("Asset")
+    assert list(class_risk.index) == list(ASSET_CLASSES)
+    assert class_risk.loc["Equities", "Risk_Score"] == pytest.approx(65.6)
+    assert class_risk.loc["Bonds", "Risk_Score"] == pytest.approx(40.8)
+    assert class_risk.loc["Bonds", "Concentration_Factor"] == pytest.approx(100)
+    assert class_risk["Instruments"].tolist() == [2, 2, 0, 0, 0, 0, 0, 0]
+    # Classes without instruments score zero rather than dividing by zero
+    assert class_risk.loc["Cryptocurrency", ["Exposure", "Risk_Score"]].tolist() == [0, 0]
+
+
+def test_factors_stay_in_range():
+    scored = score_universe(generate_universe(size=5000))
+    for name in list(FACTOR_WEIGHTS) + ["Risk_Score"]:
+        assert scored[name].between(0, 100).all(), name
+
+
+def test_load_universe_round_trips_a_csv(tmp_path):
+    path = tmp_path / "universe.csv"
+    small_universe().to_csv(path)
+    universe = load_universe(str(path))
+    assert universe["Asset_Class"].dtype == pd.CategoricalDtype(list(ASSET_CLASSES))
+    assert universe["Exposure"].dtype == np.float32
+    assert universe["Asset_Class"].cat.codes.min() >= 0
+
+
+def test_load_universe_rejects_unknown_classes(tmp_path):
+    path = tmp_path / "universe.csv"
+    universe = small_universe()
+    universe["Asset_Class"] = ["Equities", "Stocks", "Bonds", None]
+    universe.to_csv(path)
+    with pytest.raises(ValueError, match="unknown asset classes Stocks; 1 instruments without an asset class"):
+        load_universe(str(path))
@@ -0,0 +1,124 @@
+import sqlite3
+import time
+
+import pytest
+
+from services.job_queue import JobQueue, STATUS_QUEUED, STATUS_RUNNING, STATUS_DONE, STATUS_FAILED
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = JobQueue(path=str(tmp_path / "jobs.sqlite"), workers=1, lease=60)
+    queue.register("echo", lambda params: params["text"])
+    return queue
+
+
+def claim(queue):
+    with queue._connection() as conn:
+        return queue._claim(conn)
+
+
+def finish(queue, job, status, result=None, error=None):
+    with queue._connection() as conn:
+        return queue._finish(conn, job, status, result, error)
+
+
+def test_claims_oldest_job_of_registered_kinds(queue):
+    queue.submit("other", {})
+    first = queue.submit("echo", {"text": "a"})
+    queue.submit("echo", {"text": "b"})
+    job = claim(queue)
+    assert job["id"] == first
+    assert job["status"] == STATUS_RUNNING
+    assert queue.get(first)["status"] == STATUS_RUNNING
+    assert claim(queue)["params"] == '{"text": "b"}'
+    assert claim(queue) is None
+
+
+def test_finish_records_outcome(queue):
+    job_id = queue.submit("echo", {"text": "a"})
+    job = claim(queue)
+    assert finish(queue, job, *queue._run(job)) == 1
+    stored = queue.get(job_id)
+    assert (stored["status"], stored["result"], stored["error"]) == (STATUS_DONE, "a", None)
+
+
+def test_handler_errors_are_stored(queue):
+    def fail(params):
+        raise RuntimeError("model unavailable")
+
+    queue.register("fail", fail)
+    queue.register("empty", lambda params: "")
+    failed, empty = queue.submit("fail", {}), queue.submit("empty", {})
+    for _ in range(2):
+        job = claim(queue)
+        finish(queue, job, *queue._run(job))
+    assert queue.get(failed)["status"] == STATUS_FAILED
+    assert queue.get(failed)["error"] == "model unavailable"
+    assert queue.get(empty)["error"] == "The job produced no result"
+
+
+def test_expired_lease_is_requeued_and_late_outcome_dropped(queue):
+    job_id = queue.submit("echo", {"text": "a"})
+    stale = claim(queue)
+    # The first worker went quiet past its lease
+    with queue._connection() as conn:
+        conn.execute("UPDATE jobs SET started = ? WHERE id = ?", (time.time() - 120, job_id))
+    stale["started"] = time.time() - 120
+
+    reclaimed = claim(queue)
+    assert reclaimed["id"] == job_id
+    assert finish(queue, stale, STATUS_DONE, "late") == 0
+    assert finish(queue, reclaimed, STATUS_DONE, "fresh") == 1
+    assert queue.get(job_id)["result"] == "fresh"
+
+
+def test_running_job_within_lease_is_left_alone(queue):
+    job_id = queue.submit("echo", {"text": "a"})
+    claim(queue)
+    # A second process opening the same queue must not steal a live job
+    other = JobQueue(path=queue.path, workers=1, lease=60)
+    other.register("echo", lambda params: params["text"])
+    assert claim(other) is None
+    assert other.get(job_id)["status"] == STATUS_RUNNING
+
+
+def test_restart_requeues_jobs_past_their_lease(queue):
+    job_id = queue.submit("echo", {"text": "a"})
+    claim(queue)
+    with queue._connection() as conn:
+        conn.execute("UPDATE jobs SET started = ? WHERE id = ?", (time.time() - 120, job_id))
+    JobQueue(path=queue.path, workers=1, lease=60)
+    stored = queue.get(job_id)
+    assert (stored["status"], stored["started"]) == (STATUS_QUEUED, None)
+
+
+def test_worker_backs_off_when_claim_fails(queue, monkeypatch):
+    waits = []
+
+    class Stop:
+        def is_set(self):
+            return len(waits) >= 6
+
+        def wait(self, seconds):
+            waits.append(seconds)
+
+    def locked(conn):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(queue, "_stop", Stop())
+    monkeypatch.setattr(queue, "_claim", locked)
+    queue._worker()
+    assert waits == [0.5, 1.0, 2.0, 4.0, 8.0, 10.0]
+
+
+def test_worker_runs_submitted_jobs(queue):
+    job_id = queue.submit("echo", {"text": "hello"})
+    queue.start()
+    try:
+        deadline = time.time() + 10
+        while queue.get(job_id)["status"] != STATUS_DONE and time.time() < deadline:
+            time.sleep(0.05)
+    finally:
+        queue.stop()
+    assert queue.get(job_id)["result"] == "hello"
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.live_ticks import RingBuffer, TickHub, TickSnapshot
+
+
+def ticks(*values):
+    values = np.asarray(values, dtype=np.float64)
+    return values, values * 10, values * 100
+
+
+def test_ring_buffer_wraps_around_in_arrival_order():
+    buffer = RingBuffer(capacity=5)
+    buffer.extend(*ticks(1, 2, 3))
+    assert buffer.ordered()[0].tolist() == [1, 2, 3]
+    buffer.extend(*ticks(4, 5, 6, 7))
+    timestamps, prices, volumes = buffer.ordered()
+    assert timestamps.tolist() == [3, 4, 5, 6, 7]
+    assert prices.tolist() == [30, 40, 50, 60, 70]
+    assert volumes.tolist() == [300, 400, 500, 600, 700]
+    assert buffer.count == 5 and buffer.position == 2
+
+
+def test_ring_buffer_keeps_the_newest_of_an_oversized_batch():
+    buffer = RingBuffer(capacity=3)
+    buffer.extend(*ticks(1))
+    buffer.extend(*ticks(2, 3, 4, 5, 6))
+    timestamps, _, _ = buffer.ordered()
+    assert timestamps.tolist() == [4, 5, 6]
+    with pytest.raises(ValueError):
+        timestamps[0] = 0
+
+
+def test_ingest_lines_parses_and_skips_malformed_ticks():
+    hub = TickHub(feed="file:unused", capacity=10)
+    hub.ingest_lines([
+        "1.0,S&P500,4650.5,10\n",
+        "2.0,S&P500,4651.0",
+        "2.5,DJIA,33900",
+        "3.0,NASDAQ",
+        "x,DJIA,33901",
+        "4.0,DJIA,n/a",
+        "",
+    ])
+    hub.publish()
+    snapshot = hub.snapshot()
+    assert snapshot.version == 1 and snapshot.ticks_total == 3
+    assert [array.tolist() for array in snapshot.series["S&P500"]] == [[1.0, 2.0], [4650.5, 4651.0], [10.0, 0.0]]
+    assert snapshot.series["DJIA"][1].tolist() == [33900.0]
+    assert "NASDAQ" not in snapshot.series
+
+    # Nothing new: the published snapshot is kept
+    hub.ingest_lines(["garbage"])
+    hub.publish()
+    assert hub.snapshot() is snapshot
+
+
+def test_partial_line_waits_for_the_rest_of_the_tick(tmp_path):
+    path = tmp_path / "feed.csv"
+    hub = TickHub(feed=f"file:{path}", capacity=10)
+    with open(path, "w") as writer, open(path) as reader:
+        writer.write("1.0,S&P500,46")
+        writer.flush()
+        pending = hub._ingest_text(reader.read())
+        assert pending == "1.0,S&P500,46"
+        hub.publish()
+        assert hub.snapshot().version == 0
+
+        writer.write("50.5\n2.0,DJIA,339")
+        writer.flush()
+        pending = hub._ingest_text(pending + reader.read())
+    hub.publish()
+    assert pending == "2.0,DJIA,339"
+    assert hub.snapshot().series["S&P500"][1].tolist() == [4650.5]
+    assert "DJIA" not in hub.snapshot().series
+
+
+def snapshot():
+    series = {
+        "A": (np.array([0.0, 10.0, 20.0]), np.array([1.0, 2.0, 3.0]), np.zeros(3)),
+        "B": (np.array([5.0, 15.0]), np.array([10.0, 20.0]), np.zeros(2)),
+        "Empty": (np.array([]), np.array([]), np.array([])),
+    }
+    return TickSnapshot(1, series, 5, 0.0)
+
+
+def test_frame_carries_the_last_price_forward_on_a_common_grid():
+    frame = snapshot().frame(seconds=20, points=5)
+    assert list(frame.columns) == ["A", "B"]
+    assert frame.index.tolist() == list(pd.to_datetime([0, 5, 10, 15, 20], unit="s"))
+    assert frame["A"].tolist() == [1, 1, 2, 2, 3]
+    assert np.isnan(frame["B"].iloc[0])
+    assert frame["B"].tolist()[1:] == [10, 10, 20, 20]
+
+
+def test_frame_is_memoized_and_limited_to_the_requested_instruments():
+    snap = snapshot()
+    assert snap.frame(seconds=20, points=5) is snap.frame(seconds=20, points=5)
+    frame = snap.frame(["B", "Missing"], seconds=10, points=3)
+    assert frame["B"].tolist() == [10, 10, 20]
+    assert frame.index[-1] == pd.to_datetime(15, unit="s")
+    assert snap.frame(["Empty"]).empty
@@ -0,0 +1,49 @@
+import pytest
+
+from agents import model_router
+from agents.model_router import route, record, query_complexity, SMALL_MODEL, LARGE_MODEL, ModelStats, MODELS
+
+
+@pytest.fixture(autouse=True)
+def fresh_stats(monkeypatch):
+    monkeypatch.setattr(model_router, "_stats", {model: ModelStats(model) for model in MODELS})
+    monkeypatch.setattr(model_router, "ROUTING_ENABLED", True)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("agents.model_router.time.time", lambda: now[0])
+    return now
+
+
+SIMPLE = "Outlook for bonds"
+COMPLEX = "Compare hedging strategy scenarios for a multi-asset portfolio under regulatory stress"
+
+
+def test_complexity_picks_the_model():
+    assert query_complexity(SIMPLE) == 0
+    assert query_complexity(COMPLEX) > 0
+    assert route("market_analysis", SIMPLE) == [SMALL_MODEL, LARGE_MODEL]
+    assert route("market_analysis", COMPLEX) == [LARGE_MODEL, SMALL_MODEL]
+
+
+def test_slow_model_is_demoted_until_its_samples_expire(clock):
+    for _ in range(5):
+        record(SMALL_MODEL, 12.0)
+        record(LARGE_MODEL, 3.0)
+    assert route("market_analysis", SIMPLE) == [LARGE_MODEL, SMALL_MODEL]
+    clock[0] += model_router.LATENCY_MAX_AGE_SECONDS + 1
+    assert route("market_analysis", SIMPLE) == [SMALL_MODEL, LARGE_MODEL]
+
+
+def test_erroring_model_cools_down(clock):
+    record(SMALL_MODEL, 0.5, error=True)
+    assert route("market_analysis", SIMPLE) == [LARGE_MODEL, SMALL_MODEL]
+    clock[0] += model_router.ERROR_COOLDOWN_SECONDS + 1
+    assert route("market_analysis", SIMPLE) == [SMALL_MODEL, LARGE_MODEL]
+
+
+def test_routing_can_be_disabled(monkeypatch):
+    monkeypatch.setattr(model_router, "ROUTING_ENABLED", False)
+    assert route("market_analysis", SIMPLE) == [LARGE_MODEL]
@@ -0,0 +1,130 @@
+import threading
+
+import pytest
+
+from agents.pipeline import Node, Pipeline
+
+
+def test_cycle_is_rejected():
+    with pytest.raises(ValueError, match="cycle"):
+        Pipeline([
+            Node("a", lambda inputs: "a", deps=["c"]),
+            Node("b", lambda inputs: "b", deps=["a"]),
+            Node("c", lambda inputs: "c", deps=["b"]),
+        ])
+
+
+def test_cycle_through_partial_dependency_is_rejected():
+    with pytest.raises(ValueError, match="cycle"):
+        Pipeline([
+            Node("a", lambda inputs: iter(["a"]), deps=["b"], stream=True),
+            Node("b", lambda inputs: "b", partial_deps={"a": 1}),
+        ])
+
+
+def test_unknown_dependency_is_rejected():
+    with pytest.raises(ValueError, match="unknown node 'missing'"):
+        Pipeline([Node("a", lambda inputs: "a", deps=["missing"])])
+
+
+def test_partial_dependency_needs_a_streaming_node():
+    with pytest.raises(ValueError, match="non-streaming"):
+        Pipeline([
+            Node("a", lambda inputs: "a"),
+            Node("b", lambda inputs: "b", partial_deps={"a": 1}),
+        ])
+
+
+def test_outputs_flow_downstream():
+    result = Pipeline([
+        Node("market", lambda inputs: "M"),
+        Node("risk", lambda inputs: "R"),
+        Node("report", lambda inputs: inputs["market"] + inputs["risk"], deps=["market", "risk"]),
+    ]).run()
+    assert result.outputs == {"market": "M", "risk": "R", "report": "MR"}
+    assert result.errors == {}
+    assert result.critical_path()[-1] == "report"
+
+
+def test_partial_dependency_starts_before_the_stream_ends():
+    release = threading.Event()
+    seen = {}
+
+    def stream(inputs):
+        yield "first "
+        yield "chunk "
+        # Only finish once the downstream node has run on the partial output
+        assert release.wait(5)
+        yield "rest"
+
+    def consumer(inputs):
+        seen["market"] = inputs["market"]
+        release.set()
+        return "done"
+
+    result = Pipeline([
+        Node("market", stream, stream=True),
+        Node("risk", consumer, partial_deps={"market": 10}),
+    ]).run()
+    assert seen["market"].startswith("first chunk")
+    assert "rest" not in seen["market"]
+    assert result.outputs["market"] == "first chunk rest"
+    assert result.timings["risk"]["released_by"] == "market"
+
+
+def test_partial_dependency_gets_full_output_when_already_finished():
+    result = Pipeline([
+        Node("market", lambda inputs: iter(["short"]), stream=True),
+        Node("risk", lambda inputs: inputs["market"], partial_deps={"market": 100}),
+    ]).run()
+    assert result.outputs["risk"] == "short"
+
+
+def test_failed_node_is_recorded_and_dependents_still_run():
+    def fail(inputs):
+        raise RuntimeError("upstream down")
+
+    result = Pipeline([
+        Node("market", fail),
+        Node("risk", lambda inputs: f"market={inputs['market']}", deps=["market"]),
+    ]).run()
+    assert isinstance(result.errors["market"], RuntimeError)
+    assert result.outputs == {"market": None, "risk": "market=None"}
+
+
+def test_stream_failure_is_recorded_after_releasing_dependents():
+    started = threading.Event()
+
+    def stream(inputs):
+        yield "x" * 20
+        assert started.wait(5)
+        raise RuntimeError("stream dropped")
+
+    def consumer(inputs):
+        started.set()
+        return len(inputs["market"])
+
+    result = Pipeline([
+        Node("market", stream, stream=True),
+        Node("risk", consumer, partial_deps={"market": 10}),
+    ]).run()
+    assert str(result.errors["market"]) == "stream dropped"
+    assert result.outputs["market"] is None
+    assert result.outputs["risk"] == 20
+
+
+def test_agent_errors_reach_the_pipeline_instead_of_the_page(monkeypatch):
+    from agents import project_status
+    from agents.circuit_breaker import CircuitBreaker
+
+    def unreachable(*args, **kwargs):
+        raise ConnectionError("Connection error.")
+
+    monkeypatch.setattr(project_status, "chat_completion", unreachable)
+    monkeypatch.setattr(project_status, "breaker", CircuitBreaker("test_project_status"))
+    monkeypatch.setattr("agents.circuit_breaker.latest_result", lambda agent, inputs: None)
+    result = Pipeline([
+        Node("project", lambda inputs: project_status.project_status_agent("Alpha", "Vendor slipped", raise_errors=True)),
+    ]).run()
+    assert isinstance(result.errors["project"], ConnectionError)
+    assert result.outputs["project"] is None
@@ -0,0 +1,68 @@
+from types import SimpleNamespace
+
+import pytest
+
+from agents import prompts, model_router
+from agents.prompts import (
+    render_prompt, max_tokens_for, observe_completion, MARKDOWN_FORMAT, SAMPLE_FIELDS,
+    DEFAULT_MAX_TOKENS, ADAPTIVE_MIN_SAMPLES, MAX_MAX_TOKENS,
+)
+from agents.structured_output import structured_messages
+
+
+@pytest.fixture(autouse=True)
+def fresh_stats(monkeypatch):
+    monkeypatch.setattr(prompts, "_template_stats", {})
+    monkeypatch.setattr(prompts, "_output_lengths", {})
+
+
+def usage(prompt_tokens, completion_tokens):
+    return SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+
+def test_markdown_instruction_only_in_markdown_mode():
+    markdown = render_prompt("risk_scoring", version="v2", **SAMPLE_FIELDS["risk_scoring"])
+    structured = render_prompt("risk_scoring", version="v2", structured=True, **SAMPLE_FIELDS["risk_scoring"])
+    assert markdown[0]["content"].endswith(MARKDOWN_FORMAT)
+    assert "Markdown" not in structured_messages("risk_scoring", structured)[0]["content"]
+    assert structured.structured and not markdown.structured
+
+
+def test_caps_are_learned_per_output_mode_from_usage():
+    markdown = render_prompt("risk_scoring", version="v2", **SAMPLE_FIELDS["risk_scoring"])
+    structured = render_prompt("risk_scoring", version="v2", structured=True, **SAMPLE_FIELDS["risk_scoring"])
+    for _ in range(ADAPTIVE_MIN_SAMPLES):
+        observe_completion(markdown, "short", 1.0, usage(100, 200))
+        observe_completion(structured, "short", 1.0, usage(100, 500))
+    assert max_tokens_for("risk_scoring") == 256
+    assert max_tokens_for("risk_scoring", structured=True) == 640
+    rows = {row["Output"]: row for row in prompts.prompt_report()}
+    assert rows["Markdown"]["Avg Output Tokens"] == 200
+    assert rows["JSON"]["Avg Output Tokens"] == 500
+
+
+def test_truncated_completion_raises_the_next_cap():
+    messages = render_prompt("project_status", version="v2", project_name="P", context="Vendor slipped")
+    default = DEFAULT_MAX_TOKENS["project_status"]
+    observe_completion(messages, "cut", 1.0, usage(80, default), finish_reason="length")
+    assert max_tokens_for("project_status") == min(default * 2, MAX_MAX_TOKENS)
+    assert prompts.prompt_report()[0]["Truncated"] == 1
+
+
+def test_chat_completion_retries_a_truncated_answer(monkeypatch):
+    caps = []
+
+    def create(**kwargs):
+        caps.append(kwargs["max_tokens"])
+        finish = "length" if len(caps) == 1 else "stop"
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="x" * len(caps)), finish_reason=finish)],
+            usage=usage(10, kwargs["max_tokens"]),
+        )
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(model_router, "record", lambda *args, **kwargs: None)
+    messages = render_prompt("market_analysis", version="v2", query="Retry test query for truncation")
+    assert model_router.chat_completion(client, "market_analysis", messages, max_tokens=512) == "xx"
+    assert caps == [512, 1024]
+    assert model_router.last_completion()["finish_reason"] == "stop"
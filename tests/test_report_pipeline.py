@@ -0,0 +1,160 @@
+import threading
+from datetime import datetime
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from agents import prompts, model_router, report_pipeline
+from agents.model_router import SMALL_MODEL, LARGE_MODEL
+from agents.report_pipeline import (
+    SummaryCache, timeframe_window, filter_to_window, chunk_dataset, reduce_summaries, generate_report,
+    REDUCE_TOKEN_BUDGET, CHARS_PER_TOKEN,
+)
+
+
+class FakeClient:
+    """Chat client answering every prompt with a numbered summary and counting the calls."""
+
+    def __init__(self, reply=None):
+        self.calls = []
+        self.reply = reply or (lambda n: f"summary {n}")
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        with self._lock:
+            self.calls.append(kwargs)
+            content = self.reply(len(self.calls))
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content), finish_reason="stop")], usage=None
+        )
+
+
+@pytest.fixture(autouse=True)
+def isolated(monkeypatch, tmp_path):
+    monkeypatch.setattr(prompts, "_template_stats", {})
+    monkeypatch.setattr(prompts, "_output_lengths", {})
+    monkeypatch.setattr(model_router, "record", lambda *args, **kwargs: None)
+    monkeypatch.setattr(model_router, "ROUTING_ENABLED", True)
+    cache = SummaryCache(str(tmp_path / "summaries.sqlite"))
+    monkeypatch.setattr(report_pipeline, "get_summary_cache", lambda: cache)
+    return cache
+
+
+def alerts(days=75, end=None):
+    dates = pd.date_range(end=pd.Timestamp(end or datetime.now()).normalize(), periods=days, freq="D")
+    return pd.DataFrame({
+        "Date": dates,
+        "Severity": ["High" if i % 3 == 0 else "Low" for i in range(days)],
+        "Description": [f"Alert number {i} on exposure limits" for i in range(days)],
+    })
+
+
+def test_timeframe_window_spans_whole_days():
+    now = datetime(2025, 3, 10, 15, 30)
+    assert timeframe_window("Daily", now) == (pd.Timestamp("2025-03-10"), pd.Timestamp("2025-03-11"))
+    assert timeframe_window("Quarterly", now) == (pd.Timestamp("2024-12-11"), pd.Timestamp("2025-03-11"))
+    assert timeframe_window("Custom (2025-01-01 to 2025-01-31)", now) == (
+        pd.Timestamp("2025-01-01"), pd.Timestamp("2025-02-01"))
+    # Unknown labels fall back to a month; the window only moves at midnight
+    assert timeframe_window("Fortnightly", now)[0] == pd.Timestamp("2025-02-09")
+    assert timeframe_window("Weekly", datetime(2025, 3, 10, 0, 5)) == timeframe_window("Weekly", now)
+
+
+def test_filter_to_window_by_dates_overlap_or_not_at_all():
+    start, end = pd.Timestamp("2025-02-01"), pd.Timestamp("2025-03-01")
+    dated = alerts(days=90, end="2025-03-31")
+    kept = filter_to_window("alerts", dated, start, end)
+    assert kept["Date"].between(start, end).all() and len(kept) == 29
+
+    indexed = dated.set_index("Date")
+    assert len(filter_to_window("market", indexed, start, end)) == 29
+
+    projects = pd.DataFrame({
+        "Project_Name": ["Done", "Running", "Later"],
+        "Start_Date": pd.to_datetime(["2024-06-01", "2025-01-15", "2025-04-01"]),
+        "Due_Date": pd.to_datetime(["2024-12-31", "2025-06-30", "2025-09-30"]),
+    })
+    assert filter_to_window("projects", projects, start, end)["Project_Name"].tolist() == ["Running"]
+
+    exposures = pd.DataFrame({"Asset": ["Bonds"], "Current_Exposure": [25]})
+    assert filter_to_window("risk", exposures, start, end) is exposures
+
+
+def test_chunks_follow_calendar_months_and_the_token_budget():
+    data = alerts(days=90, end="2025-03-31")
+    chunks = chunk_dataset("alerts", data)
+    assert [chunk["period"] for chunk in chunks] == ["2025-01", "2025-02", "2025-03"]
+
+    small = chunk_dataset("alerts", data, token_budget=200)
+    assert len(small) > len(chunks)
+    assert {chunk["period"] for chunk in small} == {"2025-01", "2025-02", "2025-03"}
+    header = small[0]["text"].splitlines()[0]
+    rows = []
+    for chunk in small:
+        lines = chunk["text"].splitlines()
+        assert lines[0] == header
+        assert len(chunk["text"]) // CHARS_PER_TOKEN <= 200 or len(lines) == 2
+        rows.extend(lines[1:])
+    assert len(rows) == 90
+
+
+def test_chunk_digest_ignores_reloads_and_sliding_windows():
+    first = chunk_dataset("alerts", alerts(days=90, end="2025-03-31"))
+    # The same records reloaded, and the window sliding into a new month: earlier chunks keep their digest
+    reloaded = chunk_dataset("alerts", alerts(days=90, end="2025-03-31").astype({"Date": "datetime64[s]"}))
+    slid = chunk_dataset("alerts", alerts(days=95, end="2025-04-05"))
+    assert [c["digest"] for c in reloaded] == [c["digest"] for c in first]
+    assert [c["digest"] for c in slid[:-1]] == [c["digest"] for c in first]
+    assert slid[-1]["period"] == "2025-04"
+
+
+@pytest.mark.parametrize("reply_tokens, levels, calls", [(10, 4, 4), (REDUCE_TOKEN_BUDGET, 1, 7)])
+def test_reduce_terminates_even_when_merges_stay_large(isolated, reply_tokens, levels, calls):
+    client = FakeClient(reply=lambda n: f"m{n} " + "x" * reply_tokens * CHARS_PER_TOKEN)
+    # Each summary fills half a reduce prompt, so no two fit together and they are paired
+    summaries = [f"s{i} " + "s" * (REDUCE_TOKEN_BUDGET // 2) * CHARS_PER_TOKEN for i in range(8)]
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        level = reduce_summaries(client, "Risk Report", summaries, isolated, executor)
+    assert len(level) == levels
+    assert len(client.calls) == calls
+    assert all(call["model"] == SMALL_MODEL for call in client.calls)
+
+
+def test_repeated_report_only_runs_the_final_completion():
+    datasets = {"alerts": alerts(), "risk": pd.DataFrame({"Asset": ["Bonds", "Crypto"], "Current_Exposure": [25, 5]})}
+    client = FakeClient()
+    first = generate_report(client, "Risk Report", "Quarterly", "Focus on limits", datasets)
+    assert first.startswith("summary")
+    summary_calls = [call for call in client.calls if call["model"] == SMALL_MODEL]
+    assert len(summary_calls) == len(client.calls) - 1 >= 4
+
+    client.calls.clear()
+    generate_report(client, "Risk Report", "Quarterly", "Focus on limits", datasets)
+    assert len(client.calls) == 1
+    assert client.calls[0]["model"] == LARGE_MODEL
+
+
+def test_summaries_are_keyed_by_chunk_content_and_model(monkeypatch):
+    datasets = {"alerts": alerts()}
+    client = FakeClient()
+    generate_report(client, "Risk Report", "Quarterly", "", datasets)
+    months = len(chunk_dataset("alerts", datasets["alerts"]))
+
+    # A changed record only re-summarizes its own chunk (plus the reduce and the report)
+    changed = datasets["alerts"].copy()
+    changed.loc[changed.index[-1], "Severity"] = "Critical"
+    client.calls.clear()
+    generate_report(client, "Risk Report", "Quarterly", "", {"alerts": changed})
+    map_calls = [call for call in client.calls if "DATA (CSV)" in call["messages"][1]["content"]]
+    assert len(map_calls) == 1 < months
+
+    # Summaries written by another model are not served as the routed model's
+    monkeypatch.setattr(report_pipeline, "route", lambda agent, query=None: [LARGE_MODEL, SMALL_MODEL])
+    monkeypatch.setattr(model_router, "route", lambda agent, query=None: [LARGE_MODEL, SMALL_MODEL])
+    client.calls.clear()
+    generate_report(client, "Risk Report", "Quarterly", "", datasets)
+    map_calls = [call for call in client.calls if "DATA (CSV)" in call["messages"][1]["content"]]
+    assert len(map_calls) == months
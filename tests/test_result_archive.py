@@ -0,0 +1,56 @@
+import pytest
+
+from services.result_archive import ResultArchive
+
+
+@pytest.fixture
+def archive(tmp_path):
+    return ResultArchive(str(tmp_path / "archive.sqlite"))
+
+
+def test_store_is_idempotent_per_inputs_and_content(archive):
+    first = archive.store("market_analysis", {"query": "rates"}, "Rates are rising", completion={"model": "m"})
+    assert first is not None
+    assert archive.store("market_analysis", {"query": "rates"}, "Rates are rising") is None
+    assert archive.store("market_analysis", {"query": "rates"}, "Rates are falling") is not None
+    assert archive.stats()["results"] == 2
+    assert archive.get(first)["model"] == "m"
+
+
+def test_latest_matches_exact_inputs(archive):
+    archive.store("risk_scoring", {"asset_type": "Crypto", "query": "q"}, "older")
+    archive.store("risk_scoring", {"asset_type": "Crypto", "query": "q"}, "newer")
+    assert archive.latest("risk_scoring", {"query": "q", "asset_type": "Crypto"})["content"] == "newer"
+    assert archive.latest("risk_scoring", {"asset_type": "Bonds", "query": "q"}) is None
+    assert archive.latest("market_analysis", {"asset_type": "Crypto", "query": "q"}) is None
+
+
+def test_best_match_ranks_first_however_old(archive):
+    archive.store("reporting", {"n": 0}, "Liquidity liquidity liquidity stress in emerging markets")
+    for n in range(1, 60):
+        archive.store("reporting", {"n": n}, f"Report {n} mentions liquidity once among many other portfolio words")
+    rows, elapsed = archive.search("liquidity")
+    assert len(rows) == 20
+    assert rows[0]["inputs"] == '{"n": 0}'
+    assert "**Liquidity**" in rows[0]["snippet"]
+    assert elapsed >= 0
+
+
+def test_search_filters_by_agent_and_matches_prefixes(archive):
+    archive.store("market_analysis", {"q": 1}, "Tech equities rallied")
+    archive.store("risk_scoring", {"q": 2}, "Tech equity risk is high")
+    assert {row["agent"] for row in archive.search("tech equit")[0]} == {"market_analysis", "risk_scoring"}
+    assert [row["agent"] for row in archive.search("tech equit", agent="risk_scoring")[0]] == ["risk_scoring"]
+    assert archive.search("bonds")[0] == []
+    assert archive.search("  ?! ") == ([], 0.0)
+
+
+def test_repeated_search_is_cached_until_a_result_is_archived(archive):
+    archive.store("market_analysis", {"q": 1}, "Liquidity is thin")
+    assert len(archive.search("liquidity")[0]) == 1
+    assert list(archive._search_cache) == [('"liquidity"*', None, 20)]
+    rows, _ = archive.search("liquidity")
+    rows[0]["title"] = "changed by the caller"
+    assert archive.search("liquidity")[0][0]["title"] != "changed by the caller"
+    archive.store("risk_scoring", {"q": 2}, "Liquidity risk is rising")
+    assert len(archive.search("liquidity")[0]) == 2
@@ -0,0 +1,42 @@
+from agents.semantic_cache import SemanticCache
+
+QUERY = "How will rising interest rates affect tech sector equities?"
+
+
+def test_paraphrase_hits_and_unrelated_query_misses():
+    cache = SemanticCache("test")
+    cache.store(QUERY, "answer")
+    assert cache.lookup("How will interest rate hikes affect technology sector stocks?") == "answer"
+    assert cache.lookup("Outlook for emerging market sovereign debt defaults") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_namespaces_are_separate():
+    cache = SemanticCache("test")
+    cache.store(QUERY, "crypto answer", namespace="Crypto")
+    assert cache.lookup(QUERY, namespace="Crypto") == "crypto answer"
+    assert cache.lookup(QUERY, namespace="Bonds") is None
+    assert cache.lookup(QUERY) is None
+
+
+def test_expired_answers_are_not_served():
+    cache = SemanticCache("test", ttl_seconds=0)
+    cache.store(QUERY, "answer")
+    assert cache.lookup(QUERY) is None
+
+
+def test_oldest_entry_is_overwritten_at_capacity():
+    cache = SemanticCache("test", max_entries=2)
+    cache.store("Liquidity of emerging market bonds", "first")
+    cache.store("Volatility of crypto assets", "second")
+    cache.store("Commodity price outlook for energy", "third")
+    assert cache.stats()["entries"] == 2
+    assert cache.lookup("Liquidity of emerging market bonds") is None
+    assert cache.lookup("Volatility of crypto assets") == "second"
+    assert cache.lookup("Commodity price outlook for energy") == "third"
+
+
+def test_empty_answers_are_not_stored():
+    cache = SemanticCache("test")
+    cache.store(QUERY, "")
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,84 @@
+import os
+import time
+import threading
+
+import pytest
+
+from agents.singleflight import SingleFlight, sweep_inflight
+
+
+def test_concurrent_calls_share_one_upstream_call():
+    group = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "result"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(group.do("key", slow)))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(group.do("key", slow))) for _ in range(3)]
+    for thread in followers:
+        thread.start()
+    while group.stats()["coalesced"] < 3:
+        time.sleep(0.01)
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+    assert results == ["result"] * 4
+    assert len(calls) == 1
+    assert group.stats() == {"leaders": 1, "coalesced": 3, "in_flight": 0}
+
+
+def test_errors_reach_every_caller():
+    group = SingleFlight()
+
+    def fail():
+        raise RuntimeError("upstream down")
+
+    with pytest.raises(RuntimeError):
+        group.do("key", fail)
+    assert group.do("key", lambda: "retried") == "retried"
+
+
+def test_stream_replays_chunks_to_late_subscribers():
+    group = SingleFlight()
+    release = threading.Event()
+
+    def upstream():
+        yield "a"
+        release.wait(5)
+        yield "b"
+
+    first = group.stream("key", upstream)
+    assert next(first) == "a"
+    second = group.stream("key", upstream)
+    release.set()
+    assert "a" + "".join(first) == "ab"
+    assert "".join(second) == "ab"
+
+
+def test_sweep_removes_only_old_unheld_files(tmp_path):
+    fcntl = pytest.importorskip("fcntl")
+    old = time.time() - 3600
+
+    def make(name, age=old):
+        path = tmp_path / name
+        path.write_text("{}")
+        os.utime(path, (age, age))
+        return path
+
+    stale_lock, stale_result = make("a.lock"), make("a.json")
+    fresh = make("b.lock", age=time.time())
+    held = make("c.lock")
+    with open(held, "a+") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        assert sweep_inflight(str(tmp_path), ttl=600) == 2
+    assert not stale_lock.exists() and not stale_result.exists()
+    assert fresh.exists() and held.exists()
+    assert sweep_inflight(str(tmp_path / "missing"), ttl=600) == 0
@@ -0,0 +1,109 @@
+import json
+
+import pytest
+
+from agents.structured_output import IncrementalJSONParser, StructuredOutputError, SCHEMAS, validate, to_markdown
+
+ASSESSMENT = {
+    "risk_score": 72,
+    "risk_level": "High",
+    "risk_factors": [
+        {"factor": "Volatility", "impact": "High", "detail": "Quoted \"spikes\", escapes \\ and {braces}"},
+        {"factor": "Liquidity", "impact": "Low"},
+    ],
+    "recommendations": ["Reduce exposure", "Hedge with options"],
+    "outlook": {"short_term": "Choppy", "long_term": "Stable"},
+}
+
+
+def feed_all(text, size):
+    parser = IncrementalJSONParser()
+    events = []
+    for i in range(0, len(text), size):
+        events.extend(parser.feed(text[i:i + size]))
+    return parser, events
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 1000])
+def test_events_do_not_depend_on_chunking(size):
+    text = json.dumps(ASSESSMENT, indent=2)
+    parser, events = feed_all(text, size)
+    assert parser.result() == ASSESSMENT
+    assert events == feed_all(text, len(text))[1]
+
+
+def test_fields_are_emitted_as_soon_as_complete():
+    parser = IncrementalJSONParser()
+    assert parser.feed('{"risk_score": 7') == []
+    assert parser.feed("2, ") == [(("risk_score",), 72)]
+    assert parser.feed('"recommendations": ["Reduce", "He') == [(("recommendations", 0), "Reduce")]
+    assert parser.feed('dge"]') == [(("recommendations", 1), "Hedge"), (("recommendations",), ["Reduce", "Hedge"])]
+    assert not parser.complete
+    events = parser.feed("}")
+    assert events[-1] == ((), {"risk_score": 72, "recommendations": ["Reduce", "Hedge"]})
+    assert parser.complete
+
+
+def test_nested_items_and_text_around_the_object():
+    parser, events = feed_all('```json\n{"risk_factors": [{"factor": "FX", "impact": "Low"}]}\n```', 4)
+    assert (("risk_factors", 0, "factor"), "FX") in events
+    assert (("risk_factors", 0), {"factor": "FX", "impact": "Low"}) in events
+    assert parser.result() == {"risk_factors": [{"factor": "FX", "impact": "Low"}]}
+
+
+def test_incomplete_object_raises():
+    parser = IncrementalJSONParser()
+    parser.feed('{"risk_score": 72, "risk_level": "Hi')
+    with pytest.raises(StructuredOutputError):
+        parser.result()
+
+
+def test_invalid_value_raises():
+    with pytest.raises(StructuredOutputError):
+        IncrementalJSONParser().feed('{"risk_score": 7x2}')
+
+
+def test_validate_against_schema():
+    schema = SCHEMAS["risk_scoring"]
+    assert validate(ASSESSMENT, schema) == []
+    errors = validate(dict(ASSESSMENT, risk_score=101.5, risk_level="Severe", recommendations=None), schema)
+    assert "$.risk_score: expected integer" in errors
+    assert any(error.startswith("$.risk_level: must be one of") for error in errors)
+    assert "$.recommendations: expected array" in errors
+    missing = {key: value for key, value in ASSESSMENT.items() if key != "risk_factors"}
+    assert validate(missing, schema) == ["$.risk_factors: required"]
+    assert validate(dict(ASSESSMENT, risk_score=True), schema) == ["$.risk_score: expected integer"]
+
+
+AGENT_RESULTS = {
+    "market_analysis": {
+        "insights": ["Rates stay high"], "investment_impacts": ["Trim growth"], "trends": ["AI capex"],
+        "risk_assessment": "Moderate",
+    },
+    "project_status": {
+        "health": "At Risk", "internal_risks": [{"risk": "Vendor API changes", "severity": "High"}],
+        "recommendations": ["Pin the vendor API version"],
+    },
+    "reporting": {
+        "executive_summary": "Stable quarter", "key_metrics": [{"metric": "VaR", "value": "2%"}],
+        "recommendations": ["Hedge FX exposure"],
+    },
+}
+
+
+def test_every_agent_has_a_schema():
+    assert set(SCHEMAS) == {"market_analysis", "risk_scoring", "project_status", "reporting"}
+
+
+@pytest.mark.parametrize("agent", sorted(AGENT_RESULTS))
+def test_agent_results_validate_and_render(agent):
+    result = AGENT_RESULTS[agent]
+    assert validate(result, SCHEMAS[agent]) == []
+    first = next(iter(result))
+    assert validate({key: value for key, value in result.items() if key != first}, SCHEMAS[agent]) == [f"$.{first}: required"]
+    assert to_markdown(agent, result).startswith(f"**{first.replace('_', ' ').title()}:**")
+
+
+def test_enum_fields_of_other_agents_are_checked():
+    errors = validate(dict(AGENT_RESULTS["project_status"], health="Fine"), SCHEMAS["project_status"])
+    assert errors and errors[0].startswith("$.health: must be one of")
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.whatif_risk import IncrementalRiskModel, full_metrics
+
+
+def book(positions=500, groups=6, seed=3):
+    rng = np.random.default_rng(seed)
+    return {
+        "groups": [f"Group {i}" for i in range(groups)],
+        "codes": rng.integers(0, groups, positions),
+        "exposure": rng.uniform(0.1, 5.0, positions),
+        "risk_score": rng.uniform(5, 95, positions),
+        "volatility": rng.uniform(3, 70, positions),
+    }
+
+
+def assert_matches_full(model, data):
+    expected = full_metrics(data["codes"], data["exposure"], data["risk_score"], data["volatility"], model._scale,
+                            model.correlation, model.horizon_days)
+    assert model.metrics() == pytest.approx(expected, rel=1e-9)
+
+
+def test_baseline_matches_full_recompute():
+    data = book()
+    model = IncrementalRiskModel(**data)
+    assert_matches_full(model, data)
+    assert model.baseline == model.metrics()
+
+
+def test_edits_match_full_recompute():
+    data = book()
+    model = IncrementalRiskModel(**data)
+    rng = np.random.default_rng(11)
+    for _ in range(200):
+        group = model.groups[rng.integers(len(model.groups))]
+        model.update({group: model.baseline_exposure(group) * rng.uniform(0, 2)})
+        assert_matches_full(model, data)
+
+
+def test_batch_update_reports_changed_groups():
+    data = book()
+    model = IncrementalRiskModel(**data)
+    unchanged = model.baseline_exposure("Group 1")
+    assert model.update({"Group 0": 1.0, "Group 1": unchanged}) == ["Group 0"]
+    assert model.exposure("Group 0") == pytest.approx(1.0)
+    assert_matches_full(model, data)
+
+
+def test_reset_restores_exact_baseline():
+    data = book()
+    model = IncrementalRiskModel(**data)
+    for group in model.groups:
+        model.update({group: model.baseline_exposure(group) * 1.7})
+    model.update({group: model.baseline_exposure(group) for group in model.groups})
+    assert model.metrics() == model.baseline
+
+
+def test_zero_exposure_portfolio():
+    data = book(positions=20, groups=2)
+    model = IncrementalRiskModel(**data)
+    model.update({"Group 0": 0.0, "Group 1": 0.0})
+    assert model.metrics() == {"exposure": 0.0, "risk_score": 0.0, "concentration": 0.0,
+                               "effective_positions": 0.0, "projected_loss": 0.0}
+
+
+def test_group_without_exposure_cannot_be_scaled():
+    model = IncrementalRiskModel(["A", "B"], [0, 0], [1.0, 2.0], [50, 60], [10, 20])
+    with pytest.raises(ValueError):
+        model.update({"B": 1.0})
+
+
+def test_from_assets_uses_one_group_per_row():
+    frame = pd.DataFrame({
+        "Asset": ["US Equities", "EU Bonds", "Crypto"],
+        "Current_Exposure": [50, 40, 10],
+        "Risk_Score": [65, 40, 95],
+        "Volatility": [18, 7, 65],
+    })
+    model = IncrementalRiskModel.from_assets(frame)
+    assert model.exposures() == {"US Equities": 50.0, "EU Bonds": 40.0, "Crypto": 10.0}
+    assert model.baseline["risk_score"] == pytest.approx((50 * 65 + 40 * 40 + 10 * 95) / 100)
+    assert model.baseline["concentration"] == pytest.approx(0.5 ** 2 * 1e4 + 0.4 ** 2 * 1e4 + 0.1 ** 2 * 1e4)